@@ -0,0 +1,101 @@
+import os
+import queue
+from typing import List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+
+from instrumentation import recorder, span
+from job_queue import JobQueue
+from notifier import LogNotifier
+from reconcile import MATCH_MODES, LocalFile, reconcile
+
+# כתובת ופורט להרצה ישירה (python api_server.py); בפריסה - uvicorn api_server:app
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+# כמה שניות לקוח צריך לחכות כשהתור מלא
+RETRY_AFTER_SECONDS = 30
+
+app = FastAPI(title="Financial Matcher")
+# תור אחד לתהליך; העבודות רצות ב-threads ולא חוסמות את ה-event loop
+jobs = JobQueue()
+
+
+def run_job(files, mode, groups):
+    """עבודה אחת: FinancialMatcher משלה עם הודעות ללוג, לקוח Supabase ומטמון משותפים לתהליך.
+    נשמר רק דוח הריצה - טבלת ההתאמות נקראת בעמודים מ-/jobs/{id}/result"""
+    from financial_matcher import FinancialMatcher
+
+    with span('job', mode=mode):
+        matcher = FinancialMatcher(LogNotifier())
+        if matcher.supabase is None:
+            raise RuntimeError(matcher.notifier.messages[-1]['message'])
+        report, _ = reconcile(matcher, files, mode=mode, groups=groups, details=False)
+    return {'report': report}
+
+
+def _job_or_404(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="עבודה לא נמצאה")
+    return job
+
+
+@app.post('/jobs', status_code=202)
+async def submit_job(files: List[UploadFile] = File(...), mode: str = Form('incremental'),
+                     groups: bool = Form(False)):
+    """העלאת דפי חשבון וקבצי PDF - מחזיר מיד את מזהה העבודה"""
+    if mode not in MATCH_MODES:
+        raise HTTPException(status_code=422, detail=f"מצב התאמה לא מוכר: {mode}")
+    local_files = [LocalFile(file.filename, await file.read()) for file in files]
+    try:
+        job = jobs.submit(lambda: run_job(local_files, mode, groups),
+                          files=[file.name for file in local_files], mode=mode)
+    except queue.Full:
+        raise HTTPException(status_code=503, detail="תור העבודות מלא, נא לנסות שוב מאוחר יותר",
+                            headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+    return job.to_dict()
+
+
+@app.get('/jobs/{job_id}')
+def job_status(job_id: str):
+    """סטטוס העבודה, ואחרי שהסתיימה גם דוח הריצה"""
+    job = _job_or_404(job_id)
+    status = job.to_dict()
+    if job.status == 'done':
+        status['report'] = job.result['report']
+    return status
+
+
+@app.get('/jobs/{job_id}/result')
+def job_result(job_id: str, after_match_date: Optional[str] = None, after_id: Optional[int] = None,
+               limit: int = 1000):
+    """טבלת ההתאמות השמורות אחרי שהעבודה הסתיימה, בעמודים לפי (match_date, match_id) מהחדשה לישנה.
+    העמוד הבא מתבקש עם next; עמוד ריק מסמן את הסוף"""
+    from data_access import DataAccess
+
+    job = _job_or_404(job_id)
+    if job.status != 'done':
+        raise HTTPException(status_code=409, detail=f"העבודה במצב {job.status}")
+    cursor = (after_match_date, after_id) if after_match_date is not None else None
+    matches, next_cursor = DataAccess().reader(page_size=limit).match_details().page(cursor)
+    return {
+        'matches': matches,
+        'next': dict(zip(('after_match_date', 'after_id'), next_cursor)) if next_cursor else None
+    }
+
+
+@app.get('/health')
+def health():
+    return jobs.stats()
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(recorder.prometheus_text(), media_type='text/plain; version=0.0.4')
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host=API_HOST, port=API_PORT)
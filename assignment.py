@@ -0,0 +1,170 @@
+import heapq
+
+import numpy as np
+
+
+def connected_components(rows, cols, n_rows, n_cols):
+    """תווית רכיב קשירות לכל קשת בגרף הדו-צדדי (שורות מול עמודות).
+
+    איחוד שורשים וקיצור מצביעים וקטורי - מספר הסבבים לוגריתמי באורך השרשרת הארוכה
+    """
+    parent = np.arange(n_rows + n_cols)
+    left, right = np.asarray(rows), np.asarray(cols) + n_rows
+
+    while True:
+        left_root, right_root = parent[left], parent[right]
+        low, high = np.minimum(left_root, right_root), np.maximum(left_root, right_root)
+        pending = low != high
+        if not pending.any():
+            return parent[left]
+        # כל שורש נתלה על התווית הקטנה ביותר שפגש, ואז מקצרים עד שכל צומת מצביע לשורש
+        np.minimum.at(parent, high[pending], low[pending])
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+def _solve_sparse(rows, cols, weights, n_rows, n_cols):
+    """השמה במשקל מקסימלי כשמותר להשאיר שורות בלי השמה - מחזיר את העמודה של כל שורה, או -1.
+
+    מסלולים מגדילים קצרים ביותר (Jonker-Volgenant) על עלות -weights, כשלכל שורה עמודת
+    "ללא השמה" פרטית בעלות 0. השורות נשמרות כרשימות סמיכות (CSR), כך שהזיכרון לינארי במספר הקשתות
+    """
+    # עמודת "ללא השמה" של כל שורה נכנסת לרשימת הסמיכות שלה כקשת רגילה
+    total_cols = n_cols + n_rows
+    rows = np.r_[rows, np.arange(n_rows)]
+    order = np.lexsort((np.r_[cols, n_cols + np.arange(n_rows)], rows))
+    adjacency_cols = np.r_[cols, n_cols + np.arange(n_rows)][order]
+    adjacency_cost = np.r_[-weights, np.zeros(n_rows)][order]
+    bounds = np.r_[0, np.cumsum(np.bincount(rows, minlength=n_rows))]
+
+    u, v = np.zeros(n_rows), np.zeros(total_cols)
+    col_for_row = np.full(n_rows, -1)
+    row_for_col = np.full(total_cols, -1)
+
+    for current in range(n_rows):
+        shortest = np.full(total_cols, np.inf)
+        path = np.full(total_cols, -1)
+        visited_rows = np.zeros(n_rows, dtype=bool)
+        visited_cols = np.zeros(total_cols, dtype=bool)
+        # ערימת (מרחק, תפוסה, עמודה) - בשוויון עדיפה עמודה פנויה, והמסלול מסתיים מוקדם יותר
+        heap = []
+        row, distance, sink = current, 0.0, -1
+
+        while sink == -1:
+            visited_rows[row] = True
+            neighbours = adjacency_cols[bounds[row]:bounds[row + 1]]
+            reduced = distance + adjacency_cost[bounds[row]:bounds[row + 1]] - u[row] - v[neighbours]
+            better = ~visited_cols[neighbours] & (reduced < shortest[neighbours])
+            improved, improved_cost = neighbours[better], reduced[better]
+            path[improved] = row
+            shortest[improved] = improved_cost
+            for col, cost in zip(improved.tolist(), improved_cost.tolist()):
+                heapq.heappush(heap, (cost, row_for_col[col] != -1, col))
+
+            while True:
+                distance, _, col = heapq.heappop(heap)
+                if not visited_cols[col] and distance == shortest[col]:
+                    break
+            visited_cols[col] = True
+            if row_for_col[col] == -1:
+                sink = col
+            else:
+                row = row_for_col[col]
+
+        u[current] += distance
+        others = visited_rows.copy()
+        others[current] = False
+        u[others] += distance - shortest[col_for_row[others]]
+        v[visited_cols] -= distance - shortest[visited_cols]
+
+        col = sink
+        while True:
+            row = path[col]
+            row_for_col[col] = row
+            col_for_row[row], col = col, col_for_row[row]
+            if row == current:
+                break
+
+    return np.where(col_for_row < n_cols, col_for_row, -1)
+
+
+class SparseAssignment:
+    """השמה אחד-לאחד במשקל מקסימלי על גרף מועמדים דליל, רכיב קשירות אחרי רכיב.
+
+    רוב הרכיבים זעירים: קשת בודדת נבחרת מיד, וכוכב (שורה אחת או עמודה אחת) לוקח את הקשת
+    הכבדה. ברכיב גדול נבחנת קודם השמה חמדנית - אם היא מגיעה לחסם העליון (סכום המשקל המקסימלי
+    של כל שורה או של כל עמודה) היא אופטימלית; אחרת הרכיב נפתר במסלולים מגדילים
+    """
+
+    def __init__(self):
+        self.stats = {}
+
+    def solve(self, rows, cols, weights):
+        """מסכה של הקשתות שנבחרו. בשוויון משקלים מועדפות קשתות מוקדמות יותר בקלט"""
+        rows, cols = np.asarray(rows, dtype='int64'), np.asarray(cols, dtype='int64')
+        weights = np.asarray(weights, dtype='float64')
+        self.stats = {'components': 0, 'single_edge': 0, 'star': 0, 'greedy': 0, 'augmenting': 0, 'largest': 0}
+        chosen = np.zeros(len(rows), dtype=bool)
+        if len(rows) == 0:
+            return chosen
+
+        n_rows, n_cols = int(rows.max()) + 1, int(cols.max()) + 1
+        labels = connected_components(rows, cols, n_rows, n_cols)
+        order = np.argsort(labels, kind='stable')
+        starts = np.flatnonzero(np.r_[True, labels[order][1:] != labels[order][:-1]])
+        sizes = np.diff(np.r_[starts, len(order)])
+        self.stats['components'] = len(starts)
+        self.stats['largest'] = int(sizes.max())
+
+        single = sizes == 1
+        chosen[order[starts[single]]] = True
+        self.stats['single_edge'] = int(single.sum())
+
+        for start, size in zip(starts[~single], sizes[~single]):
+            edges = order[start:start + size]
+            chosen[self._solve_component(edges, rows[edges], cols[edges], weights[edges])] = True
+        return chosen
+
+    def _solve_component(self, edges, rows, cols, weights):
+        # הכבדות קודם; בשוויון - לפי סדר הקלט
+        ranked = np.argsort(-weights, kind='stable')
+        if len(np.unique(rows)) == 1 or len(np.unique(cols)) == 1:
+            self.stats['star'] += 1
+            return edges[ranked[:1]]
+
+        row_ids, row_index = np.unique(rows, return_inverse=True)
+        col_ids, col_index = np.unique(cols, return_inverse=True)
+        greedy = self._greedy(ranked, row_index, col_index)
+        bound = min(
+            np.maximum.reduceat(weights[np.argsort(row_index, kind='stable')],
+                                np.r_[0, np.cumsum(np.bincount(row_index))[:-1]]).sum(),
+            np.maximum.reduceat(weights[np.argsort(col_index, kind='stable')],
+                                np.r_[0, np.cumsum(np.bincount(col_index))[:-1]]).sum()
+        )
+        if weights[greedy].sum() >= bound - 1e-9:
+            self.stats['greedy'] += 1
+            return edges[greedy]
+
+        self.stats['augmenting'] += 1
+        # קשתות כפולות לאותו זוג - נשמרת הכבדה (הראשונה בסדר הדירוג)
+        pairs = row_index[ranked] * len(col_ids) + col_index[ranked]
+        unique = ranked[np.unique(pairs, return_index=True)[1]]
+        assigned = _solve_sparse(row_index[unique], col_index[unique], weights[unique], len(row_ids), len(col_ids))
+
+        return edges[unique[assigned[row_index[unique]] == col_index[unique]]]
+
+    @staticmethod
+    def _greedy(ranked, row_index, col_index):
+        used_rows, used_cols = set(), set()
+        taken = []
+        for edge in ranked.tolist():
+            row, col = int(row_index[edge]), int(col_index[edge])
+            if row in used_rows or col in used_cols:
+                continue
+            used_rows.add(row)
+            used_cols.add(col)
+            taken.append(edge)
+        return np.array(taken, dtype='int64')
@@ -0,0 +1,99 @@
+"""מדידת תפוקת העלאה: המסלול הסדרתי הישן מול BulkUploader.
+
+ברירת המחדל היא תחליף מקומי ל-PostgREST עם השהיה קבועה לכל בקשה.
+עם --live ההעלאה נעשית ל-Supabase/PostgREST אמיתי לפי SUPABASE_URL ו-SUPABASE_KEY
+(מומלץ מול סביבה מקומית בלבד - השורות נכתבות בפועל).
+
+python benchmarks/bench_bulk_upload.py --rows 200000 --latency 0.05
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bulk_uploader import BulkUploader  # noqa: E402
+
+
+class StandInClient:
+    """תחליף ל-PostgREST: כל בקשה עולה זמן קבוע וזמן נוסף לכל שורה"""
+
+    def __init__(self, latency, per_row):
+        self.latency = latency
+        self.per_row = per_row
+
+    def table(self, name):
+        return self
+
+    def insert(self, records):
+        return StandInRequest(self, len(records))
+
+
+class StandInRequest:
+    def __init__(self, client, rows):
+        self.client = client
+        self.rows = rows
+
+    def execute(self):
+        time.sleep(self.client.latency + self.client.per_row * self.rows)
+
+
+def _frame(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'date': (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')).strftime('%Y-%m-%d'),
+        'amount': np.round(rng.uniform(-10000, 10000, rows), 2),
+        'description': 'העברה בנקאית'
+    })
+
+
+def _sequential(client, df, table_name, batch_size=100):
+    """המסלול הקודם: to_dict על כל הקובץ ומנות של 100 אחת אחרי השנייה"""
+    records = df.to_dict('records')
+    for i in range(0, len(records), batch_size):
+        client.table(table_name).insert(records[i:i + batch_size]).execute()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.02, help='שניות לכל בקשה בתחליף')
+    parser.add_argument('--per-row', type=float, default=0.00001, help='שניות לכל שורה בתחליף')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--table', default='bank_transactions')
+    parser.add_argument('--live', action='store_true')
+    args = parser.parse_args()
+
+    if args.live:
+        from supabase import create_client
+        client = create_client(os.environ['SUPABASE_URL'], os.environ['SUPABASE_KEY'])
+    else:
+        client = StandInClient(args.latency, args.per_row)
+
+    df = _frame(args.rows)
+    results = []
+
+    started = time.perf_counter()
+    _sequential(client, df, args.table)
+    elapsed = time.perf_counter() - started
+    results.append({'mode': 'sequential', 'batch_size': 100, 'workers': 1,
+                    'seconds': elapsed, 'rows_per_second': args.rows / elapsed})
+
+    for workers in args.workers:
+        report = BulkUploader(client, batch_size=args.batch_size, max_workers=workers).upload(df, args.table)
+        results.append({'mode': 'bulk', 'batch_size': args.batch_size, 'workers': workers,
+                        'seconds': report.elapsed, 'rows_per_second': report.rows_per_second,
+                        'failed_batches': len(report.failed_batches)})
+
+    print(json.dumps({'rows': args.rows, 'live': args.live, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""שיא זיכרון בקליטת דף חשבון גדול: קריאה מלאה מול קליטה במנות (StatementReader).
+
+כל מסלול רץ בתהליך נפרד ונמדד לפי ru_maxrss, פחות הזיכרון שהיה בשימוש אחרי טעינת הקובץ.
+ההעלאה עצמה עוברת ל-BulkUploader עם לקוח שמשליך את השורות.
+
+python benchmarks/bench_chunked_ingest.py --rows 1000000 --chunk-rows 50000
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bulk_uploader import BulkUploader  # noqa: E402
+from data_cleaner import DataCleaner  # noqa: E402
+from ingest_ledger import IngestLedger, OccurrenceTracker  # noqa: E402
+from statement_reader import StatementReader  # noqa: E402
+
+
+class DiscardClient:
+    """תחליף ל-PostgREST שמקבל כל מנה ומשליך אותה"""
+
+    def table(self, name):
+        return self
+
+    def upsert(self, records, **kwargs):
+        return self
+
+    def execute(self):
+        return None
+
+
+def _write_statement(path, rows):
+    rng = np.random.default_rng(0)
+    # כתיבה במנות כדי שיצירת הקובץ לא תשפיע על המדידה
+    for start in range(0, rows, 100_000):
+        count = min(100_000, rows - start)
+        dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, count), unit='D')
+        pd.DataFrame({
+            'תאריך': dates.strftime('%d/%m/%Y'),
+            'סכום': [f'₪{value:,.2f}' for value in rng.uniform(-10000, 10000, count)],
+            'תיאור': rng.choice(['העברה בנקאית', 'משכורת', 'הוראת קבע', 'כרטיס אשראי'], count)
+        }).to_csv(path, mode='a', header=start == 0, index=False)
+
+
+def _peak_rss_mb():
+    # ru_maxrss בקילובייטים בלינוקס
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(mode, path, chunk_rows, results):
+    # הקובץ בזיכרון, כמו UploadedFile של Streamlit
+    file = io.BytesIO(Path(path).read_bytes())
+    file.name = 'statement.csv'
+    baseline = _peak_rss_mb()
+    uploader = BulkUploader(DiscardClient(), batch_size=500, max_workers=4)
+
+    started = time.perf_counter()
+    rows = 0
+    if mode == 'whole':
+        df = DataCleaner.clean_bank_transactions(pd.read_csv(file), vectorized=True)
+        df = IngestLedger.add_natural_keys(df, 'bank_transactions')
+        rows = uploader.upload(df, 'bank_transactions', on_conflict='natural_key').rows_sent
+    else:
+        occurrences = OccurrenceTracker()
+        for chunk, _ in StatementReader(chunk_rows).iter_chunks(file):
+            df = DataCleaner.clean_bank_transactions(chunk, vectorized=True)
+            df = IngestLedger.add_natural_keys(df, 'bank_transactions', occurrences)
+            rows += uploader.upload(df, 'bank_transactions', on_conflict='natural_key').rows_sent
+
+    results.put({
+        'mode': mode,
+        'rows': rows,
+        'seconds': time.perf_counter() - started,
+        'peak_mb_above_file': _peak_rss_mb() - baseline
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=50_000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'statement.csv'
+        _write_statement(path, args.rows)
+        file_mb = path.stat().st_size / 1e6
+
+        results = []
+        for mode in ('whole', 'chunked'):
+            queue = context.Queue()
+            process = context.Process(target=_run, args=(mode, str(path), args.chunk_rows, queue))
+            process.start()
+            results.append(queue.get())
+            process.join()
+
+    print(json.dumps({
+        'rows': args.rows,
+        'file_mb': file_mb,
+        'chunk_rows': args.chunk_rows,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""זמני הריצה של כל שלבי ההתאמה מקצה לקצה, על נתונים סינתטיים בכמה גדלים.
+
+השלבים: קריאת קבצים (StatementReader), ניקוי (DataCleaner), חילוץ מ-PDF (PDFBatchProcessor),
+העלאה (BulkUploader), התאמה, קריאת פרטי ההתאמות וחישוב הסטטיסטיקות החודשיות של הלוח.
+
+עם --database-url (או BENCH_DATABASE_URL) ההעלאה, ההתאמה (save_best_matches) וקריאת הפרטים
+(get_match_details_page) רצות מול Postgres מקומי, בסכמה זמנית שנמחקת בסוף. בלי בסיס נתונים
+ההעלאה מדולגת, וההתאמה והפרטים מחושבים ב-MatchEngine בזיכרון.
+
+התוצאות נכתבות כ-JSON (ברירת מחדל benchmarks/results/<commit>.json); עם --baseline מצורף
+היחס מול קובץ תוצאות קודם לכל גודל ושלב, כך שאפשר להשוות בין commits.
+
+python benchmarks/bench_end_to_end.py --rows 1000 10000 100000 --baseline benchmarks/results/abc1234.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bulk_uploader import BulkUploader  # noqa: E402
+from data_access import DataAccess, QueryCache  # noqa: E402
+from data_cleaner import DataCleaner  # noqa: E402
+from ingest_ledger import IngestLedger, OccurrenceTracker  # noqa: E402
+from integrated_dashboard import IntegratedDashboard  # noqa: E402
+from keyset_reader import KeysetReader  # noqa: E402
+from match_engine import MatchEngine  # noqa: E402
+from pdf_processor import PDFBatchProcessor  # noqa: E402
+from statement_reader import StatementReader  # noqa: E402
+from synthetic_data import SOURCE_TABLES, SyntheticLedger  # noqa: E402
+
+CLEANERS = {
+    'bank_transactions': DataCleaner.clean_bank_transactions,
+    'checks': DataCleaner.clean_checks,
+    'bank_transfers': DataCleaner.clean_transfers,
+    'invoices': DataCleaner.clean_invoices,
+    'receipts': DataCleaner.clean_receipts
+}
+STAGES = ['generate', 'read', 'clean', 'extract', 'upload', 'match', 'match_details', 'dashboard']
+
+
+class PostgresClient:
+    """תחליף ל-Supabase מעל psycopg2, כדי ש-BulkUploader, KeysetReader ו-DataAccess ירוצו כמו שהם"""
+
+    def __init__(self, dsn, schema):
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.pool = ThreadedConnectionPool(1, 8, dsn, options=f'-c search_path={schema}')
+
+    def run(self, sql, args=None, values=None):
+        from psycopg2.extras import RealDictCursor, execute_values
+
+        connection = self.pool.getconn()
+        try:
+            with connection, connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                if values is not None:
+                    execute_values(cursor, sql, values, page_size=len(values))
+                else:
+                    cursor.execute(sql, args)
+                return [dict(row) for row in cursor.fetchall()] if cursor.description else []
+        finally:
+            self.pool.putconn(connection)
+
+    def table(self, name):
+        return PostgresWrite(self, name)
+
+    def rpc(self, name, params=None):
+        params = params or {}
+        arguments = ', '.join(f'{key} => %({key})s' for key in params)
+        return PostgresQuery(self, f'SELECT * FROM {name}({arguments})', params)
+
+    def close(self):
+        self.pool.closeall()
+
+
+class PostgresQuery:
+    def __init__(self, client, sql, args):
+        self.client = client
+        self.sql = sql
+        self.args = args
+
+    def execute(self):
+        return SimpleNamespace(data=self.client.run(self.sql, self.args))
+
+
+class PostgresWrite:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.records = []
+        self.on_conflict = None
+
+    def insert(self, records):
+        self.records = records
+        return self
+
+    def upsert(self, records, on_conflict=None, ignore_duplicates=False):
+        self.records = records
+        self.on_conflict = on_conflict if ignore_duplicates else None
+        return self
+
+    def execute(self):
+        columns = list(self.records[0])
+        sql = f"INSERT INTO {self.name} ({', '.join(columns)}) VALUES %s"
+        if self.on_conflict:
+            sql += f' ON CONFLICT ({self.on_conflict}) DO NOTHING'
+        values = [tuple(None if pd.isna(value) else value for value in record.values()) for record in self.records]
+        self.client.run(sql, values=values)
+        return SimpleNamespace(data=None)
+
+
+class StageTimer:
+    """זמן ומספר שורות לכל שלב"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, function, rows=len):
+        """rows מחשב את מספר השורות מתוצאת השלב"""
+        started = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - started
+        count = int(rows(result))
+        self.stages[name] = {
+            'seconds': seconds,
+            'rows': count,
+            'rows_per_second': count / seconds if seconds else None
+        }
+        return result
+
+    def skip(self, name, reason):
+        self.stages[name] = {'seconds': None, 'rows': 0, 'rows_per_second': None, 'skipped': reason}
+
+
+def _create_schema(dsn):
+    import psycopg2
+
+    schema = f'bench_{uuid.uuid4().hex[:8]}'
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE SCHEMA {schema}')
+        cursor.execute(f'SET search_path TO {schema}')
+        cursor.execute((ROOT / 'init_db.sql').read_text(encoding='utf-8'))
+        cursor.execute((ROOT / 'matching_functions.sql').read_text(encoding='utf-8'))
+    return connection, schema
+
+
+def _write_files(tables, directory):
+    """כל טבלה כקובץ CSV, כמו שהמשתמש מעלה אותה"""
+    paths = {}
+    for table_name, df in tables.items():
+        paths[table_name] = Path(directory) / f'{table_name}.csv'
+        df.to_csv(paths[table_name], index=False)
+    return paths
+
+
+def _read(paths, chunk_rows):
+    reader = StatementReader(chunk_rows)
+    chunks = {}
+    for table_name, path in paths.items():
+        with open(path, 'rb') as handle:
+            file = io.BytesIO(handle.read())
+        file.name = path.name
+        chunks[table_name] = [chunk for chunk, _ in reader.iter_chunks(file)]
+    return chunks
+
+
+def _clean(chunks):
+    cleaned = {}
+    for table_name, table_chunks in chunks.items():
+        df = pd.concat([CLEANERS[table_name](chunk, vectorized=True) for chunk in table_chunks], ignore_index=True)
+        cleaned[table_name] = df
+    return cleaned
+
+
+def _extract(documents, workers):
+    return [result['record'] for result in PDFBatchProcessor(max_workers=workers).process(documents)
+            if result['error'] is None]
+
+
+def _upload(client, cleaned):
+    rows = 0
+    uploader = BulkUploader(client, batch_size=500, max_workers=4)
+    for table_name, df in cleaned.items():
+        df = IngestLedger.add_natural_keys(df, table_name, OccurrenceTracker())
+        report = uploader.upload(df, table_name, on_conflict='natural_key')
+        if not report.ok:
+            raise RuntimeError(f"העלאה ל-{table_name} נכשלה: {report.failed_batches[0]['error']}")
+        rows += report.rows_sent
+    return rows
+
+
+def _save_best_matches(client):
+    """ריצת התאמה מלאה - save_best_matches לא מחזירה ערך, ולכן מספר ההתאמות נספר אחריה"""
+    client.rpc('save_best_matches').execute()
+    return client.run('SELECT COUNT(*) AS saved FROM transaction_matches')[0]['saved']
+
+
+def _with_ids(cleaned):
+    """מזהים רציפים לכל טבלה, כמו SERIAL אחרי העלאה לטבלה ריקה"""
+    return {table_name: df.assign(id=np.arange(1, len(df) + 1)) for table_name, df in cleaned.items()}
+
+
+def _dashboard(client=None):
+    """לוח בלי חיבור ל-Supabase - מול Postgres מקומי, או לחישוב מקומי בלבד"""
+    dashboard = IntegratedDashboard.__new__(IntegratedDashboard)
+    dashboard.client = client
+    dashboard.data = DataAccess(client, QueryCache()) if client is not None else None
+    return dashboard
+
+
+def _total_rows(tables):
+    """שורות בכל הטבלאות - לכל טבלה DataFrame או רשימת מנות"""
+    return sum(len(part) for value in tables.values() for part in (value if isinstance(value, list) else [value]))
+
+
+def run_size(rows, args, client=None):
+    timer = StageTimer()
+    ledger = SyntheticLedger(rows, seed=args.seed)
+    tables = timer.run('generate', ledger.tables, rows=_total_rows)
+    pdf_count = args.pdfs if args.pdfs is not None else min(max(rows // 100, 20), 1000)
+    documents = ledger.pdfs(pdf_count)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = _write_files(tables, directory)
+        del tables
+        chunks = timer.run('read', lambda: _read(paths, args.chunk_rows), rows=_total_rows)
+    # partial ולא lambda - המנות משתחררות ב-del מיד אחרי הניקוי
+    cleaned = timer.run('clean', partial(_clean, chunks), rows=_total_rows)
+    del chunks
+    timer.run('extract', lambda: _extract(documents, args.workers))
+
+    if client is not None:
+        timer.run('upload', lambda: _upload(client, cleaned), rows=lambda count: count)
+        timer.run('match', lambda: _save_best_matches(client), rows=lambda saved: saved)
+        details = timer.run('match_details',
+                            lambda: KeysetReader(client, page_size=args.page_size).match_details().to_frame())
+        timer.run('dashboard', lambda: _dashboard(client).get_monthly_stats())
+    else:
+        timer.skip('upload', 'no database (--database-url)')
+        frames = _with_ids(cleaned)
+        bank, sources = frames['bank_transactions'], {table: frames[table] for table in SOURCE_TABLES}
+        best = timer.run('match', lambda: MatchEngine().best_matches(bank, sources))
+        details = timer.run('match_details', lambda: MatchEngine.match_details(best, bank, sources))
+        timer.run('dashboard', lambda: _dashboard().calculate_monthly_stats(bank, details))
+
+    return {
+        'rows': rows,
+        'table_rows': {table: len(df) for table, df in cleaned.items()},
+        'pdfs': pdf_count,
+        'matches': len(details),
+        'stages': timer.stages
+    }
+
+
+def _metadata(args, database):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'database': database
+    }
+
+
+def compare(results, baseline):
+    """יחס זמן (נוכחי / בסיס) לכל גודל ושלב שקיים בשתי הריצות - מעל 1 זו האטה"""
+    previous = {run['rows']: run['stages'] for run in baseline['runs']}
+    comparison = {}
+    for run in results['runs']:
+        if run['rows'] not in previous:
+            continue
+        ratios = {}
+        for stage, timing in run['stages'].items():
+            before = previous[run['rows']].get(stage, {}).get('seconds')
+            if timing['seconds'] and before:
+                ratios[stage] = timing['seconds'] / before
+        comparison[str(run['rows'])] = ratios
+    return {'baseline_commit': baseline['metadata'].get('commit'), 'time_ratio': comparison}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help='מספר עסקאות הבנק בכל ריצה, 1,000 עד 5,000,000')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pdfs', type=int, default=None, help='ברירת מחדל: 1%% מהשורות, 20 עד 1,000')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-rows', type=int, default=50_000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'))
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--baseline', type=Path, default=None)
+    args = parser.parse_args()
+
+    runs = []
+    for rows in args.rows:
+        if args.database_url:
+            connection, schema = _create_schema(args.database_url)
+            client = PostgresClient(args.database_url, schema)
+            try:
+                runs.append(run_size(rows, args, client))
+            finally:
+                client.close()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DROP SCHEMA {schema} CASCADE')
+                connection.close()
+        else:
+            runs.append(run_size(rows, args))
+
+    results = {'metadata': _metadata(args, bool(args.database_url)), 'stage_order': STAGES, 'runs': runs}
+    if args.baseline:
+        results['comparison'] = compare(results, json.loads(args.baseline.read_text(encoding='utf-8')))
+
+    output = args.output or ROOT / 'benchmarks' / 'results' / f"{results['metadata']['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""דיוק ותפוקה של חילוץ השדות ממסמכים: החילוץ הקודם (findall על הטקסט) מול FieldExtractor.
+
+ברירת המחדל היא קורפוס סינתטי עם מסיחים (טלפון, ע.מ, סכום לפני מע"מ, שורות פריטים).
+עם --corpus DIR נטענים זוגות NAME.txt ו-NAME.json ({"doc_type", "date", "amount", "reference"}).
+
+python benchmarks/bench_field_extractor.py --docs 5000
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from field_extractor import FieldExtractor  # noqa: E402
+
+
+def legacy_extract(text, doc_type):
+    """החילוץ שהיה ב-PDFProcessor.extract_data_from_text לפני המחלץ המקומפל"""
+    data = {'date': None, 'amount': None, 'reference': None}
+    dates = re.findall(r'\d{1,2}[./]\d{1,2}[./]\d{2,4}', text)
+    if dates:
+        data['date'] = dates[0]
+    amounts = re.findall(r'₪?\s*[\d,]+\.?\d*', text)
+    if amounts:
+        try:
+            data['amount'] = float(amounts[0].replace('₪', '').replace(',', '').strip())
+        except ValueError:
+            pass
+    if doc_type == 'invoice':
+        ref_pattern = r'חשבונית\s*מס[׳\']?\s*[:#]?\s*(\d+)'
+    else:
+        ref_pattern = r'קבלה\s*מס[׳\']?\s*[:#]?\s*(\d+)'
+    match = re.search(ref_pattern, text)
+    if match:
+        data['reference'] = match.group(1)
+    return data
+
+
+def synthetic_document(rng):
+    """מסמך סינתטי אחד והערכים הנכונים שלו"""
+    doc_type = rng.choice(['invoice', 'receipt'])
+    reference = str(rng.randint(1000, 999999))
+    date = f"{rng.randint(1, 28):02d}{rng.choice('/.')}{rng.randint(1, 12):02d}{rng.choice('/.')}{rng.randint(2020, 2025)}"
+    items = [round(rng.uniform(10, 5000), 2) for _ in range(rng.randint(1, 8))]
+    subtotal = round(sum(items), 2)
+    total = round(subtotal * 1.17, 2)
+
+    lines = [
+        f'{rng.choice(["אלפא", "בטא", "גמא"])} שירותים בע"מ ע.מ {rng.randint(500000000, 599999999)}',
+        f'טל: 0{rng.randint(2, 9)}-{rng.randint(1000000, 9999999)}',
+        f'{"חשבונית מס" if doc_type == "invoice" else "קבלה מס"}: {reference}',
+        f'תאריך: {date}'
+    ]
+    lines += [f'פריט {i + 1} {rng.randint(1, 5)} יח\' {item:,.2f}' for i, item in enumerate(items)]
+    lines += [
+        f'סה"כ לפני מע"מ {subtotal:,.2f}',
+        f'מע"מ 17% {total - subtotal:,.2f}',
+        f'סה"כ לתשלום ₪ {total:,.2f}' if rng.random() < 0.7 else f'לתשלום: {total:,.2f} ש"ח'
+    ]
+    # חלק מהמסמכים מגיעים מעמוד שני עם הערות שוליים
+    if rng.random() < 0.3:
+        lines += [f'הערה {i}: תנאי תשלום שוטף +{rng.choice([30, 60, 90])}' for i in range(rng.randint(1, 20))]
+
+    truth = {'doc_type': doc_type, 'date': date, 'amount': total, 'reference': reference}
+    return '\n'.join(lines), truth
+
+
+def load_corpus(directory):
+    corpus = []
+    for text_path in sorted(Path(directory).glob('*.txt')):
+        truth = json.loads(text_path.with_suffix('.json').read_text(encoding='utf-8'))
+        corpus.append((text_path.read_text(encoding='utf-8'), truth))
+    return corpus
+
+
+def evaluate(name, extract, corpus):
+    correct = {'date': 0, 'amount': 0, 'reference': 0}
+    started = time.perf_counter()
+    outputs = [extract(text, truth['doc_type']) for text, truth in corpus]
+    elapsed = time.perf_counter() - started
+
+    for data, (_, truth) in zip(outputs, corpus):
+        correct['date'] += data['date'] == truth['date']
+        correct['amount'] += data['amount'] is not None and abs(data['amount'] - truth['amount']) < 0.005
+        correct['reference'] += data['reference'] == str(truth['reference'])
+
+    text_bytes = sum(len(text.encode('utf-8')) for text, _ in corpus)
+    return {
+        'extractor': name,
+        'accuracy': {field: count / len(corpus) for field, count in correct.items()},
+        'docs_per_second': len(corpus) / elapsed,
+        'mb_per_second': text_bytes / elapsed / 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus', help='תיקייה עם קבצי txt ו-json תואמים')
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        rng = random.Random(args.seed)
+        corpus = [synthetic_document(rng) for _ in range(args.docs)]
+
+    extractor = FieldExtractor()
+    results = [
+        evaluate('legacy', legacy_extract, corpus),
+        evaluate('compiled', extractor.extract, corpus)
+    ]
+    print(json.dumps({'documents': len(corpus), 'results': results}, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""חיפוש תשלומים מפוצלים על קלט עוין: SubsetSumSearch (meet-in-the-middle) מול מעבר על כל הצירופים,
+ו-GroupMatchEngine מקצה לקצה על הפקדות שיקים סינתטיות.
+
+המקרים העוינים הם כאלה שאין בהם פתרון או שיש בהם מעט מאוד, כך שאי אפשר לעצור מוקדם:
+סכומים זוגיים מול יעד אי-זוגי, סכומים זהים, והרבה סכומים שמחטיאים את היעד באגורה.
+
+python benchmarks/bench_group_matcher.py --rows 20000
+"""
+import argparse
+import json
+import sys
+import time
+from itertools import combinations
+from math import comb
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from group_matcher import GroupMatchEngine, SubsetSumSearch  # noqa: E402
+
+# מעבר על כל הצירופים רק כשמספרם סביר
+BRUTE_FORCE_LIMIT = 2_000_000
+
+
+def _adversarial_cases(size, rng):
+    return {
+        'parity_trap': (rng.integers(1, 5000, size) * 2, 10001),
+        'equal_amounts': (np.full(size, 1000), 3001),
+        'near_miss': (rng.integers(24000, 26000, size) * 10, 1000001),
+        'planted': (np.r_[rng.integers(1000, 90000, size - 4), [12345, 23456, 34567, 29632]], 100000)
+    }
+
+
+def _brute_force(amounts, target, max_size):
+    for group_size in range(2, max_size + 1):
+        for subset in combinations(amounts.tolist(), group_size):
+            if sum(subset) == target:
+                return subset
+    return None
+
+
+def _time(function, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - started) / repeats, result
+
+
+def bench_search(sizes, max_size, time_budget, repeats):
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        for name, (amounts, target) in _adversarial_cases(size, rng).items():
+            search = SubsetSumSearch(max_size=max_size, time_budget=time_budget)
+            seconds, chosen = _time(lambda: search.find(amounts, target), repeats)
+            combos = sum(comb(size, k) for k in range(2, max_size + 1))
+            brute = None
+            if combos <= BRUTE_FORCE_LIMIT:
+                brute, _ = _time(lambda: _brute_force(amounts, target, max_size), 1)
+            results.append({
+                'case': name,
+                'candidates': size,
+                'max_size': max_size,
+                'found': chosen is not None,
+                'timed_out': search.timed_out,
+                'search_ms': seconds * 1000,
+                'brute_force_ms': brute * 1000 if brute is not None else None
+            })
+    return results
+
+
+def _deposits(rows, seed=0):
+    """הפקדות של 2-4 שיקים מאותו משלם, בתוספת שיקים בודדים ועסקאות בלי התאמה"""
+    rng = np.random.default_rng(seed)
+    bank, checks = [], []
+    start = pd.Timestamp('2023-01-01')
+    for bank_id in range(1, rows + 1):
+        day = start + pd.Timedelta(days=int(rng.integers(0, 365)))
+        payer = f'לקוח {rng.integers(0, rows // 10 + 1)}'
+        parts = np.round(rng.lognormal(6, 1, rng.integers(2, 5)), 2)
+        if rng.random() < 0.3:
+            # בלי פתרון: השיקים לא מסתכמים לסכום ההפקדה
+            bank.append((bank_id, day, float(parts.sum()) + 0.37, 'הפקדת שיקים'))
+        else:
+            bank.append((bank_id, day, float(np.round(parts.sum(), 2)), 'הפקדת שיקים'))
+        for part in parts:
+            shift = pd.Timedelta(days=int(rng.integers(-2, 3)))
+            checks.append((len(checks) + 1, day + shift, float(part), payer))
+
+    bank = pd.DataFrame(bank, columns=['id', 'date', 'amount', 'description'])
+    checks = pd.DataFrame(checks, columns=['id', 'date', 'amount', 'payer_name'])
+    checks['check_number'] = None
+    return bank, {'checks': checks}
+
+
+def bench_engine(rows, time_budget):
+    bank, sources = _deposits(rows)
+    engine = GroupMatchEngine(time_budget=time_budget)
+    started = time.perf_counter()
+    groups = engine.find_groups(bank, sources)
+    return {
+        'bank_rows': rows,
+        'check_rows': len(sources['checks']),
+        'seconds': time.perf_counter() - started,
+        'groups': len(groups),
+        **engine.stats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--time-budget', type=float, default=0.05)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        'search': bench_search([16, 24], 4, args.time_budget, args.repeats)
+        + bench_search([24, 32, 40], 6, args.time_budget, args.repeats),
+        'engine': bench_engine(args.rows, args.time_budget)
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
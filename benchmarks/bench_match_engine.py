@@ -0,0 +1,89 @@
+"""זמן התאמה בזיכרון על קלט גדול: MatchEngine המדויק מול TolerantMatchEngine בכמה רמות סבילות.
+
+כל מנוע רץ ב-best_matches (הנתיב של process_matches) בתהליך משלו, כדי ש-peak_rss_mb יהיה של המנוע
+הזה בלבד - כולל הקלט (כ-340MB במיליון שורות), שנבנה לפני הפיצול לתהליכים.
+
+python benchmarks/bench_match_engine.py --rows 1000000
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from match_engine import MatchEngine, TolerantMatchEngine  # noqa: E402
+
+
+def _inputs(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = (pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 730, rows), unit='D')).strftime('%Y-%m-%d')
+    amounts = np.round(rng.lognormal(6, 1.5, rows), 2)
+    bank = pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'date': dates,
+        'amount': -amounts,
+        'description': [f'שיק {number}' for number in rng.integers(1000, 999999, rows)]
+    })
+
+    # חצי מהמסמכים תואמים לעסקת בנק עם עמלה או הפרש עיגול קטן והסטת תאריך
+    shift = rng.integers(-2, 3, rows)
+    fee = np.where(rng.random(rows) < 0.3, rng.choice([0.01, 2.5, 5.0], rows), 0.0)
+    matched = rng.random(rows) < 0.5
+    day_shift = np.where(matched, shift, rng.integers(-300, 300, rows))
+    checks = pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'date': (pd.to_datetime(dates) + pd.to_timedelta(day_shift, unit='D')).strftime('%Y-%m-%d'),
+        'amount': np.where(matched, amounts + fee, np.round(rng.lognormal(6, 1.5, rows), 2)),
+        'check_number': bank['description'].str.slice(4).where(matched, None),
+        'payer_name': None
+    })
+    return bank, {'checks': checks}
+
+
+ENGINES = {
+    'exact': lambda: MatchEngine(),
+    'tolerant abs=5': lambda: TolerantMatchEngine(amount_tolerance=5, min_score=0.6),
+    'tolerant abs=5 pct=1': lambda: TolerantMatchEngine(amount_tolerance=5, amount_tolerance_pct=1, min_score=0.6)
+}
+
+# הקלט נבנה פעם אחת בתהליך הראשי ועובר לתהליכי המדידה ב-fork
+_INPUTS = None
+
+
+def _run(name):
+    bank, sources = _INPUTS
+    started = time.perf_counter()
+    best = ENGINES[name]().best_matches(bank, sources)
+    return {
+        'engine': name,
+        'seconds': time.perf_counter() - started,
+        'matched_bank_rows': len(best),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--engine', action='append', choices=list(ENGINES))
+    args = parser.parse_args()
+
+    global _INPUTS
+    _INPUTS = _inputs(args.rows)
+    context = multiprocessing.get_context('fork')
+    results = []
+    for name in args.engine or ENGINES:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(_run, (name,)))
+    print(json.dumps({'rows': args.rows, 'results': results}, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
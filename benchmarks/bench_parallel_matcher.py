@@ -0,0 +1,98 @@
+"""האצה של ParallelMatchEngine ב-1, 2, 4 ו-8 תהליכים מול MatchEngine בתהליך אחד.
+
+הקלט: כמה חברות, שנה של עסקאות בנק ושיקים, כך שיש הרבה מחיצות (חברה, חודש, דלי סכום).
+כל הרצה בודקת שהתוצאה זהה לזו של MatchEngine שרץ על כל חברה בנפרד.
+
+python benchmarks/bench_parallel_matcher.py --rows 2000000 --companies 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from match_engine import MatchEngine  # noqa: E402
+from parallel_matcher import ParallelMatchEngine  # noqa: E402
+
+
+def _inputs(rows, companies, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2023-01-01')
+
+    def table(count):
+        return pd.DataFrame({
+            'id': np.arange(1, count + 1),
+            'company_id': rng.integers(0, companies, count),
+            'date': (start + pd.to_timedelta(rng.integers(0, 365, count), unit='D')).strftime('%Y-%m-%d'),
+            'amount': np.round(rng.lognormal(6, 1.2, count), 0)
+        })
+
+    return table(rows), {'checks': table(rows), 'invoices': table(rows // 2)}
+
+
+def _timed(engine, bank, sources):
+    started = time.perf_counter()
+    candidates = engine.match_transactions(bank, sources)
+    return time.perf_counter() - started, candidates
+
+
+def _serial(bank, sources):
+    """MatchEngine בתהליך אחד, חברה אחרי חברה - הבסיס להשוואה"""
+    engine = MatchEngine()
+    started = time.perf_counter()
+    parts = [
+        engine.match_transactions(company_bank, {name: df[df['company_id'] == company]
+                                                 for name, df in sources.items()})
+        for company, company_bank in bank.groupby('company_id')
+    ]
+    return time.perf_counter() - started, pd.concat(parts, ignore_index=True)
+
+
+def _canonical(candidates):
+    return candidates.sort_values(['bank_transaction_id', 'matched_table', 'matched_id'], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--companies', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    bank, sources = _inputs(args.rows, args.companies)
+    serial_seconds, expected = _serial(bank, sources)
+    expected = _canonical(expected)
+
+    results = []
+    for workers in args.workers:
+        engine = ParallelMatchEngine(workers=workers)
+        seconds, candidates = _timed(engine, bank, sources)
+        results.append({
+            'workers': workers,
+            'seconds': seconds,
+            'speedup_vs_serial_engine': serial_seconds / seconds,
+            'identical': _canonical(candidates).equals(expected),
+            **engine.stats
+        })
+    one_worker = results[0]['seconds'] if args.workers[0] == 1 else None
+    for result in results:
+        result['speedup_vs_one_worker'] = one_worker / result['seconds'] if one_worker else None
+
+    print(json.dumps({
+        'rows': args.rows,
+        'companies': args.companies,
+        'cpu_count': os.cpu_count(),
+        'candidates': len(expected),
+        'serial_engine_seconds': serial_seconds,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
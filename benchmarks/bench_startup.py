@@ -0,0 +1,89 @@
+"""זמן טעינה (cold start) של נקודות הכניסה, לפי python -X importtime.
+
+כל נקודת כניסה נטענת כמה פעמים, כל פעם בתהליך Python חדש. מדווח את החציון של זמן הטעינה המצטבר,
+את המודולים העליונים הכבדים ביותר, וחבילות כבדות שנטענו למרות שהן ב-STARTUP_BUDGETS כאסורות.
+tests/test_startup.py אוכף את אותם תקציבים.
+
+python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# חבילות שנטענות רק בנתיב שצריך אותן: PDF ו-OCR בעיבוד קבצים, supabase ביצירת הלקוח,
+# plotly.express בבניית תרשים ו-streamlit רק בדפים עצמם
+HEAVY_MODULES = ['pdfplumber', 'pdfminer', 'pytesseract', 'PIL', 'plotly', 'supabase', 'fastapi', 'streamlit']
+# streamlit עצמו טוען את PIL ואת ליבת plotly, ולכן בדפים נאסרים רק plotly.express וחבילות העיבוד
+_PAGE_FORBIDDEN = ['pdfplumber', 'pdfminer', 'pytesseract', 'plotly.express', 'supabase', 'fastapi']
+# נקודת כניסה -> (תקציב בשניות לטעינה המצטברת, חבילות שאסור שייטענו)
+# התקציבים בערך פי 2.5 מהמדידה על מכונת פיתוח, כדי שמכונה איטית לא תיכשל סתם
+STARTUP_BUDGETS = {
+    'financial_matcher': (1.5, HEAVY_MODULES),
+    'dashboard': (2.5, _PAGE_FORBIDDEN),
+    'integrated_dashboard': (2.5, _PAGE_FORBIDDEN),
+    'reconcile': (0.5, HEAVY_MODULES + ['pandas']),
+    'api_server': (1.5, [module for module in HEAVY_MODULES if module != 'fastapi'] + ['pandas'])
+}
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def import_times(module):
+    """טעינת module בתהליך חדש - מחזיר {שם מודול: (זמן עצמי, זמן מצטבר, עומק)} במיקרו-שניות"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            times[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return times
+
+
+def loaded_heavy(times, forbidden):
+    """החבילות מתוך forbidden שנטענו, הן או תת-מודול שלהן"""
+    return sorted(
+        module for module in forbidden
+        if any(name == module or name.startswith(module + '.') for name in times)
+    )
+
+
+def measure(module, repeat=3, top=10):
+    runs = [import_times(module) for _ in range(repeat)]
+    seconds = [runs_times[module][1] / 1e6 for runs_times in runs]
+    budget, forbidden = STARTUP_BUDGETS[module]
+    last = runs[-1]
+    top_level = sorted(
+        ((name, cumulative) for name, (_, cumulative, depth) in last.items() if depth == 1),
+        key=lambda item: -item[1]
+    )
+    return {
+        'seconds': statistics.median(seconds),
+        'budget_seconds': budget,
+        'modules': len(last),
+        'heaviest': [{'module': name, 'seconds': cumulative / 1e6} for name, cumulative in top_level[:top]],
+        'forbidden_loaded': loaded_heavy(last, forbidden)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--module', action='append', choices=list(STARTUP_BUDGETS))
+    args = parser.parse_args()
+
+    results = {module: measure(module, args.repeat) for module in args.module or STARTUP_BUDGETS}
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""זיכרון וזמן התאמה: DataFrame נקי (מחרוזות תאריך, float, טקסט חופשי) מול TransactionStore.
+
+מדווח את גודל כל ייצוג, את זמן הבנייה, את זמן MatchEngine על כל אחד מהם,
+ואת הפער בין סיכום חודשי ב-float לסיכום באגורות.
+
+python benchmarks/bench_transaction_store.py --rows 1000000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from match_engine import MatchEngine  # noqa: E402
+from transaction_store import TransactionStore  # noqa: E402
+
+
+def _cleaned(count, rng, first_id=1):
+    """שורות בפורמט שיוצא מ-DataCleaner: תאריך כמחרוזת, סכום float, תיאור מתוך כמה מאות ספקים"""
+    start = pd.Timestamp('2023-01-01')
+    vendors = np.array([f'העברה לספק {i}' for i in range(500)], dtype=object)
+    return pd.DataFrame({
+        'id': np.arange(first_id, first_id + count),
+        'date': (start + pd.to_timedelta(rng.integers(0, 365, count), unit='D')).strftime('%Y-%m-%d').astype(object),
+        'amount': np.round(rng.lognormal(6, 1.2, count), 2),
+        'description': rng.choice(vendors, count),
+        'reference_number': rng.integers(100000, 999999, count).astype(str).astype(object)
+    })
+
+
+def _timed(function):
+    started = time.perf_counter()
+    result = function()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bank = _cleaned(args.rows, rng)
+    checks = _cleaned(args.rows, rng)
+
+    build_seconds, bank_store = _timed(lambda: TransactionStore.from_frame(bank))
+    checks_store = TransactionStore.from_frame(checks)
+
+    engine = MatchEngine()
+    frame_seconds, expected = _timed(lambda: engine.match_transactions(bank, {'checks': checks}))
+    store_seconds, actual = _timed(lambda: engine.match_transactions(bank_store, {'checks': checks_store}))
+
+    float_totals = pd.to_datetime(bank['date']).dt.to_period('M').pipe(
+        lambda months: bank['amount'].groupby(months).sum()
+    )
+    exact_totals = bank_store.monthly_totals()['amount_cents']
+
+    frame_bytes = int(bank.memory_usage(deep=True).sum())
+    print(json.dumps({
+        'rows': args.rows,
+        'memory': {
+            'dataframe_bytes': frame_bytes,
+            'store_bytes': int(bank_store.nbytes),
+            'reduction': frame_bytes / bank_store.nbytes
+        },
+        'build_seconds': build_seconds,
+        'match_transactions': {
+            'dataframe_seconds': frame_seconds,
+            'store_seconds': store_seconds,
+            'candidates': len(actual),
+            'identical': len(actual) == len(expected)
+        },
+        'monthly_totals_max_float_error_agorot': float(np.abs(
+            float_totals.to_numpy() * 100 - exact_totals.to_numpy()
+        ).max())
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
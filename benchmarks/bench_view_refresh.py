@@ -0,0 +1,89 @@
+"""עלות ריצה מצטברת מול עלות רענון ה-views הממומשים (match_details_mv, unmatched_bank_mv), מול Postgres.
+
+לכל גודל נבנית סכמה זמנית עם rows שורות בכל טבלה ורצה התאמה מלאה. אחר כך, בכל סבב, נוספות
+new_rows שורות לכל טבלה ונמדדים: match_new_transactions, ואז refresh_reconciliation_views בנפרד.
+זמן הריצה המצטברת תלוי בשורות החדשות; זמן הרענון - בכל ההתאמות השמורות.
+
+python benchmarks/bench_view_refresh.py --database-url postgresql://... --rows 100000 1000000 --new-rows 100
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import uuid
+from pathlib import Path
+
+import psycopg2
+
+ROOT = Path(__file__).resolve().parent.parent
+TABLES = ('bank_transactions', 'checks', 'bank_transfers', 'invoices', 'receipts')
+
+
+def _insert(cursor, start, count):
+    """count שורות לכל טבלה, עם מזהים start+1 ומעלה; כל עסקת בנק עשירית בלי מסמך תואם"""
+    for table in TABLES:
+        values = "DATE '2020-01-01' + (g % 1500), ((g::BIGINT * 7919) % 100000) / 100.0"
+        if table == 'bank_transactions':
+            values += " + CASE WHEN g % 10 = 0 THEN 5000 ELSE 0 END"
+        cursor.execute(f'INSERT INTO {table} (date, amount) SELECT {values} '
+                       f'FROM generate_series({start + 1}, {start + count}) g')
+
+
+def _timed(cursor, sql):
+    started = time.perf_counter()
+    cursor.execute(sql)
+    cursor.fetchall()
+    return time.perf_counter() - started
+
+
+def run_size(dsn, rows, new_rows, rounds):
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+    schema = f'bench_{uuid.uuid4().hex[:8]}'
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA {schema}')
+            cursor.execute(f'SET search_path TO {schema}')
+            cursor.execute((ROOT / 'init_db.sql').read_text(encoding='utf-8'))
+            cursor.execute((ROOT / 'matching_functions.sql').read_text(encoding='utf-8'))
+            _insert(cursor, 0, rows)
+            cursor.execute('ANALYZE')
+            full = _timed(cursor, 'SELECT save_best_matches()')
+
+            incremental, refresh = [], []
+            for round_number in range(rounds):
+                _insert(cursor, rows + round_number * new_rows, new_rows)
+                incremental.append(_timed(cursor, 'SELECT * FROM match_new_transactions()'))
+                refresh.append(_timed(cursor, 'SELECT refresh_reconciliation_views()'))
+            cursor.execute('SELECT COUNT(*) FROM transaction_matches')
+            matches = cursor.fetchone()[0]
+            cursor.execute(f'DROP SCHEMA {schema} CASCADE')
+    finally:
+        connection.close()
+
+    return {
+        'rows': rows,
+        'matches': matches,
+        'full_run_seconds': full,
+        'incremental_run_seconds': statistics.median(incremental),
+        'refresh_seconds': statistics.median(refresh)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000])
+    parser.add_argument('--new-rows', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--database-url', default=os.getenv('BENCH_DATABASE_URL'))
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error('נדרש --database-url או BENCH_DATABASE_URL')
+
+    results = [run_size(args.database_url, rows, args.new_rows, args.rounds) for rows in args.rows]
+    print(json.dumps({'new_rows': args.new_rows, 'results': results}, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
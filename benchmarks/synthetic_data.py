@@ -0,0 +1,136 @@
+"""מחולל נתונים סינתטיים ודטרמיניסטיים (לפי seed) לכל שלבי ההתאמה.
+
+הטבלאות נוצרות בפורמט של הקבצים שמשתמשים מעלים - כותרות בעברית, סכומים כמחרוזות עם ₪ ופסיקים,
+ורווחים מיותרים בטקסט - כך ש-DataCleaner עושה את אותה עבודה כמו על דף חשבון אמיתי.
+חלק מעסקאות הבנק מקבלות מסמך תואם (אותו סכום, רובם באותו יום ועד יומיים הפרש) באחת מטבלאות המקור.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tests'))
+
+from pdf_fixtures import make_pdf  # noqa: E402
+
+SOURCE_TABLES = ['checks', 'bank_transfers', 'invoices', 'receipts']
+
+_START = pd.Timestamp('2023-01-01')
+_DESCRIPTIONS = np.array(['העברה בנקאית', 'משכורת', 'הוראת קבע', 'כרטיס אשראי', 'הפקדת שיקים', 'עמלה'], dtype=object)
+_PAYERS = np.array([f'לקוח {i}' for i in range(2000)], dtype=object)
+_STATUSES = np.array(['שולם', 'פתוח', 'בוטל'], dtype=object)
+# הפרש הימים בין עסקה למסמך התואם לה - רובם באותו יום
+_DAY_SHIFTS = np.array([-2, -1, 0, 1, 2])
+_DAY_SHIFT_WEIGHTS = np.array([0.05, 0.1, 0.7, 0.1, 0.05])
+
+
+def _money(values):
+    """סכומים כמו בדף חשבון: ₪ ופסיקי אלפים"""
+    return pd.Series(values).map('₪{:,.2f}'.format).to_numpy(dtype=object)
+
+
+def _dates(days):
+    return (_START + pd.to_timedelta(days, unit='D')).strftime('%Y-%m-%d').to_numpy(dtype=object)
+
+
+class SyntheticLedger:
+    """rows עסקאות בנק, ובכל טבלת מקור rows/4 מסמכים; match_rate מעסקאות הבנק מקבלות מסמך תואם"""
+
+    def __init__(self, rows, seed=0, match_rate=0.6, days=365):
+        self.rows = rows
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.days = days
+        self.bank_days = self.rng.integers(0, days, rows)
+        self.bank_amounts = np.round(self.rng.lognormal(6, 1.2, rows), 2) * np.where(self.rng.random(rows) < 0.7, -1, 1)
+
+        # כל עסקה תואמת משויכת לטבלת מקור אחת
+        matched = np.flatnonzero(self.rng.random(rows) < match_rate)
+        owner = self.rng.integers(0, len(SOURCE_TABLES), len(matched))
+        self.planted = {table: matched[owner == i] for i, table in enumerate(SOURCE_TABLES)}
+
+    def _documents(self, table):
+        """סכומים ותאריכים של טבלת מקור - המסמכים התואמים ואחריהם מסמכים בלי עסקה"""
+        planted = self.planted[table]
+        count = max(self.rows // 4, len(planted))
+        noise = count - len(planted)
+        shifts = self.rng.choice(_DAY_SHIFTS, len(planted), p=_DAY_SHIFT_WEIGHTS)
+        days = np.r_[
+            np.clip(self.bank_days[planted] + shifts, 0, self.days - 1),
+            self.rng.integers(0, self.days, noise)
+        ]
+        amounts = np.r_[np.abs(self.bank_amounts[planted]), np.round(self.rng.lognormal(6, 1.2, noise), 2)]
+        order = self.rng.permutation(count)
+        return days[order], amounts[order], count
+
+    def bank(self):
+        return pd.DataFrame({
+            'תאריך': _dates(self.bank_days),
+            'סכום': _money(self.bank_amounts),
+            'תיאור': self.rng.choice(_DESCRIPTIONS, self.rows) + '  '
+        })
+
+    def checks(self):
+        days, amounts, count = self._documents('checks')
+        return pd.DataFrame({
+            'תאריך': _dates(days),
+            'סכום': _money(amounts),
+            'מספר_שיק': self.rng.integers(100000, 999999, count).astype(str),
+            'שם_משלם': self.rng.choice(_PAYERS, count)
+        })
+
+    def transfers(self):
+        days, amounts, count = self._documents('bank_transfers')
+        return pd.DataFrame({
+            'תאריך': _dates(days),
+            'סכום': _money(amounts),
+            'תיאור': self.rng.choice(_DESCRIPTIONS, count),
+            'מספר_אסמכתא': self.rng.integers(10 ** 7, 10 ** 8, count).astype(str)
+        })
+
+    def _billing(self, table):
+        days, amounts, count = self._documents(table)
+        return pd.DataFrame({
+            'תאריך': _dates(days),
+            'סכום': _money(amounts),
+            'מספר_חשבונית': np.arange(1, count + 1).astype(str),
+            'סטטוס': self.rng.choice(_STATUSES, count)
+        })
+
+    def invoices(self):
+        return self._billing('invoices')
+
+    def receipts(self):
+        return self._billing('receipts')
+
+    def tables(self):
+        """כל הטבלאות הגולמיות לפי שם הטבלה בבסיס הנתונים"""
+        return {
+            'bank_transactions': self.bank(),
+            'checks': self.checks(),
+            'bank_transfers': self.transfers(),
+            'invoices': self.invoices(),
+            'receipts': self.receipts()
+        }
+
+    def pdfs(self, count):
+        """(שם, תוכן, סוג מסמך) לחשבוניות וקבלות - בערך חצי מהם עם עמוד שני של הערות"""
+        rng = np.random.default_rng(self.seed + 1)
+        documents = []
+        for i in range(count):
+            doc_type = 'invoice' if i % 2 == 0 else 'receipt'
+            total = round(float(rng.lognormal(6, 1.2)), 2)
+            date = (_START + pd.Timedelta(days=int(rng.integers(0, self.days)))).strftime('%d/%m/%Y')
+            title = 'חשבונית מס' if doc_type == 'invoice' else 'קבלה מס'
+            pages = [[
+                f'ספק {rng.integers(1, 500)} בע"מ',
+                f'{title}: {10000 + i}',
+                f'תאריך: {date}',
+                f'סה"כ לפני מע"מ {total / 1.17:,.2f}',
+                f'סה"כ לתשלום {total:,.2f}'
+            ]]
+            if rng.random() < 0.5:
+                pages.append([f'הערה {line}: תנאי תשלום שוטף +30' for line in range(10)])
+            documents.append((f'{doc_type}_{i}.pdf', make_pdf(pages), doc_type))
+        return documents
@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class UploadReport:
+    """סיכום העלאה: כמה שורות ומנות נשלחו, כמה ניסיונות חוזרים ואילו מנות נכשלו"""
+
+    def __init__(self, table_name, total_rows):
+        self.table_name = table_name
+        self.total_rows = total_rows
+        self.rows_sent = 0
+        self.batches_sent = 0
+        self.retries = 0
+        self.failed_batches = []
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return not self.failed_batches
+
+    @property
+    def rows_per_second(self):
+        return self.rows_sent / self.elapsed if self.elapsed else 0.0
+
+
+class BulkUploader:
+    """העלאת DataFrame במנות מקבילות עם ניסיונות חוזרים לכל מנה בנפרד"""
+
+    def __init__(self, client, batch_size=500, max_workers=4, max_retries=3, backoff_seconds=0.5):
+        self.client = client
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def _batches(self, df):
+        """טווחי שורות לכל מנה - ההמרה לרשומות נעשית רק בזמן השליחה"""
+        for start in range(0, len(df), self.batch_size):
+            yield start, min(start + self.batch_size, len(df))
+
+    def _send(self, df, table_name, start, end, on_conflict):
+        """שליחת מנה אחת עם backoff אקספוננציאלי - מחזיר את מספר הניסיונות החוזרים"""
+        records = df.iloc[start:end].to_dict('records')
+        attempt = 0
+        while True:
+            try:
+                table = self.client.table(table_name)
+                if on_conflict:
+                    # ON CONFLICT DO NOTHING - שורות שכבר קיימות לפי המפתח הטבעי מדולגות
+                    table.upsert(records, on_conflict=on_conflict, ignore_duplicates=True).execute()
+                else:
+                    table.insert(records).execute()
+                return attempt
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+                attempt += 1
+
+    def upload(self, df, table_name, on_progress=None, on_conflict=None):
+        """העלאת כל המנות במקביל; on_progress(rows_done, total_rows) נקרא אחרי כל מנה"""
+        report = UploadReport(table_name, len(df))
+        rows_done = 0
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._send, df, table_name, start, end, on_conflict): (start, end)
+                for start, end in self._batches(df)
+            }
+            for future in as_completed(futures):
+                start, end = futures[future]
+                try:
+                    report.retries += future.result()
+                    report.rows_sent += end - start
+                    report.batches_sent += 1
+                except Exception as e:
+                    report.retries += self.max_retries
+                    report.failed_batches.append({'start': start, 'end': end, 'error': str(e)})
+
+                rows_done += end - start
+                if on_progress:
+                    on_progress(rows_done, report.total_rows)
+
+        report.failed_batches.sort(key=lambda batch: batch['start'])
+        report.elapsed = time.perf_counter() - started
+        return report
@@ -1,75 +1,76 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from supabase import create_client
-import os
 from dotenv import load_dotenv
+from data_access import DataAccess, show_cache_stats
+from instrumentation import serve_metrics, show_timing_panel, timed
+from match_engine import SOURCE_TABLES
 from datetime import datetime, timedelta
 
 # טעינת הגדרות סביבה
 load_dotenv()
 
+# מספר השורות בכל עמוד של טבלת העסקאות ללא התאמה
+UNMATCHED_PAGE_SIZE = 100
+# טווח ברירת המחדל בימים של מסנן התאריכים בפרטי ההתאמות
+MATCHES_DEFAULT_DAYS = 30
+
 class DashboardManager:
     def __init__(self):
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        
-        if not supabase_url or not supabase_key:
-            raise ValueError("נא להגדיר את פרטי ההתחברות ל-Supabase בקובץ .env")
-            
-        self.client = create_client(supabase_url, supabase_key)
+        self.data = DataAccess()
+        self.client = self.data.client
         
-    def get_all_matches(self):
-        """קבלת כל ההתאמות מהמערכת"""
+    @timed()
+    def get_all_matches(self, from_date=None, to_date=None, matched_table=None):
+        """קבלת ההתאמות מ-match_details_mv, בעמודים לפי (match_date, id), עם מסננים אופציונליים"""
         try:
-            results = self.client.rpc('get_match_details').execute()
-            return pd.DataFrame(results.data)
+            return self.data.reader().match_details(from_date, to_date, matched_table).to_frame()
         except Exception as e:
             st.error(f"שגיאה בטעינת נתוני התאמות: {str(e)}")
             return pd.DataFrame()
     
-    def get_unmatched_transactions(self):
-        """קבלת עסקאות ללא התאמה"""
+    @timed()
+    def get_unmatched_transactions(self, after_id=0, page_size=UNMATCHED_PAGE_SIZE):
+        """עמוד אחד של עסקאות ללא התאמה מ-unmatched_bank_mv, החל מהמזהה שאחרי after_id"""
         try:
-            query = """
-            SELECT bt.* 
-            FROM bank_transactions bt
-            LEFT JOIN transaction_matches tm ON bt.id = tm.bank_transaction_id
-            WHERE tm.id IS NULL
-            """
-            results = self.client.rpc('execute_sql', {'query': query}).execute()
-            return pd.DataFrame(results.data)
+            return pd.DataFrame(self.data.page('unmatched_bank_mv', after_id=int(after_id), page_size=page_size))
         except Exception as e:
             st.error(f"שגיאה בטעינת עסקאות ללא התאמה: {str(e)}")
             return pd.DataFrame()
     
+    @timed()
+    def get_unmatched_summary(self):
+        """מספר וסכום העסקאות ב-unmatched_bank_mv ומועד רענון ה-view - מאותו מקור כמו עמודי הטבלה"""
+        try:
+            results = self.data.rpc('get_unmatched_summary')
+            row = results[0] if results else {}
+            return {
+                'unmatched_transactions': row.get('unmatched_transactions') or 0,
+                'unmatched_amount': float(row.get('unmatched_amount') or 0),
+                'views_refreshed_at': row.get('views_refreshed_at'),
+                'views_stale': bool(row.get('views_stale'))
+            }
+        except Exception as e:
+            st.error(f"שגיאה בטעינת סיכום העסקאות ללא התאמה: {str(e)}")
+            return None
+
+    @timed()
     def get_match_statistics(self):
-        """חישוב סטטיסטיקות התאמה"""
+        """סטטיסטיקות התאמה מחושבות בשרת בשאילתה אחת"""
         try:
-            matches = self.get_all_matches()
-            unmatched = self.get_unmatched_transactions()
-            
-            total_transactions = len(matches) + len(unmatched)
-            if total_transactions == 0:
-                return {
-                    'match_rate': 0,
-                    'total_amount_matched': 0,
-                    'total_amount_unmatched': 0,
-                    'matches_by_type': {}
-                }
-            
-            match_rate = (len(matches) / total_transactions) * 100
-            total_amount_matched = matches['bank_amount'].sum() if not matches.empty else 0
-            total_amount_unmatched = unmatched['amount'].sum() if not unmatched.empty else 0
+            results = self.data.rpc('get_match_statistics')
+            row = results[0] if results else {}
             
-            matches_by_type = matches['matched_table'].value_counts().to_dict() if not matches.empty else {}
+            total_transactions = row.get('total_transactions') or 0
+            matched_transactions = row.get('matched_transactions') or 0
+            match_rate = (matched_transactions / total_transactions * 100) if total_transactions > 0 else 0
             
             return {
                 'match_rate': match_rate,
-                'total_amount_matched': total_amount_matched,
-                'total_amount_unmatched': total_amount_unmatched,
-                'matches_by_type': matches_by_type
+                'total_transactions': total_transactions,
+                'unmatched_transactions': total_transactions - matched_transactions,
+                'total_amount_matched': float(row.get('total_amount_matched') or 0),
+                'total_amount_unmatched': float(row.get('total_amount_unmatched') or 0),
+                'matches_by_type': row.get('matches_by_type') or {}
             }
         except Exception as e:
             st.error(f"שגיאה בחישוב סטטיסטיקות: {str(e)}")
@@ -77,6 +78,8 @@ class DashboardManager:
 
 def create_match_rate_chart(stats):
     """יצירת תרשים אחוז ההתאמות"""
+    import plotly.graph_objects as go
+
     fig = go.Figure(go.Indicator(
         mode = "gauge+number",
         value = stats['match_rate'],
@@ -99,12 +102,16 @@ def create_matches_by_type_chart(stats):
     if not stats['matches_by_type']:
         return None
         
+    import plotly.express as px
+
     df = pd.DataFrame(list(stats['matches_by_type'].items()), columns=['סוג', 'כמות'])
     fig = px.pie(df, values='כמות', names='סוג', title='התפלגות התאמות לפי סוג')
     return fig
 
 def create_amounts_chart(stats):
     """יצירת תרשים השוואת סכומים"""
+    import plotly.graph_objects as go
+
     fig = go.Figure(data=[
         go.Bar(name='סכום מותאם', x=['סכומים'], y=[stats['total_amount_matched']]),
         go.Bar(name='סכום לא מותאם', x=['סכומים'], y=[stats['total_amount_unmatched']])
@@ -112,8 +119,55 @@ def create_amounts_chart(stats):
     fig.update_layout(title='השוואת סכומים מותאמים ולא מותאמים')
     return fig
 
+def show_unmatched_page(dashboard):
+    """טבלת עסקאות ללא התאמה עם מעבר בין עמודים; מזהי תחילת העמודים נשמרים ב-session_state"""
+    cursors = st.session_state.setdefault('unmatched_cursors', [0])
+    page = dashboard.get_unmatched_transactions(after_id=cursors[-1])
+    if page.empty:
+        st.info("אין עסקאות נוספות")
+    else:
+        st.dataframe(page)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("עמוד קודם", disabled=len(cursors) == 1, on_click=cursors.pop)
+    with col2:
+        st.button("עמוד הבא", disabled=len(page) < UNMATCHED_PAGE_SIZE,
+                  on_click=lambda: cursors.append(int(page['id'].iloc[-1])))
+    st.caption(f"עמוד {len(cursors)}")
+
+def show_unmatched_section(dashboard, unmatched):
+    """מועד רענון ה-views, ואחריו הטבלה לפי בקשה"""
+    st.caption(f"נכון לרענון האחרון: {unmatched['views_refreshed_at']}")
+    if unmatched['views_stale']:
+        # הרענון מחשב את כל ההתאמות מחדש, ולכן רק בלחיצה ולא בכל טעינה של הדף
+        st.warning("יש התאמות חדשות שעדיין לא מופיעות בטבלאות")
+        st.button("רענון הטבלאות", on_click=dashboard.data.refresh_views, kwargs={'min_interval': 0})
+    if unmatched['unmatched_transactions'] == 0:
+        st.info("אין עסקאות ללא התאמה")
+    elif st.toggle(f"הצג {unmatched['unmatched_transactions']:,} עסקאות ללא התאמה"):
+        show_unmatched_page(dashboard)
+
+def show_matches_page(dashboard):
+    """פרטי ההתאמות לפי טווח תאריכי עסקת הבנק וטבלת מקור"""
+    today = datetime.now().date()
+    col1, col2 = st.columns(2)
+    with col1:
+        date_range = st.date_input("טווח תאריכים", value=(today - timedelta(days=MATCHES_DEFAULT_DAYS), today))
+    with col2:
+        matched_table = st.selectbox("טבלת מקור", [None] + list(SOURCE_TABLES), format_func=lambda table: table or "הכל")
+    
+    # בזמן בחירת הטווח date_input מחזיר תאריך אחד בלבד
+    from_date, to_date = (list(date_range) + [None, None])[:2]
+    matches = dashboard.get_all_matches(from_date, to_date, matched_table)
+    if matches.empty:
+        st.info("לא נמצאו התאמות")
+    else:
+        st.dataframe(matches)
+
 def main():
     st.title("דשבורד התאמות פיננסיות")
+    serve_metrics()
     
     try:
         dashboard = DashboardManager()
@@ -144,13 +198,19 @@ def main():
         with col2:
             st.plotly_chart(create_amounts_chart(stats))
         
-        # הצגת עסקאות לא מותאמות
+        # הצגת עסקאות לא מותאמות - נטענות רק כשהמשתמש פותח את הטבלה, עמוד אחר עמוד.
+        # המספר מ-unmatched_bank_mv כמו השורות עצמן (בלי עסקאות בקבוצות התאמה), ולא מהמדדים החיים שלמעלה
         st.header("עסקאות ללא התאמה")
-        unmatched = dashboard.get_unmatched_transactions()
-        if not unmatched.empty:
-            st.dataframe(unmatched)
-        else:
-            st.info("אין עסקאות ללא התאמה")
+        unmatched = dashboard.get_unmatched_summary()
+        if unmatched:
+            show_unmatched_section(dashboard, unmatched)
+        
+        st.header("פרטי התאמות")
+        if st.toggle("הצג פרטי התאמות"):
+            show_matches_page(dashboard)
+        
+        show_cache_stats()
+        show_timing_panel()
             
     except Exception as e:
         st.error(f"שגיאה בטעינת הדשבורד: {str(e)}")
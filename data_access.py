@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+from keyset_reader import KeysetReader
+from instrumentation import span
+
+# טעינת הגדרות סביבה
+load_dotenv()
+
+# זמן תוקף ומספר רשומות מקסימלי במטמון תוצאות השאילתות
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "128"))
+# מרווח מינימלי בשניות בין רענוני ה-views הממומשים אחרי ריצות מצטברות (refresh_stale_views)
+VIEW_REFRESH_INTERVAL = int(os.getenv("VIEW_REFRESH_INTERVAL", "60"))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """לקוח Supabase אחד לתהליך, משותף לכל הסשנים של Streamlit, לעבודות של השירות ול-CLI"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            supabase_url = os.getenv("SUPABASE_URL")
+            supabase_key = os.getenv("SUPABASE_KEY")
+
+            if not supabase_url or not supabase_key:
+                raise ValueError("נא להגדיר את פרטי ההתחברות ל-Supabase בקובץ .env")
+
+            # supabase נטען רק כשנוצר הלקוח - בדיקות ולקוחות מוזרקים לא משלמים על הטעינה
+            from supabase import create_client
+            _client = create_client(supabase_url, supabase_key)
+        return _client
+
+
+class QueryCache:
+    """מטמון תוצאות עם זמן תוקף ופינוי LRU לפי מספר רשומות.
+
+    invalidate מנקה רק את המטמון של התהליך הנוכחי: תהליך אחר (דשבורד נוסף, עובד של השירות)
+    ממשיך להגיש את התוצאות שלו עד שיפוג תוקפן, כלומר עד QUERY_CACHE_TTL שניות (ברירת מחדל 300)"""
+
+    def __init__(self, ttl_seconds=QUERY_CACHE_TTL, max_entries=QUERY_CACHE_SIZE, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # עולה בכל invalidate - טעינה שהתחילה לפני הניקוי לא נשמרת
+        self.generation = 0
+
+    @staticmethod
+    def make_key(name, params=None):
+        return name, json.dumps(params, sort_keys=True, default=str)
+
+    def get_or_load(self, key, loader):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.clock() - entry[0] < self.ttl_seconds:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self.generation
+
+        # הטעינה מחוץ למנעול - שאילתה איטית לא חוסמת קריאות למפתחות אחרים
+        value = loader()
+        with self.lock:
+            # כתיבה שקרתה בזמן הטעינה - ייתכן שהתוצאה כבר לא עדכנית, והיא מוחזרת בלי להישמר
+            if generation != self.generation:
+                return value
+            self.entries[key] = (self.clock(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.invalidations += 1
+            self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+# מטמון אחד לתהליך - המודול נטען פעם אחת ואינו מורץ מחדש בכל rerun
+query_cache = QueryCache()
+
+
+class DataAccess:
+    """גישה משותפת לנתונים: קריאות RPC ו-select עוברות במטמון, כתיבות מנקות אותו"""
+
+    def __init__(self, client=None, cache=None):
+        self.client = client if client is not None else get_client()
+        self.cache = cache if cache is not None else query_cache
+
+    def rpc(self, name, params=None):
+        """תוצאת RPC לקריאה בלבד (רשימת שורות), מהמטמון אם עדיין בתוקף"""
+        key = QueryCache.make_key(name, params)
+        return self.cache.get_or_load(key, lambda: self._execute_rpc(name, params))
+
+    def select(self, table_name, columns='*'):
+        key = QueryCache.make_key(f"select:{table_name}", columns)
+        return self.cache.get_or_load(key, lambda: self._execute_select(table_name, columns))
+
+    def page(self, table_name, after_id=0, page_size=100, columns='*'):
+        """עמוד אחד לפי id מטבלה או מ-view ממומש (למשל unmatched_bank_mv) - חיפוש באינדקס, מהמטמון אם בתוקף"""
+        key = QueryCache.make_key(f"page:{table_name}", [columns, after_id, page_size])
+        return self.cache.get_or_load(key, lambda: self._execute_page(table_name, columns, after_id, page_size))
+
+    def call(self, name, params=None):
+        """RPC שכותב לבסיס הנתונים - תמיד נשלח, בלי מטמון"""
+        return self._execute_rpc(name, params)
+
+    def reader(self, page_size=1000):
+        """קריאה זורמת בעמודים לפי מפתח - עוקפת את המטמון, לנתונים גדולים ולייצוא"""
+        return KeysetReader(self.client, page_size=page_size)
+
+    def refresh_views(self, min_interval=VIEW_REFRESH_INTERVAL):
+        """רענון match_details_mv ו-unmatched_bank_mv אם ריצה מצטברת שינתה התאמות, לכל היותר פעם
+        ב-min_interval שניות. עד הרענון הקריאות מה-views מפגרות אחרי הריצות המצטברות"""
+        refreshed = self.call('refresh_stale_views', {'min_interval_seconds': int(min_interval)})
+        if refreshed:
+            self.invalidate()
+        return bool(refreshed)
+
+    def invalidate(self):
+        self.cache.invalidate()
+
+    def _execute_rpc(self, name, params):
+        with span('rpc', name=name) as stage:
+            query = self.client.rpc(name, params) if params is not None else self.client.rpc(name)
+            data = query.execute().data
+            stage.count('rows_fetched', len(data) if isinstance(data, list) else 1)
+            return data
+
+    def _execute_select(self, table_name, columns):
+        with span('select', table=table_name) as stage:
+            data = self.client.table(table_name).select(columns).execute().data
+            stage.count('rows_fetched', len(data))
+            return data
+
+    def _execute_page(self, table_name, columns, after_id, page_size):
+        with span('select', table=table_name) as stage:
+            query = self.client.table(table_name).select(columns).gt('id', after_id)
+            data = query.order('id').limit(page_size).execute().data
+            stage.count('rows_fetched', len(data))
+            return data
+
+
+def show_cache_stats():
+    """מוני פגיעות/החטאות של המטמון בסרגל הצד"""
+    import streamlit as st
+
+    stats = query_cache.stats()
+    st.sidebar.caption(
+        f"מטמון שאילתות: {stats['hits']} פגיעות, {stats['misses']} החטאות "
+        f"({stats['hit_rate']:.0%}), {stats['entries']} רשומות, {stats['invalidations']} ניקויים"
+    )
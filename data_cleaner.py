@@ -2,6 +2,12 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import re
+import unicodedata
+
+from instrumentation import count
+
+# ספרות ערביות-הודיות ופרסיות, שמגיעות בדפי חשבון ובחשבוניות בערבית
+NON_ASCII_DIGITS = r'[٠-٩۰-۹]'
 
 class DataCleaner:
     @staticmethod
@@ -49,77 +55,180 @@ class DataCleaner:
         text = re.sub(r'\s+', ' ', text)
         return text if text else None
     
+    @staticmethod
+    def _string_mask(series):
+        """מסכה של התאים שהם מחרוזות (מסלול מהיר לעמודות מחרוזת אחידות)"""
+        if pd.api.types.infer_dtype(series, skipna=True) == 'string':
+            return series.notna()
+        return series.map(lambda value: isinstance(value, str)).astype(bool)
+
+    @staticmethod
+    def _ascii_digits(text):
+        """ספרות יוניקוד (למשל ערביות-הודיות) כספרות ASCII - \\d ו-float() במסלול הרגיל מקבלים אותן,
+        pd.to_numeric ו-pd.to_datetime על מערך לא"""
+        if text.isascii():
+            return text
+        return re.sub(r'\d', lambda digit: str(unicodedata.decimal(digit.group())), text)
+
+    @staticmethod
+    def _round_amounts(values):
+        """עיגול וקטורי לשתי ספרות - זהה ל-round() של פייתון"""
+        values = np.asarray(values, dtype='float64')
+        rounded = np.round(values, 2)
+
+        # np.round מכפיל ב-100 ולכן עלול לסטות מ-round() בערכי חצי ובסכומים גדולים מאוד
+        with np.errstate(invalid='ignore'):
+            scaled = values * 100
+            exact = (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-3) | (np.abs(values) >= 1e9)
+        exact &= np.isfinite(values)
+        if exact.any():
+            rounded[exact] = [round(float(value), 2) for value in values[exact]]
+        return rounded
+
+    @classmethod
+    def clean_amount_column(cls, series):
+        """ניקוי וקטורי של עמודת סכום - תוצאה זהה ל-clean_amount לכל תא"""
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.astype('float64')
+        else:
+            values = pd.Series(np.nan, index=series.index, dtype='float64')
+            is_str = cls._string_mask(series)
+            if is_str.any():
+                strings = series[is_str].astype(str)
+                # לפני הסינון: במחרוזות של pyarrow \d תופס רק ספרות ASCII
+                non_ascii = strings.str.contains(NON_ASCII_DIGITS, regex=True)
+                if non_ascii.any():
+                    strings[non_ascii] = strings[non_ascii].map(cls._ascii_digits)
+                digits = strings.str.replace(r'[^\d.-]', '', regex=True)
+                values[is_str] = pd.to_numeric(digits, errors='coerce').astype('float64')
+            other = ~is_str & series.notna()
+            if other.any():
+                values[other] = pd.to_numeric(series[other], errors='coerce').astype('float64')
+
+        return pd.Series(cls._round_amounts(values), index=series.index)
+
     @classmethod
-    def clean_bank_transactions(cls, df):
+    def clean_date_column(cls, series):
+        """ניקוי וקטורי של עמודת תאריך - פענוח אחד לכל הערכים הייחודיים בעמודה"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series.dt.strftime('%Y-%m-%d')
+
+        result = pd.Series(None, index=series.index, dtype=object)
+        is_str = cls._string_mask(series)
+        if is_str.any():
+            strings = series[is_str].astype(str)
+            unique = pd.unique(strings)
+            try:
+                parsed = pd.to_datetime(pd.Index(unique).map(cls._ascii_digits), format='mixed', errors='coerce')
+                formatted = [None if pd.isna(value) else value.strftime('%Y-%m-%d') for value in parsed]
+            except (ValueError, TypeError):
+                # אזורי זמן מעורבים - פענוח כל ערך ייחודי בנפרד
+                formatted = [cls.clean_date(value) for value in unique]
+            result[is_str] = strings.map(dict(zip(unique, formatted)))
+
+        other = ~is_str & series.notna()
+        if other.any():
+            result[other] = series[other].map(cls.clean_date)
+
+        return result.infer_objects()
+
+    @staticmethod
+    def clean_text_column(series):
+        """ניקוי וקטורי של עמודת טקסט - תוצאה זהה ל-clean_text לכל תא"""
+        result = pd.Series(None, index=series.index, dtype=object)
+        present = series.notna()
+        if present.any():
+            text = series[present].astype(str).str.strip().str.replace(r'\s+', ' ', regex=True)
+            result[present] = text.where(text != '', None)
+
+        return result.infer_objects()
+
+    @classmethod
+    def _column_cleaners(cls, vectorized):
+        """בחירת פונקציות ניקוי לעמודה - לכל תא בנפרד או וקטורית"""
+        if vectorized:
+            return cls.clean_amount_column, cls.clean_date_column, cls.clean_text_column
+        return (
+            lambda column: column.apply(cls.clean_amount),
+            lambda column: column.apply(cls.clean_date),
+            lambda column: column.apply(cls.clean_text)
+        )
+
+    @classmethod
+    def clean_bank_transactions(cls, df, vectorized=False):
         """ניקוי נתוני עו"ש"""
         cleaned = df.copy()
+        amount_cleaner, date_cleaner, text_cleaner = cls._column_cleaners(vectorized)
         
         # ניקוי שדות
         if 'סכום' in cleaned.columns:
-            cleaned['amount'] = cleaned['סכום'].apply(cls.clean_amount)
+            cleaned['amount'] = amount_cleaner(cleaned['סכום'])
             del cleaned['סכום']
         elif 'amount' in cleaned.columns:
-            cleaned['amount'] = cleaned['amount'].apply(cls.clean_amount)
+            cleaned['amount'] = amount_cleaner(cleaned['amount'])
             
         if 'תאריך' in cleaned.columns:
-            cleaned['date'] = cleaned['תאריך'].apply(cls.clean_date)
+            cleaned['date'] = date_cleaner(cleaned['תאריך'])
             del cleaned['תאריך']
         elif 'date' in cleaned.columns:
-            cleaned['date'] = cleaned['date'].apply(cls.clean_date)
+            cleaned['date'] = date_cleaner(cleaned['date'])
             
         if 'תיאור' in cleaned.columns:
-            cleaned['description'] = cleaned['תיאור'].apply(cls.clean_text)
+            cleaned['description'] = text_cleaner(cleaned['תיאור'])
             del cleaned['תיאור']
         elif 'description' in cleaned.columns:
-            cleaned['description'] = cleaned['description'].apply(cls.clean_text)
+            cleaned['description'] = text_cleaner(cleaned['description'])
             
         # הסרת שורות לא תקינות
+        rows_before = len(cleaned)
         cleaned = cleaned.dropna(subset=['amount', 'date'])
+        count('rows_dropped', rows_before - len(cleaned))
         
         return cleaned
     
     @classmethod
-    def clean_invoices(cls, df):
+    def clean_invoices(cls, df, vectorized=False):
         """ניקוי נתוני חשבוניות"""
         cleaned = df.copy()
+        amount_cleaner, date_cleaner, text_cleaner = cls._column_cleaners(vectorized)
         
         # ניקוי שדות
         if 'סכום' in cleaned.columns:
-            cleaned['amount'] = cleaned['סכום'].apply(cls.clean_amount)
+            cleaned['amount'] = amount_cleaner(cleaned['סכום'])
             del cleaned['סכום']
         elif 'amount' in cleaned.columns:
-            cleaned['amount'] = cleaned['amount'].apply(cls.clean_amount)
+            cleaned['amount'] = amount_cleaner(cleaned['amount'])
             
         if 'תאריך' in cleaned.columns:
-            cleaned['date'] = cleaned['תאריך'].apply(cls.clean_date)
+            cleaned['date'] = date_cleaner(cleaned['תאריך'])
             del cleaned['תאריך']
         elif 'date' in cleaned.columns:
-            cleaned['date'] = cleaned['date'].apply(cls.clean_date)
+            cleaned['date'] = date_cleaner(cleaned['date'])
             
         if 'מספר_חשבונית' in cleaned.columns:
-            cleaned['invoice_number'] = cleaned['מספר_חשבונית'].apply(cls.clean_text)
+            cleaned['invoice_number'] = text_cleaner(cleaned['מספר_חשבונית'])
             del cleaned['מספר_חשבונית']
         elif 'invoice_number' in cleaned.columns:
-            cleaned['invoice_number'] = cleaned['invoice_number'].apply(cls.clean_text)
+            cleaned['invoice_number'] = text_cleaner(cleaned['invoice_number'])
             
         if 'סטטוס' in cleaned.columns:
-            cleaned['status'] = cleaned['סטטוס'].apply(cls.clean_text)
+            cleaned['status'] = text_cleaner(cleaned['סטטוס'])
             del cleaned['סטטוס']
         elif 'status' in cleaned.columns:
-            cleaned['status'] = cleaned['status'].apply(cls.clean_text)
+            cleaned['status'] = text_cleaner(cleaned['status'])
             
         # הסרת שורות לא תקינות
+        rows_before = len(cleaned)
         cleaned = cleaned.dropna(subset=['amount', 'date'])
+        count('rows_dropped', rows_before - len(cleaned))
         
         return cleaned
     
     @classmethod
-    def clean_receipts(cls, df):
+    def clean_receipts(cls, df, vectorized=False):
         """ניקוי נתוני קבלות"""
-        cleaned = df.copy()
-        
-        # ניקוי שדות בדומה לחשבוניות
-        cleaned = cls.clean_invoices(cleaned)
+        # ניקוי שדות בדומה לחשבוניות (clean_invoices עובד על עותק)
+        cleaned = cls.clean_invoices(df, vectorized)
         
         # שינוי שמות עמודות
         if 'invoice_number' in cleaned.columns:
@@ -129,41 +238,39 @@ class DataCleaner:
         return cleaned
     
     @classmethod
-    def clean_checks(cls, df):
+    def clean_checks(cls, df, vectorized=False):
         """ניקוי נתוני שיקים"""
-        cleaned = df.copy()
-        
-        # ניקוי שדות בסיסיים
-        cleaned = cls.clean_bank_transactions(cleaned)
+        # ניקוי שדות בסיסיים (clean_bank_transactions עובד על עותק)
+        cleaned = cls.clean_bank_transactions(df, vectorized)
         
         # ניקוי שדות ייחודיים לשיקים
+        text_cleaner = cls._column_cleaners(vectorized)[2]
         if 'מספר_שיק' in cleaned.columns:
-            cleaned['check_number'] = cleaned['מספר_שיק'].apply(cls.clean_text)
+            cleaned['check_number'] = text_cleaner(cleaned['מספר_שיק'])
             del cleaned['מספר_שיק']
         elif 'check_number' in cleaned.columns:
-            cleaned['check_number'] = cleaned['check_number'].apply(cls.clean_text)
+            cleaned['check_number'] = text_cleaner(cleaned['check_number'])
             
         if 'שם_משלם' in cleaned.columns:
-            cleaned['payer_name'] = cleaned['שם_משלם'].apply(cls.clean_text)
+            cleaned['payer_name'] = text_cleaner(cleaned['שם_משלם'])
             del cleaned['שם_משלם']
         elif 'payer_name' in cleaned.columns:
-            cleaned['payer_name'] = cleaned['payer_name'].apply(cls.clean_text)
+            cleaned['payer_name'] = text_cleaner(cleaned['payer_name'])
             
         return cleaned
     
     @classmethod
-    def clean_transfers(cls, df):
+    def clean_transfers(cls, df, vectorized=False):
         """ניקוי נתוני העברות בנקאיות"""
-        cleaned = df.copy()
-        
-        # ניקוי שדות בסיסיים
-        cleaned = cls.clean_bank_transactions(cleaned)
+        # ניקוי שדות בסיסיים (clean_bank_transactions עובד על עותק)
+        cleaned = cls.clean_bank_transactions(df, vectorized)
         
         # ניקוי שדות ייחודיים להעברות
+        text_cleaner = cls._column_cleaners(vectorized)[2]
         if 'מספר_אסמכתא' in cleaned.columns:
-            cleaned['reference_number'] = cleaned['מספר_אסמכתא'].apply(cls.clean_text)
+            cleaned['reference_number'] = text_cleaner(cleaned['מספר_אסמכתא'])
             del cleaned['מספר_אסמכתא']
         elif 'reference_number' in cleaned.columns:
-            cleaned['reference_number'] = cleaned['reference_number'].apply(cls.clean_text)
+            cleaned['reference_number'] = text_cleaner(cleaned['reference_number'])
             
         return cleaned 
\ No newline at end of file
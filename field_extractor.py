@@ -0,0 +1,210 @@
+import json
+import os
+import re
+
+# תבניות מקומפלות ברמת המודול - נבנות פעם אחת לכל תהליך
+DATE_RE = re.compile(r'(?<!\d)\d{1,2}[./]\d{1,2}[./]\d{2,4}(?!\d)')
+REFERENCE_RES = {
+    'invoice': re.compile(r'חשבונית\s*(?:מס|מספר)[׳\'"]?\s*[:#]?\s*(\d+)'),
+    'receipt': re.compile(r'קבלה\s*(?:מס|מספר)[׳\'"]?\s*[:#]?\s*(\d+)')
+}
+# מספר כספי: אלפים מופרדים בפסיק או רצף ספרות, עם עד שתי ספרות אחרי הנקודה.
+# לא חלק מתאריך (צמוד ל-/ או לנקודה) ולא חלק ממספר ארוך יותר
+AMOUNT_RE = re.compile(r'(?<![\d/.,\-])(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d{1,2}))?(?![\d/\-]|\.\d)')
+CURRENCY_RE = re.compile(r'₪|ש["״]ח|ILS|NIS', re.IGNORECASE)
+
+# מילות מפתח של סכום כולל, לפי עוצמה - "לתשלום" חזקה מ"סה"כ" שעשוי להיות לפני מע"מ
+TOTAL_KEYWORDS = (
+    (3, re.compile(r'לתשלום|סה["״]?כ\s*כולל|total\s+due|amount\s+due', re.IGNORECASE)),
+    (2, re.compile(r'סה["״]כ|סך\s*הכל|total', re.IGNORECASE)),
+    (1, re.compile(r'סכום|amount', re.IGNORECASE))
+)
+# הקשר שמעיד שהמספר אינו סכום: טלפון, פקס, מספר עוסק/ח.פ, מספר מסמך או חשבון
+NON_AMOUNT_CONTEXT_RE = re.compile(
+    r'טל|פקס|נייד|phone|fax|ע\.?מ|עוסק|ח\.?פ|ת\.?ז|מספר|מס[׳\']|חשבונית|קבלה|חשבון|סניף|vat\s*(?:no|number)',
+    re.IGNORECASE
+)
+VAT_RATE_RE = re.compile(r'%')
+
+# ניקוד מקסימלי - מילת "לתשלום" + סימן מטבע + אגורות; מועמד כזה עוצר את הסריקה
+MAX_AMOUNT_SCORE = 3 * 10 + 3 + 1
+# סכום בלי מילת מפתח נשמר כגיבוי, אבל לא עוצר את המעבר לעמודים הבאים
+CONFIDENT_AMOUNT_SCORE = 10
+# מסמך שאין בו מילת מפתח לסכום: הסריקה נעצרת אחרי מספר כזה של עמודים נוספים שלא שיפרו את המועמד,
+# במקום לקרוא (ולהעביר OCR) את כל העמודים עד MAX_PAGES
+AMOUNT_SETTLE_PAGES = 1
+
+
+class SupplierTemplate:
+    """תבנית ספק: זיהוי לפי ביטוי בטקסט ותבניות ייעודיות לשדות (קבוצה ראשונה או כל ההתאמה)"""
+
+    def __init__(self, name, match, date=None, amount=None, reference=None):
+        self.name = name
+        self.match = re.compile(match)
+        self.patterns = {
+            field: re.compile(pattern)
+            for field, pattern in (('date', date), ('amount', amount), ('reference', reference))
+            if pattern
+        }
+
+    def search(self, field, text):
+        pattern = self.patterns.get(field)
+        if pattern is None:
+            return None
+        match = pattern.search(text)
+        if match is None:
+            return None
+        return match.group(1) if pattern.groups else match.group(0)
+
+
+def load_templates(path=None):
+    """טעינת תבניות ספקים מקובץ JSON (ברירת מחדל: משתנה הסביבה SUPPLIER_TEMPLATES)"""
+    path = path or os.getenv('SUPPLIER_TEMPLATES')
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [SupplierTemplate(**entry) for entry in json.load(f)]
+
+
+def parse_amount(token):
+    """המרת מחרוזת סכום ('1,250.00', '₪ 90') למספר"""
+    try:
+        return float(re.sub(r'[^\d.]', '', token))
+    except ValueError:
+        return None
+
+
+class DocumentFields:
+    """מצב החילוץ של מסמך אחד - מוזן עמוד אחר עמוד ומדווח כשכל השדות נמצאו"""
+
+    def __init__(self, extractor, doc_type):
+        self.extractor = extractor
+        self.doc_type = doc_type
+        self.template = None
+        self.amount_score = None
+        # עמודים שנקראו מאז שהמועמד הטוב ביותר לסכום השתנה
+        self.pages_since_amount = 0
+        self.data = {
+            'date': None,
+            'amount': None,
+            'reference': None
+        }
+
+    @property
+    def complete(self):
+        return (
+            self.data['date'] is not None
+            and self.data['reference'] is not None
+            and self.amount_score is not None
+            and (self.amount_score >= CONFIDENT_AMOUNT_SCORE or self.pages_since_amount >= AMOUNT_SETTLE_PAGES)
+        )
+
+    def feed(self, text):
+        """חיפוש השדות החסרים בקטע טקסט נוסף; מחזיר True כשכל השדות נמצאו"""
+        self.pages_since_amount += 1
+        if not text:
+            return self.complete
+
+        if self.template is None:
+            self.template = self.extractor.match_template(text)
+
+        if self.data['reference'] is None:
+            self.data['reference'] = (
+                self._template_field('reference', text) or self.extractor.find_reference(text, self.doc_type)
+            )
+
+        if self.data['date'] is None:
+            self.data['date'] = self._template_field('date', text) or self.extractor.find_date(text)
+
+        if self.data['amount'] is None or self.amount_score < MAX_AMOUNT_SCORE:
+            templated = self._template_field('amount', text)
+            if templated is not None:
+                self.data['amount'], self.amount_score = parse_amount(templated), MAX_AMOUNT_SCORE
+                self.pages_since_amount = 0
+            else:
+                amount, score = self.extractor.find_amount(text, self.data['reference'])
+                if amount is not None and (self.amount_score is None or score > self.amount_score):
+                    self.data['amount'], self.amount_score = amount, score
+                    self.pages_since_amount = 0
+
+        return self.complete
+
+    def _template_field(self, field, text):
+        return self.template.search(field, text) if self.template else None
+
+
+class FieldExtractor:
+    """חילוץ תאריך, סכום כולל ומספר אסמכתא מטקסט של חשבונית או קבלה"""
+
+    def __init__(self, templates=None):
+        self.templates = load_templates() if templates is None else templates
+
+    def match_template(self, text):
+        for template in self.templates:
+            if template.match.search(text):
+                return template
+        return None
+
+    @staticmethod
+    def find_date(text):
+        match = DATE_RE.search(text)
+        return match.group(0) if match else None
+
+    @staticmethod
+    def find_reference(text, doc_type):
+        pattern = REFERENCE_RES['invoice' if doc_type == 'invoice' else 'receipt']
+        match = pattern.search(text)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _score_amount(text, match, reference):
+        """ניקוד מועמד לסכום לפי ההקשר בשורה שלו; None אם ברור שאינו סכום"""
+        digits = match.group(1).replace(',', '')
+        if reference is not None and digits == reference and match.group(2) is None:
+            return None
+
+        line_start = text.rfind('\n', 0, match.start()) + 1
+        line_end = text.find('\n', match.end())
+        before = text[line_start:match.start()]
+        after = text[match.end():len(text) if line_end == -1 else line_end]
+
+        # אחוז (שיעור מע"מ) או מספר טלפון/עוסק בהקשר הקרוב
+        if VAT_RATE_RE.match(after.lstrip()) or NON_AMOUNT_CONTEXT_RE.search(before[-15:]):
+            return None
+        if digits.startswith('0') and len(digits) >= 9:
+            return None
+
+        score = 0
+        for weight, pattern in TOTAL_KEYWORDS:
+            if pattern.search(before) or pattern.search(after[:20]):
+                score = weight * 10
+                break
+        if CURRENCY_RE.search(before[-4:]) or CURRENCY_RE.match(after.lstrip()):
+            score += 3
+        if match.group(2) is not None and len(match.group(2)) == 2:
+            score += 1
+        return score
+
+    @classmethod
+    def find_amount(cls, text, reference=None):
+        """הסכום הכולל המדורג ביותר בטקסט - מחזיר (סכום, ניקוד) או (None, None)"""
+        best_amount, best_score = None, None
+        for match in AMOUNT_RE.finditer(text):
+            score = cls._score_amount(text, match, reference)
+            if score is None:
+                continue
+            amount = parse_amount(match.group(0))
+            # בשוויון ניקוד מועדף המועמד המאוחר יותר - שורת הסיכום בתחתית המסמך
+            if best_score is None or score >= best_score:
+                best_amount, best_score = amount, score
+            if score >= MAX_AMOUNT_SCORE:
+                break
+        return best_amount, best_score
+
+    def document(self, doc_type):
+        return DocumentFields(self, doc_type)
+
+    def extract(self, text, doc_type):
+        fields = self.document(doc_type)
+        fields.feed(text)
+        return fields.data
@@ -1,130 +1,227 @@
 import pandas as pd
-import numpy as np
-from datetime import datetime
-import streamlit as st
-from supabase import create_client
 import os
+import threading
 from dotenv import load_dotenv
+from data_access import DataAccess, show_cache_stats
+from instrumentation import serve_metrics, show_timing_panel, span
+from notifier import LogNotifier, StreamlitNotifier
 from data_cleaner import DataCleaner
-import pdfplumber
-import pytesseract
-from PIL import Image
-import io
-import re
+from group_matcher import GroupMatchEngine
+from match_engine import SOURCE_TABLES, TolerantMatchEngine
+from parallel_matcher import ParallelMatchEngine
+from bulk_uploader import BulkUploader
+from ingest_ledger import IngestLedger, OccurrenceTracker
+from pdf_processor import PDFProcessor, PDFBatchProcessor
+from statement_reader import StatementReader
+from transaction_store import TransactionStore, id_ranges
+from ocr_fallback import OCRFallback
 
 # טעינת הגדרות סביבה
 load_dotenv()
 
-class PDFProcessor:
-    @staticmethod
-    def extract_text_from_pdf(pdf_file):
-        """חילוץ טקסט מקובץ PDF"""
-        text = ""
-        try:
-            with pdfplumber.open(pdf_file) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() + "\n"
-        except Exception as e:
-            st.error(f"שגיאה בקריאת קובץ PDF: {str(e)}")
-            return None
-        return text
-    
-    @staticmethod
-    def extract_data_from_text(text, doc_type):
-        """חילוץ נתונים מטקסט"""
-        data = {
-            'date': None,
-            'amount': None,
-            'reference': None
-        }
-        
-        if text:
-            # חיפוש תאריך
-            date_pattern = r'\d{1,2}[./]\d{1,2}[./]\d{2,4}'
-            dates = re.findall(date_pattern, text)
-            if dates:
-                data['date'] = dates[0]
-            
-            # חיפוש סכום
-            amount_pattern = r'₪?\s*[\d,]+\.?\d*'
-            amounts = re.findall(amount_pattern, text)
-            if amounts:
-                # ניקוי והמרה למספר
-                amount = amounts[0].replace('₪', '').replace(',', '').strip()
-                try:
-                    data['amount'] = float(amount)
-                except:
-                    pass
-            
-            # חיפוש מספר אסמכתא לפי סוג המסמך
-            if doc_type == 'invoice':
-                ref_pattern = r'חשבונית\s*מס[׳\']?\s*[:#]?\s*(\d+)'
-            else:  # receipt
-                ref_pattern = r'קבלה\s*מס[׳\']?\s*[:#]?\s*(\d+)'
-            
-            ref_match = re.search(ref_pattern, text)
-            if ref_match:
-                data['reference'] = ref_match.group(1)
-        
-        return data
+# שלב ההתאמה רץ פעם אחת בכל רגע בתהליך - עבודות השירות וסשנים של Streamlit כותבים לאותן טבלאות
+# התאמה, ובהשמה בזיכרון הקריאה, החישוב והשמירה חייבים לא להשתלב עם ריצה אחרת. הקליטה לא נעולה.
+# בין תהליכים שומרת על כך נעילת ה-advisory שבפונקציות השמירה
+_match_lock = threading.Lock()
 
 class SupabaseClient:
-    def __init__(self):
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        
-        if not supabase_url or not supabase_key:
-            raise ValueError("נא להגדיר את פרטי ההתחברות ל-Supabase בקובץ .env")
-            
-        self.client = create_client(supabase_url, supabase_key)
+    def __init__(self, data=None, notifier=None):
+        self.data = data if data is not None else DataAccess()
+        self.notifier = notifier or LogNotifier()
+        self.client = self.data.client
+        self.last_match_run = {}
+        self.last_group_run = {}
+        self.last_assignment_run = {}
     
-    def insert_transactions(self, df, table_name):
-        """הכנסת נתונים לטבלה מתאימה"""
-        records = df.to_dict('records')
+    def insert_transactions(self, df, table_name, batch_size=500, max_workers=4, on_progress=None,
+                            occurrences=None, first_row=0):
+        """הכנסת נתונים לטבלה מתאימה - מנות מקבילות, מנה שנכשלה לא עוצרת את שאר הקובץ.
+        בקליטה במנות first_row הוא מיקום המנה בקובץ, לצורך הודעות השגיאה"""
+        with span('insert_transactions', table=table_name) as stage:
+            df = IngestLedger.add_natural_keys(df, table_name, occurrences)
+            uploader = BulkUploader(self.client, batch_size=batch_size, max_workers=max_workers)
+            report = uploader.upload(df, table_name, on_progress=on_progress, on_conflict='natural_key')
+            stage.count('rows_in', report.total_rows)
+            stage.count('rows_sent', report.rows_sent)
+            stage.count('batches_sent', report.batches_sent)
+            stage.count('retries', report.retries)
+            stage.count('batches_failed', len(report.failed_batches))
+        if report.rows_sent:
+            self.data.invalidate()
         
-        # העלאת הנתונים במנות של 100 רשומות
-        batch_size = 100
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            try:
-                self.client.table(table_name).insert(batch).execute()
-            except Exception as e:
-                st.error(f"שגיאה בהעלאת נתונים לטבלה {table_name}: {str(e)}")
-                raise e
+        for batch in report.failed_batches:
+            self.notifier.error(
+                f"שגיאה בהעלאת שורות {first_row + batch['start'] + 1}-{first_row + batch['end']} "
+                f"לטבלה {table_name}: {batch['error']}"
+            )
+        return report
     
-    def process_matches(self):
-        """ביצוע וקבלת התאמות באופן אוטומטי"""
+    def process_matches(self, incremental=True, one_to_one=False, tolerant=False, details=True):
+        """ביצוע וקבלת התאמות באופן אוטומטי.
+        one_to_one מחשב השמה אופטימלית שבה כל מסמך מותאם לעסקת בנק אחת לכל היותר.
+        tolerant מתאים גם עם הפרש סכום (עמלות, עיגול) ומוסיף לציון את האסמכתא והתיאור.
+        details=False מחזיר None במקום כל טבלת ההתאמות - מספר ההתאמות של הריצה ב-last_match_run
+        או ב-last_assignment_run"""
+        mode = 'one_to_one' if one_to_one else 'tolerant' if tolerant else 'incremental' if incremental else 'full'
         try:
-            # הרצת פונקציית ההתאמה עם ערכי ברירת מחדל
-            self.client.rpc('save_best_matches').execute()
+            with _match_lock, span('process_matches', mode=mode) as stage:
+                if one_to_one or tolerant:
+                    # חישוב בזיכרון על כל השורות - נשמר במקום ההתאמות הקיימות
+                    with span('read_tables'):
+                        # הציון הסובלני משווה גם אסמכתאות ותיאורים, ולכן צריך את כל העמודות
+                        bank_df, sources = self._read_tables(compact=not tolerant)
+                    if tolerant:
+                        engine = TolerantMatchEngine(
+                            amount_tolerance=float(os.getenv("MATCH_AMOUNT_TOLERANCE", "5")),
+                            amount_tolerance_pct=float(os.getenv("MATCH_AMOUNT_TOLERANCE_PCT", "0")),
+                            min_score=float(os.getenv("MATCH_MIN_SCORE", "0.6"))
+                        )
+                    else:
+                        engine = ParallelMatchEngine(workers=int(os.getenv("MATCH_WORKERS", "1")))
+                    with span('assign') as assign:
+                        if bank_df.empty:
+                            assigned = pd.DataFrame(
+                                columns=['bank_transaction_id', 'matched_table', 'matched_id', 'match_score']
+                            )
+                        else:
+                            assigned = engine.best_matches(bank_df, sources, one_to_one=one_to_one)
+                        assign.count('bank_rows', len(bank_df))
+                        assign.count('document_rows', sum(len(df) for df in sources.values()))
+                    records = assigned[
+                        ['bank_transaction_id', 'matched_table', 'matched_id', 'match_score']
+                    ].to_dict('records')
+                    self.data.call('save_assigned_matches', {
+                        'matches': records, 'scanned': self._scanned(bank_df, sources), 'exclusive': one_to_one
+                    })
+                    self.data.invalidate()
+                    self.last_match_run = {}
+                    self.last_assignment_run = dict(engine.assignment.stats, matches_saved=len(records))
+                    stage.count('matches_saved', len(records))
+                elif incremental:
+                    # התאמה מצטברת - רק שורות שנוספו מאז הריצה הקודמת
+                    run = self.data.call('match_new_transactions')
+                    self.last_match_run = run[0] if run else {}
+                    if self.last_match_run.get('matches_saved'):
+                        self.data.invalidate()
+                    stage.count('matches_saved', self.last_match_run.get('matches_saved') or 0)
+                    # ה-views מתרעננים לכל היותר פעם ב-VIEW_REFRESH_INTERVAL - בסדרת העלאות הפרטים
+                    # שמוחזרים כאן יכולים לפגר אחרי הריצה; מוני הריצה (last_match_run) מדויקים
+                    stage.count('views_refreshed', int(self.data.refresh_views()))
+                else:
+                    # הרצה מלאה של פונקציית ההתאמה עם ערכי ברירת מחדל
+                    self.data.call('save_best_matches')
+                    self.data.invalidate()
+                    # ריצה מלאה מחליפה את כל ההתאמות - אחת לכל עסקת בנק מותאמת
+                    statistics = self.data.call('get_match_statistics')
+                    self.last_match_run = {
+                        'matches_saved': statistics[0]['matched_transactions'] if statistics else 0
+                    }
+                
+                if not details:
+                    return None
+                # קבלת תוצאות ההתאמה - בעמודים, כך שמגבלת max-rows של השרת לא קוטעת אותן
+                results = self.data.reader().match_details().to_frame()
+                stage.count('rows_out', len(results))
+                return results
             
-            # קבלת תוצאות ההתאמה
-            results = self.client.rpc('get_match_details').execute()
-            return pd.DataFrame(results.data)
+        except Exception as e:
+            self.notifier.error(f"שגיאה בביצוע התאמות: {str(e)}")
+            raise e
+    
+    def process_group_matches(self, engine=None):
+        """חיפוש תשלומים מפוצלים בשורות שלא הותאמו ושמירתם כקבוצות התאמה"""
+        try:
+            with _match_lock, span('process_group_matches') as stage:
+                bank_df, sources = self._read_tables(unmatched_only=True)
+                engine = engine or GroupMatchEngine()
+                groups = engine.find_groups(bank_df, sources)
+                self.data.call('save_match_groups', {'groups': groups.to_dict('records')})
+                self.data.invalidate()
+                self.last_group_run = engine.stats
+                stage.count('bank_rows', len(bank_df))
+                stage.count('groups_saved', len(groups))
+                return groups
             
         except Exception as e:
-            st.error(f"שגיאה בביצוע התאמות: {str(e)}")
+            self.notifier.error(f"שגיאה בחיפוש תשלומים מפוצלים: {str(e)}")
             raise e
+    
+    @staticmethod
+    def _scanned(bank, sources):
+        """טווחי המזהים שנקראו מכל טבלה - רק בהם השרת מסמן את השורות כסרוקות"""
+        scanned = {'bank_transactions': id_ranges(bank['id'])}
+        scanned.update({table_name: id_ranges(df['id']) for table_name, df in sources.items()})
+        return scanned
+    
+    def _read_tables(self, unmatched_only=False, compact=False):
+        """עסקאות הבנק וטבלאות המקור בזיכרון, בקריאה לפי מפתח.
+        unmatched_only משאיר רק שורות שאינן ב-transaction_matches.
+        compact מחזיר TransactionStore עם id, amount ו-date בלבד, מקודד עמוד אחרי עמוד"""
+        reader = self.data.reader()
+        if compact:
+            bank = TransactionStore.from_chunks(reader.bank_transactions('id,date,amount'))
+            return bank, {
+                table_name: TransactionStore.from_chunks(reader.table(table_name, 'id,date,amount'))
+                for table_name in SOURCE_TABLES
+            }
+
+        matches = pd.DataFrame()
+        if unmatched_only:
+            matches = reader.table('transaction_matches', 'bank_transaction_id,matched_table,matched_id').to_frame()
+        
+        bank_df = reader.bank_transactions('id,date,amount,description').to_frame()
+        if not matches.empty and not bank_df.empty:
+            bank_df = bank_df[~bank_df['id'].isin(matches['bank_transaction_id'])]
+        
+        sources = {}
+        for table_name in SOURCE_TABLES:
+            df = reader.table(table_name).to_frame()
+            if not matches.empty and not df.empty:
+                df = df[~df['id'].isin(matches.loc[matches['matched_table'] == table_name, 'matched_id'])]
+            sources[table_name] = df
+        return bank_df, sources
 
 class FinancialMatcher:
-    def __init__(self):
+    """קליטת קבצים והתאמות - בלי תלות בממשק.
+    notifier מקבל את הודעות השגיאה וההתקדמות (LogNotifier כברירת מחדל, StreamlitNotifier בדף);
+    ingested_hashes הוא סט הקבצים שכבר נקלטו בסשן - ב-Streamlit הוא נשמר ב-session_state"""
+
+    def __init__(self, notifier=None, ingested_hashes=None, supabase=None):
+        self.notifier = notifier or LogNotifier()
+        self.ingested_hashes = ingested_hashes if ingested_hashes is not None else set()
         try:
-            self.supabase = SupabaseClient()
+            self.supabase = supabase or SupabaseClient(notifier=self.notifier)
         except Exception as e:
-            st.error(f"שגיאה בהתחברות ל-Supabase: {str(e)}")
+            self.notifier.error(f"שגיאה בהתחברות ל-Supabase: {str(e)}")
             self.supabase = None
         
         self.pdf_processor = PDFProcessor()
+        self.statement_reader = StatementReader(chunk_rows=int(os.getenv("INGEST_CHUNK_ROWS", "50000")))
+        self.ocr = OCRFallback(dpi=int(os.getenv("OCR_DPI", "300")))
+        self.pdf_batch_processor = PDFBatchProcessor(ocr_options={'dpi': self.ocr.dpi, 'max_workers': 1})
+        self.ledger = IngestLedger(self.supabase.client) if self.supabase else None
+    
+    def is_ingested(self, file_hash):
+        """בדיקה אם הקובץ כבר נקלט - קודם בסשן ואחר כך בטבלת ingest_ledger"""
+        ingested = self.ingested_hashes
+        if file_hash in ingested:
+            return True
+        if self.ledger and self.ledger.is_ingested(file_hash):
+            ingested.add(file_hash)
+            return True
+        return False
+    
+    def mark_ingested(self, file_hash, file_name, table_name, row_count):
+        """רישום קובץ שנקלט בהצלחה כדי שהרצות חוזרות ידלגו עליו"""
+        self.ingested_hashes.add(file_hash)
+        self.ledger.record(file_hash, file_name, table_name, row_count)
     
     def load_excel_file(self, file, file_type):
-        """טעינת קובץ אקסל"""
+        """טעינת קובץ אקסל - קריאה, ניקוי והעלאה מנה אחר מנה, כך שהזיכרון תלוי בגודל המנה ולא בקובץ"""
         try:
-            if file.name.endswith('.xlsx'):
-                df = pd.read_excel(file)
-            elif file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            else:
-                raise ValueError("פורמט קובץ לא נתמך. נא להשתמש ב-CSV או Excel")
+            file_hash = IngestLedger.file_hash(file)
+            if self.is_ingested(file_hash):
+                return True
             
             # ניקוי הנתונים
             cleaning_functions = {
@@ -133,8 +230,6 @@ class FinancialMatcher:
                 'transfers': DataCleaner.clean_transfers
             }
             
-            df = cleaning_functions[file_type](df)
-            
             # שמירה בטבלה המתאימה
             table_mapping = {
                 'bank': 'bank_transactions',
@@ -142,25 +237,48 @@ class FinancialMatcher:
                 'transfers': 'bank_transfers'
             }
             
-            self.supabase.insert_transactions(df, table_mapping[file_type])
-            return True
+            progress = self.notifier.progress(file.name)
+            occurrences = OccurrenceTracker()
+            rows_cleaned, rows_sent, ok = 0, 0, True
+            with span('load_excel_file', file_type=file_type) as stage:
+                stage.count('bytes_read', file.size if hasattr(file, 'size') else len(file.getvalue()))
+                for chunk, fraction_read in self.statement_reader.iter_chunks(file):
+                    stage.count('rows_read', len(chunk))
+                    with span('clean', file_type=file_type):
+                        df = cleaning_functions[file_type](chunk, vectorized=True)
+                    del chunk
+                    
+                    report = self.supabase.insert_transactions(
+                        df, table_mapping[file_type], occurrences=occurrences, first_row=rows_cleaned
+                    )
+                    rows_cleaned += len(df)
+                    rows_sent += report.rows_sent
+                    ok = ok and report.ok
+                    progress(fraction_read, f"{rows_sent:,} שורות נקלטו")
+                stage.count('rows_cleaned', rows_cleaned)
+                stage.count('rows_sent', rows_sent)
+            
+            if ok:
+                self.mark_ingested(file_hash, file.name, table_mapping[file_type], rows_sent)
+            return ok
             
         except Exception as e:
-            st.error(f"שגיאה בטעינת הקובץ: {str(e)}")
+            self.notifier.error(f"שגיאה בטעינת הקובץ: {str(e)}")
             return False
     
     def process_pdf_file(self, file, doc_type):
         """עיבוד קובץ PDF"""
         try:
-            # חילוץ טקסט מה-PDF
-            text = self.pdf_processor.extract_text_from_pdf(file)
-            if not text:
-                return False
+            file_hash = IngestLedger.file_hash(file)
+            if self.is_ingested(file_hash):
+                return True
             
-            # חילוץ נתונים מהטקסט
-            data = self.pdf_processor.extract_data_from_text(text, doc_type)
+            # חילוץ נתונים מה-PDF עמוד אחר עמוד
+            with span('process_pdf_file', doc_type=doc_type) as stage:
+                stage.count('bytes_read', len(file.getvalue()))
+                data = self.pdf_processor.extract_data_from_pdf(file, doc_type, ocr=self.ocr)
             if not all(data.values()):
-                st.warning(f"לא ניתן היה לחלץ את כל הנתונים מהקובץ {file.name}")
+                self.notifier.warning(f"לא ניתן היה לחלץ את כל הנתונים מהקובץ {file.name}")
                 return False
             
             # שמירה בטבלה המתאימה
@@ -171,23 +289,93 @@ class FinancialMatcher:
                 f'{doc_type}_number': data['reference']
             }])
             
-            self.supabase.insert_transactions(df, table_name)
+            if not self.supabase.insert_transactions(df, table_name).ok:
+                return False
+            
+            self.mark_ingested(file_hash, file.name, table_name, 1)
             return True
             
         except Exception as e:
-            st.error(f"שגיאה בעיבוד קובץ PDF: {str(e)}")
+            self.notifier.error(f"שגיאה בעיבוד קובץ PDF: {str(e)}")
             return False
     
-    def process_matches(self):
+    def process_pdf_files(self, files):
+        """עיבוד מקבילי של קבצי PDF והעלאה מרוכזת לכל טבלה
+
+        files היא רשימה של (קובץ, סוג מסמך). מחזיר את מספר הקבצים שנקלטו בהצלחה
+        """
+        pending = []
+        for file, doc_type in files:
+            file_hash = IngestLedger.file_hash(file)
+            if not self.is_ingested(file_hash):
+                pending.append((file, doc_type, file_hash))
+        if not pending:
+            return len(files)
+        
+        with span('process_pdf_files') as stage:
+            documents = [(file.name, file.getvalue(), doc_type) for file, doc_type, _ in pending]
+            stage.count('documents', len(documents))
+            stage.count('bytes_read', sum(len(content) for _, content, _ in documents))
+            parsed = self._extract_pdfs(documents, stage)
+        
+            # העלאה אחת לכל טבלה במקום שורה בודדת לכל קובץ
+            ingested = len(files) - len(pending)
+            for doc_type, results in parsed.items():
+                if not results:
+                    continue
+                table_name = 'invoices' if doc_type == 'invoice' else 'receipts'
+                df = pd.DataFrame([result['record'] for result in results])
+                if not self.supabase.insert_transactions(df, table_name).ok:
+                    continue
+                for result in results:
+                    self.mark_ingested(pending[result['index']][2], result['name'], table_name, 1)
+                ingested += len(results)
+        
+            return ingested
+    
+    def _extract_pdfs(self, documents, stage):
+        """חילוץ במאגר תהליכים עם דיווח התקדמות לכל קובץ - התוצאות שהצליחו לפי סוג מסמך"""
+        progress = self.notifier.progress()
+        parsed = {'invoice': [], 'receipt': []}
+        ocr_timings = []
+        for done, result in enumerate(self.pdf_batch_processor.process(documents), start=1):
+            ocr_timings.extend(result['ocr_timings'])
+            if result['error']:
+                stage.count('documents_failed')
+                self.notifier.warning(result['error'])
+            else:
+                parsed[result['doc_type']].append(result)
+            progress(done / len(documents), f"{done}/{len(documents)} - {result['name']}")
+        
+        ocr_runs = [timing for timing in ocr_timings if not timing['cached']]
+        stage.count('ocr_pages', len(ocr_runs))
+        stage.count('ocr_cached_pages', len(ocr_timings) - len(ocr_runs))
+        if ocr_timings:
+            self.notifier.info(
+                f"OCR: {len(ocr_timings)} עמודים, {len(ocr_timings) - len(ocr_runs)} מהמטמון, "
+                f"{sum(timing['ocr_seconds'] for timing in ocr_runs):.1f} שניות Tesseract"
+            )
+        return parsed
+    
+    def process_matches(self, incremental=True, one_to_one=False, tolerant=False, details=True):
         """ביצוע התאמות"""
         if self.supabase is None:
             raise ValueError("לא ניתן לבצע התאמות ללא חיבור ל-Supabase")
-        return self.supabase.process_matches()
+        return self.supabase.process_matches(incremental, one_to_one, tolerant, details)
+    
+    def process_group_matches(self):
+        """חיפוש תשלומים מפוצלים (קבוצות התאמה)"""
+        if self.supabase is None:
+            raise ValueError("לא ניתן לבצע התאמות ללא חיבור ל-Supabase")
+        return self.supabase.process_group_matches()
 
 def main():
+    import streamlit as st
+
     st.title("מערכת התאמות פיננסיות אוטומטית")
+    serve_metrics()
     
-    matcher = FinancialMatcher()
+    matcher = FinancialMatcher(StreamlitNotifier(), st.session_state.setdefault('ingested_hashes', set()))
     
     # טעינת קבצים
     st.header("העלאת קבצים")
@@ -211,17 +399,38 @@ def main():
     # קבצי PDF
     uploaded_pdfs = st.file_uploader("העלאת חשבוניות וקבלות", type=['pdf'], accept_multiple_files=True)
     if uploaded_pdfs:
-        for pdf_file in uploaded_pdfs:
-            # זיהוי אוטומטי של סוג המסמך
-            doc_type = 'invoice' if 'חשבונית' in pdf_file.name.lower() else 'receipt'
-            if matcher.process_pdf_file(pdf_file, doc_type):
-                st.success(f"קובץ {pdf_file.name} עובד בהצלחה")
+        # זיהוי אוטומטי של סוג המסמך
+        files = [
+            (pdf_file, 'invoice' if 'חשבונית' in pdf_file.name.lower() else 'receipt')
+            for pdf_file in uploaded_pdfs
+        ]
+        ingested = matcher.process_pdf_files(files)
+        if ingested:
+            st.success(f"{ingested} מתוך {len(files)} קבצי PDF עובדו בהצלחה")
     
     # ביצוע התאמות אוטומטי
     if st.session_state.get('files_uploaded'):
+        one_to_one = st.checkbox("השמה אחד-לאחד (כל מסמך מותאם לעסקה אחת בלבד)")
+        tolerant = st.checkbox("התאמה עם סבילות בסכום (עמלות, הפרשי עיגול)")
         try:
             with st.spinner("מבצע התאמות..."):
-                results = matcher.process_matches()
+                results = matcher.process_matches(one_to_one=one_to_one, tolerant=tolerant)
+            
+            if tolerant and not one_to_one:
+                st.caption(f"{matcher.supabase.last_assignment_run['matches_saved']} התאמות נשמרו")
+            if one_to_one:
+                assignment_run = matcher.supabase.last_assignment_run
+                st.caption(
+                    f"{assignment_run['matches_saved']} התאמות נשמרו, {assignment_run['components']} רכיבים, "
+                    f"{assignment_run['augmenting']} נפתרו במסלולים מגדילים (הגדול: {assignment_run['largest']} מועמדים)"
+                )
+            
+            run = matcher.supabase.last_match_run
+            if run:
+                st.caption(
+                    f"נסרקו {run['bank_rows_considered']} עסקאות בנק חדשות ו-{run['document_rows_considered']} מסמכים חדשים, "
+                    f"{run['candidates_scored']} מועמדים, {run['matches_saved']} התאמות נשמרו"
+                )
             
             if not results.empty:
                 # הצגת תוצאות
@@ -244,6 +453,17 @@ def main():
                     st.markdown("---")
             else:
                 st.info("לא נמצאו התאמות")
+            
+            if st.checkbox("חיפוש תשלומים מפוצלים (כמה מסמכים מול עסקה אחת)"):
+                with st.spinner("מחפש קבוצות התאמה..."):
+                    groups = matcher.process_group_matches()
+                group_run = matcher.supabase.last_group_run
+                st.caption(
+                    f"{group_run['found']} קבוצות נמצאו מתוך {group_run['searched']} חיפושים, "
+                    f"{group_run['timed_out']} חיפושים הגיעו למגבלת הזמן"
+                )
+                if not groups.empty:
+                    st.dataframe(groups)
                 
         except Exception as e:
             st.error(f"אירעה שגיאה בעיבוד הנתונים: {str(e)}")
@@ -251,6 +471,9 @@ def main():
     # עדכון סטטוס העלאת קבצים
     if bank_file or checks_file or transfers_file or uploaded_pdfs:
         st.session_state.files_uploaded = True
+    
+    show_cache_stats()
+    show_timing_panel()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
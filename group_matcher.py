@@ -0,0 +1,300 @@
+from itertools import combinations
+from math import comb
+import time
+
+import numpy as np
+import pandas as pd
+
+from match_engine import MatchEngine, SOURCE_TABLES
+
+# עמודת המשלם/האסמכתא של כל טבלת מקור - מסמכים בקבוצה אחת חייבים לחלוק אותו ערך
+GROUP_KEY_COLUMNS = {
+    'checks': 'payer_name',
+    'bank_transfers': 'reference_number'
+}
+
+# עד כמה מועמדים עוברים על הצירופים בלולאה פשוטה - מהיר יותר מפעולות numpy על מערכים זעירים
+SMALL_POOL_SIZE = 6
+# עד כמה תתי-קבוצות מונים את כל המועמדים ישירות, בלי לפצל לשני חצאים
+DIRECT_SEARCH_LIMIT = 20_000
+
+# עמודות התוצאה של find_groups
+GROUP_COLUMNS = [
+    'match_type', 'matched_table', 'bank_transaction_ids', 'matched_ids',
+    'total_amount', 'amount_delta', 'match_score'
+]
+
+
+class SubsetSumSearch:
+    """חיפוש תת-קבוצה שסכומה קרוב ליעד - meet-in-the-middle עם גבול על גודל הקבוצה ועל הזמן.
+
+    המועמדים מחולקים לשני חצאים; בכל חצי נמנים כל תתי-הקבוצות עד max_size פריטים שסכומן
+    לא עובר את היעד, ואז לכל סכום בחצי השמאלי מחפשים בחיפוש בינארי את המשלים בחצי הימני.
+    """
+
+    def __init__(self, max_size=4, time_budget=0.05):
+        self.max_size = max_size
+        self.time_budget = time_budget
+        self.timed_out = False
+
+    def find(self, amounts, target, tolerance=0):
+        """אינדקסים של 2 פריטים לפחות שסכומם ביעד +- tolerance (באגורות), או None.
+
+        מבין הפתרונות נבחר זה עם ההפרש הקטן ביותר, ובשוויון - עם הכי מעט פריטים
+        """
+        self.timed_out = False
+        amounts = np.asarray(amounts, dtype='int64')
+        limit = target + tolerance
+        if len(amounts) < 2 or amounts.sum() < target - tolerance or np.partition(amounts, 1)[:2].sum() > limit:
+            return None
+
+        if len(amounts) <= SMALL_POOL_SIZE:
+            return self._small(amounts.tolist(), target, tolerance)
+
+        deadline = time.perf_counter() + self.time_budget
+        if sum(comb(len(amounts), size) for size in range(self.max_size + 1)) <= DIRECT_SEARCH_LIMIT:
+            return self._direct(amounts, target, tolerance, deadline)
+
+        middle = len(amounts) // 2
+        left = self._subset_sums(amounts[:middle], limit, deadline)
+        right = self._subset_sums(amounts[middle:], limit, deadline)
+        if left is None or right is None:
+            self.timed_out = True
+            return None
+
+        best = self._combine(left, right, target, tolerance, deadline)
+        if best is None:
+            return None
+        _, left_mask, right_mask = best
+        return [i for i in range(middle) if left_mask >> i & 1] + [
+            middle + i for i in range(len(amounts) - middle) if right_mask >> i & 1
+        ]
+
+    def _combine(self, left, right, target, tolerance, deadline):
+        """מפגש באמצע: לכל סכום בחצי השמאלי, המשלים הקרוב ביותר בחצי הימני לפי מספר הפריטים.
+        מחזיר ((הפרש, מספר פריטים), מסכה שמאלית, מסכה ימנית) של הפתרון הטוב ביותר, או None"""
+        best = None
+        right_sums, right_masks, right_sizes = right
+        for right_size in range(self.max_size + 1):
+            if time.perf_counter() > deadline:
+                self.timed_out = True
+                break
+            chosen = right_sizes == right_size
+            if not chosen.any():
+                continue
+            order = np.argsort(right_sums[chosen], kind='stable')
+            sums, masks = right_sums[chosen][order], right_masks[chosen][order]
+
+            left_sums, left_masks, left_sizes = left
+            allowed = (left_sizes + right_size <= self.max_size) & (left_sizes + right_size >= 2)
+            if not allowed.any():
+                continue
+            wanted = target - left_sums[allowed]
+
+            # שני השכנים של המשלים המדויק במערך הממוין
+            position = np.searchsorted(sums, wanted)
+            for neighbour in (np.minimum(position, len(sums) - 1), np.maximum(position - 1, 0)):
+                delta = np.abs(sums[neighbour] - wanted)
+                sizes = left_sizes[allowed] + right_size
+                index = np.lexsort((sizes, delta))[0]
+                if delta[index] > tolerance:
+                    continue
+                candidate = (int(delta[index]), int(sizes[index]))
+                if best is None or candidate < best[0]:
+                    best = (candidate, left_masks[allowed][index], masks[neighbour[index]])
+        return best
+
+    def _small(self, amounts, target, tolerance):
+        best = None
+        for size in range(2, min(self.max_size, len(amounts)) + 1):
+            for subset in combinations(range(len(amounts)), size):
+                delta = abs(sum(amounts[i] for i in subset) - target)
+                if delta <= tolerance and (best is None or delta < best[0]):
+                    best = (delta, list(subset))
+        return best[1] if best is not None else None
+
+    def _direct(self, amounts, target, tolerance, deadline):
+        """מעט מועמדים - מנייה אחת של כל תתי-הקבוצות במקום שני חצאים וחיבור ביניהם"""
+        subsets = self._subset_sums(amounts, target + tolerance, deadline)
+        if subsets is None:
+            self.timed_out = True
+            return None
+        sums, masks, sizes = subsets
+        delta = np.abs(sums - target)
+        valid = np.flatnonzero((sizes >= 2) & (delta <= tolerance))
+        if len(valid) == 0:
+            return None
+        mask = masks[valid[np.lexsort((sizes[valid], delta[valid]))[0]]]
+        return [i for i in range(len(amounts)) if mask >> i & 1]
+
+    def _subset_sums(self, amounts, limit, deadline):
+        """(סכומים, מסכות ביטים, גדלים) של כל תתי-הקבוצות עד max_size פריטים וסכום עד limit"""
+        count = len(amounts)
+        sums, masks = [np.zeros(1, dtype='int64')], [np.zeros(1, dtype='int64')]
+        sizes = [np.zeros(1, dtype='int64')]
+        frontier_sums, frontier_masks = sums[0], masks[0]
+        frontier_last = np.full(1, -1, dtype='int64')
+
+        for size in range(1, self.max_size + 1):
+            if time.perf_counter() > deadline:
+                return None
+            # כל תת-קבוצה מורחבת רק בפריטים שאחרי הפריט האחרון שלה - בלי כפילויות
+            extensions = count - 1 - frontier_last
+            parent = np.repeat(np.arange(len(frontier_last)), extensions)
+            if len(parent) == 0:
+                break
+            item = np.arange(len(parent)) - np.repeat(np.cumsum(extensions) - extensions, extensions)
+            item += frontier_last[parent] + 1
+
+            new_sums = frontier_sums[parent] + amounts[item]
+            keep = new_sums <= limit
+            frontier_sums = new_sums[keep]
+            frontier_masks = frontier_masks[parent[keep]] | (np.int64(1) << item[keep])
+            frontier_last = item[keep]
+
+            sums.append(frontier_sums)
+            masks.append(frontier_masks)
+            sizes.append(np.full(len(frontier_sums), size, dtype='int64'))
+
+        return np.concatenate(sums), np.concatenate(masks), np.concatenate(sizes)
+
+
+class GroupMatchEngine:
+    """התאמת תשלומים מפוצלים: עסקת בנק אחת מול כמה מסמכים (הפקדה של כמה שיקים),
+    או כמה עסקאות בנק מול מסמך אחד (חשבונית ששולמה בכמה העברות).
+
+    המועמדים לכל קבוצה הם שורות שעדיין לא הותאמו, בחלון התאריכים, עם אותו משלם/אסמכתא.
+    כל שורה משתתפת לכל היותר בקבוצה אחת; השורות נסרקות לפי מזהה, כך שהתוצאה דטרמיניסטית.
+    """
+
+    def __init__(self, tolerance_days=3, min_score=0.5, amount_tolerance=0.0, max_group_size=4,
+                 max_candidates=24, time_budget=0.05):
+        self.tolerance_days = tolerance_days
+        self.min_score = min_score
+        self.amount_tolerance = amount_tolerance
+        self.max_candidates = max_candidates
+        self.search = SubsetSumSearch(max_group_size, time_budget)
+        self.stats = {}
+
+    def find_groups(self, bank_df, sources):
+        """קבוצות התאמה לשורות שלא הותאמו - DataFrame עם העמודות GROUP_COLUMNS.
+
+        sources הוא מילון של שם טבלה -> DataFrame, כמו ב-MatchEngine
+        """
+        self.stats = {'searched': 0, 'found': 0, 'timed_out': 0}
+        groups = []
+        bank = self._side(bank_df, 'description')
+        if bank is None:
+            return pd.DataFrame(columns=GROUP_COLUMNS)
+
+        sides = {}
+        for table_name in SOURCE_TABLES:
+            documents = self._side(sources.get(table_name), GROUP_KEY_COLUMNS.get(table_name))
+            if documents is not None:
+                sides[table_name] = documents
+                groups += self._search(bank, documents, table_name, 'one_to_many')
+        # מסמכים שנכנסו לקבוצה בשלב הראשון מסומנים כמנוצלים ולא נבדקים שוב
+        for table_name, documents in sides.items():
+            groups += self._search(documents, bank, table_name, 'many_to_one')
+
+        return pd.DataFrame(groups, columns=GROUP_COLUMNS)
+
+    def _side(self, df, key_column):
+        """מערכים של צד אחד בחיפוש, ממוינים לפי תאריך; used מסמן שורות שכבר נכנסו לקבוצה"""
+        if df is None or df.empty:
+            return None
+        ids = df['id'].to_numpy(dtype='int64')
+        cents = MatchEngine.to_cents(df['amount'])
+        days = MatchEngine.to_days(df['date'])
+        if key_column in df.columns:
+            keys = df[key_column].astype(object).where(df[key_column].notna(), '')
+            keys = pd.Series(keys).astype(str).str.strip().str.lower()
+        else:
+            keys = pd.Series('', index=df.index)
+        keys = pd.factorize(keys.to_numpy())[0]
+
+        order = np.lexsort((ids, days))
+        return {
+            'ids': ids[order],
+            'cents': cents[order],
+            'days': days[order],
+            'keys': keys[order],
+            'used': np.zeros(len(ids), dtype=bool)
+        }
+
+    def _search(self, single, many, table_name, match_type):
+        """לכל שורה ב-single שלא נוצלה - תת-קבוצה של שורות many שסכומה שווה לסכום השורה"""
+        tolerance = int(round(self.amount_tolerance * 100))
+        found = []
+
+        for position in np.argsort(single['ids'], kind='stable'):
+            if single['used'][position]:
+                continue
+            target, day = single['cents'][position], single['days'][position]
+
+            lo = np.searchsorted(many['days'], day - self.tolerance_days, side='left')
+            hi = np.searchsorted(many['days'], day + self.tolerance_days, side='right')
+            window = np.arange(lo, hi)
+            window = window[~many['used'][window] & (many['cents'][window] > 0)
+                            & (many['cents'][window] <= target + tolerance)]
+            if len(window) < 2 or many['cents'][window].sum() < target - tolerance:
+                continue
+
+            best = None
+            for pool in self._feasible_pools(many, window, target, tolerance):
+                # הקרובים ביותר בתאריך, עד max_candidates
+                pool = pool[np.lexsort((many['ids'][pool], np.abs(many['days'][pool] - day)))][:self.max_candidates]
+
+                self.stats['searched'] += 1
+                chosen = self.search.find(many['cents'][pool], target, tolerance)
+                self.stats['timed_out'] += self.search.timed_out
+                if chosen is None:
+                    continue
+                members = np.sort(pool[chosen])
+                score = self._group_score(target, many['cents'][members], day - many['days'][members], tolerance)
+                if score >= self.min_score and (best is None or score > best[0]):
+                    best = (score, members)
+
+            if best is None:
+                continue
+            score, members = best
+            single['used'][position] = True
+            many['used'][members] = True
+            self.stats['found'] += 1
+
+            single_ids, many_ids = [int(single['ids'][position])], [int(i) for i in many['ids'][members]]
+            total = int(many['cents'][members].sum())
+            found.append({
+                'match_type': match_type,
+                'matched_table': table_name,
+                'bank_transaction_ids': single_ids if match_type == 'one_to_many' else many_ids,
+                'matched_ids': many_ids if match_type == 'one_to_many' else single_ids,
+                'total_amount': total / 100.0,
+                'amount_delta': abs(int(target) - total) / 100.0,
+                'match_score': score
+            })
+
+        return found
+
+    def _feasible_pools(self, many, window, target, tolerance):
+        """השורות בחלון לפי משלם/אסמכתא, רק לקבוצות שיכולות להגיע ליעד: לפחות שתי שורות,
+        הגדולות ביותר (עד גודל הקבוצה המקסימלי) מגיעות ליעד ושתי הקטנות ביותר לא עוברות אותו"""
+        window = window[np.lexsort((many['cents'][window], many['keys'][window]))]
+        keys, cents = many['keys'][window], many['cents'][window]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(window)]
+        counts = ends - starts
+        cumulative = np.r_[0, np.cumsum(cents)]
+        largest = cumulative[ends] - cumulative[np.maximum(ends - self.search.max_size, starts)]
+        smallest_pair = cents[starts] + cents[np.minimum(starts + 1, len(cents) - 1)]
+
+        feasible = (counts >= 2) & (largest >= target - tolerance) & (smallest_pair <= target + tolerance)
+        for start, count in zip(starts[feasible], counts[feasible]):
+            yield window[start:start + count]
+
+    def _group_score(self, target, amounts, day_deltas, tolerance):
+        """ממוצע של ציון התאריך של הפריטים וציון ההפרש בסכום"""
+        date_score = np.mean(1.0 - np.abs(day_deltas) / float(max(self.tolerance_days, 1)))
+        delta = abs(int(target) - int(amounts.sum()))
+        amount_score = 1.0 - delta / tolerance if tolerance else 1.0
+        return float(0.5 * date_score + 0.5 * amount_score)
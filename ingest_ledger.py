@@ -0,0 +1,88 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+# שדות המפתח הטבעי של כל טבלה - שורה זהה בשני דפי חשבון חופפים תקבל אותו מפתח
+NATURAL_KEY_COLUMNS = {
+    'bank_transactions': ['date', 'amount', 'description'],
+    'checks': ['date', 'amount', 'check_number', 'payer_name'],
+    'bank_transfers': ['date', 'amount', 'reference_number', 'description'],
+    'invoices': ['date', 'amount', 'invoice_number'],
+    'receipts': ['date', 'amount', 'receipt_number']
+}
+
+
+class OccurrenceTracker:
+    """מונה הופעות של שורות זהות לאורך קובץ שנקלט במנות.
+    שומר מערך ממוין של hash לכל שורה ייחודית ומונה לידו - 12 בתים לשורה, בלי תלות ברוחב השורה"""
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.uint32)
+
+    def advance(self, row_hashes):
+        """מספר ההופעות הקודמות של כל שורה במנות הקודמות, ועדכון המונים במנה הנוכחית"""
+        unique, inverse, chunk_counts = np.unique(row_hashes, return_inverse=True, return_counts=True)
+        positions = np.searchsorted(self.hashes, unique)
+        found = positions < len(self.hashes)
+        found[found] = self.hashes[positions[found]] == unique[found]
+
+        previous = np.zeros(len(unique), dtype=np.int64)
+        previous[found] = self.counts[positions[found]]
+        self.counts[positions[found]] += chunk_counts[found].astype(np.uint32)
+
+        new = ~found
+        if new.any():
+            self.hashes = np.insert(self.hashes, positions[new], unique[new])
+            self.counts = np.insert(self.counts, positions[new], chunk_counts[new].astype(np.uint32))
+        return previous[inverse.ravel()]
+
+
+class IngestLedger:
+    """מעקב אחר קבצים שכבר נקלטו לפי hash של התוכן, בטבלת ingest_ledger"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def file_hash(file):
+        """hash של תוכן הקובץ (SHA-256) - זהה בכל הרצה מחדש של Streamlit"""
+        if hasattr(file, 'getvalue'):
+            content = file.getvalue()
+        else:
+            position = file.tell()
+            content = file.read()
+            file.seek(position)
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def add_natural_keys(df, table_name, occurrences=None):
+        """הוספת עמודת natural_key - hash של שדות המפתח ומספר ההופעה של שורה זהה בקובץ.
+        בקליטה במנות, occurrences (OccurrenceTracker) ממשיך את מספור ההופעות בין המנות"""
+        columns = [column for column in NATURAL_KEY_COLUMNS.get(table_name, []) if column in df.columns]
+        if not columns or df.empty:
+            return df
+
+        fields = df[columns].astype(str)
+        # שתי עסקאות זהות באותו יום הן שורות שונות - מספר ההופעה מבדיל ביניהן.
+        # הקיבוץ לפי hash של השורה, כך שגם שורות עם ערכים חסרים נספרות
+        row_hashes = pd.util.hash_pandas_object(fields, index=False)
+        occurrence = row_hashes.groupby(row_hashes, sort=False).cumcount()
+        if occurrences is not None:
+            occurrence += occurrences.advance(row_hashes.to_numpy())
+        hashes = pd.util.hash_pandas_object(fields.assign(occurrence=occurrence), index=False)
+        return df.assign(natural_key=hashes.map('{:016x}'.format))
+
+    def is_ingested(self, digest):
+        """האם קובץ עם התוכן הזה כבר נקלט בהצלחה"""
+        result = self.client.table('ingest_ledger').select('file_hash').eq('file_hash', digest).execute()
+        return bool(result.data)
+
+    def record(self, digest, file_name, table_name, row_count):
+        """רישום קובץ שנקלט בהצלחה"""
+        self.client.table('ingest_ledger').upsert({
+            'file_hash': digest,
+            'file_name': file_name,
+            'table_name': table_name,
+            'row_count': row_count
+        }, on_conflict='file_hash', ignore_duplicates=True).execute()
@@ -3,7 +3,9 @@ CREATE TABLE bank_transactions (
     id SERIAL PRIMARY KEY,
     date DATE NOT NULL,
     amount NUMERIC NOT NULL,
-    description TEXT
+    description TEXT,
+    natural_key VARCHAR(32) UNIQUE,
+    pending_match BOOLEAN NOT NULL DEFAULT true
 );
 
 -- טבלת שיקים
@@ -12,7 +14,9 @@ CREATE TABLE checks (
     check_number VARCHAR(50),
     date DATE NOT NULL,
     amount NUMERIC NOT NULL,
-    payer_name VARCHAR(255)
+    payer_name VARCHAR(255),
+    natural_key VARCHAR(32) UNIQUE,
+    pending_match BOOLEAN NOT NULL DEFAULT true
 );
 
 -- טבלת העברות בנקאיות
@@ -21,7 +25,9 @@ CREATE TABLE bank_transfers (
     date DATE NOT NULL,
     amount NUMERIC NOT NULL,
     description TEXT,
-    reference_number VARCHAR(255)
+    reference_number VARCHAR(255),
+    natural_key VARCHAR(32) UNIQUE,
+    pending_match BOOLEAN NOT NULL DEFAULT true
 );
 
 -- טבלת חשבוניות
@@ -30,7 +36,9 @@ CREATE TABLE invoices (
     amount NUMERIC NOT NULL,
     date DATE NOT NULL,
     invoice_number VARCHAR(50),
-    status VARCHAR(50)
+    status VARCHAR(50),
+    natural_key VARCHAR(32) UNIQUE,
+    pending_match BOOLEAN NOT NULL DEFAULT true
 );
 
 -- טבלת קבלות
@@ -39,7 +47,9 @@ CREATE TABLE receipts (
     amount NUMERIC NOT NULL,
     date DATE NOT NULL,
     receipt_number VARCHAR(50),
-    status VARCHAR(50)
+    status VARCHAR(50),
+    natural_key VARCHAR(32) UNIQUE,
+    pending_match BOOLEAN NOT NULL DEFAULT true
 );
 
 -- טבלת התאמות
@@ -48,6 +58,127 @@ CREATE TABLE transaction_matches (
     bank_transaction_id INT NOT NULL,
     matched_table VARCHAR(50),
     matched_id INT,
+    match_score FLOAT,
     match_date TIMESTAMP DEFAULT now(),
     FOREIGN KEY (bank_transaction_id) REFERENCES bank_transactions(id)
-); 
\ No newline at end of file
+);
+
+-- קבוצות התאמה לתשלומים מפוצלים: עסקת בנק אחת מול כמה מסמכים או כמה עסקאות מול מסמך אחד
+CREATE TABLE match_groups (
+    id SERIAL PRIMARY KEY,
+    match_type VARCHAR(20) NOT NULL,
+    matched_table VARCHAR(50) NOT NULL,
+    total_amount NUMERIC NOT NULL,
+    amount_delta NUMERIC NOT NULL DEFAULT 0,
+    match_score FLOAT,
+    match_date TIMESTAMP DEFAULT now()
+);
+
+-- חברי כל קבוצה - זוג (עסקת בנק, מסמך) לכל פריט; באחד הצדדים המזהה חוזר בכל השורות
+CREATE TABLE match_group_items (
+    group_id INT NOT NULL REFERENCES match_groups(id) ON DELETE CASCADE,
+    bank_transaction_id INT NOT NULL REFERENCES bank_transactions(id),
+    matched_id INT NOT NULL,
+    PRIMARY KEY (group_id, bank_transaction_id, matched_id)
+);
+
+-- יומן קליטת קבצים - hash של תוכן כל קובץ שנקלט בהצלחה
+CREATE TABLE ingest_ledger (
+    file_hash CHAR(64) PRIMARY KEY,
+    file_name TEXT,
+    table_name VARCHAR(50),
+    row_count INT,
+    ingested_at TIMESTAMP DEFAULT now()
+);
+
+-- מצב ההתאמות השמורות (שורה אחת): one_to_one - ההתאמות נשמרו כהשמה אחד-לאחד, והריצה המצטברת
+-- לא מצמידה מסמך שכבר מותאם לעסקה נוספת. ריצה מלאה (save_best_matches) מחזירה ל-false.
+-- views_stale - ריצה מצטברת שינתה התאמות מאז הרענון האחרון של ה-views הממומשים (refresh_stale_views)
+CREATE TABLE match_state (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    one_to_one BOOLEAN NOT NULL DEFAULT false,
+    updated_at TIMESTAMP DEFAULT now(),
+    views_stale BOOLEAN NOT NULL DEFAULT false,
+    views_refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+INSERT INTO match_state DEFAULT VALUES;
+
+-- אינדקסים להתאמות: צירוף על ABS(amount) וחלון תאריכים בכל טבלת מקור
+CREATE INDEX idx_bank_transactions_abs_amount_date ON bank_transactions ((ABS(amount)), date);
+CREATE INDEX idx_checks_abs_amount_date ON checks ((ABS(amount)), date);
+CREATE INDEX idx_bank_transfers_abs_amount_date ON bank_transfers ((ABS(amount)), date);
+CREATE INDEX idx_invoices_abs_amount_date ON invoices ((ABS(amount)), date);
+CREATE INDEX idx_receipts_abs_amount_date ON receipts ((ABS(amount)), date);
+
+-- שורות שטרם נסרקו בהתאמה (pending_match) - ההתאמה המצטברת מוצאת אותן בלי לסרוק את הטבלה
+CREATE INDEX idx_bank_transactions_pending ON bank_transactions (id) WHERE pending_match;
+CREATE INDEX idx_checks_pending ON checks (id) WHERE pending_match;
+CREATE INDEX idx_bank_transfers_pending ON bank_transfers (id) WHERE pending_match;
+CREATE INDEX idx_invoices_pending ON invoices (id) WHERE pending_match;
+CREATE INDEX idx_receipts_pending ON receipts (id) WHERE pending_match;
+
+-- אינדקס לטווחי תאריכים בדשבורד (get_monthly_match_stats)
+CREATE INDEX idx_bank_transactions_date ON bank_transactions (date);
+
+-- אינדקסים על טבלת ההתאמות לחיפוש לפי מסמך ולפי עסקת בנק
+CREATE INDEX idx_transaction_matches_matched ON transaction_matches (matched_table, matched_id);
+CREATE INDEX idx_transaction_matches_bank_transaction ON transaction_matches (bank_transaction_id);
+-- קריאה בעמודים לפי (match_date, id) - get_match_details_page
+CREATE INDEX idx_transaction_matches_match_date_id ON transaction_matches (match_date, id); 
+
+-- חיפוש קבוצה לפי עסקת בנק (עסקאות ללא התאמה)
+CREATE INDEX idx_match_group_items_bank_transaction ON match_group_items (bank_transaction_id);
+
+-- פרטי ההתאמות עם שדות המסמך המותאם - מחושבים פעם אחת בכל ריצת התאמה במקום ארבעה LEFT JOIN בכל קריאה.
+-- מתרענן ב-refresh_reconciliation_views() בסוף כל פונקציה שכותבת התאמות
+CREATE MATERIALIZED VIEW match_details_mv AS
+SELECT
+    tm.id AS match_id,
+    tm.bank_transaction_id,
+    bt.date AS bank_date,
+    bt.amount AS bank_amount,
+    bt.description AS bank_description,
+    tm.matched_table::TEXT AS matched_table,
+    tm.matched_id,
+    CASE
+        WHEN tm.matched_table = 'checks' THEN c.date
+        WHEN tm.matched_table = 'bank_transfers' THEN t.date
+        WHEN tm.matched_table = 'invoices' THEN i.date
+        WHEN tm.matched_table = 'receipts' THEN r.date
+    END AS matched_date,
+    CASE
+        WHEN tm.matched_table = 'checks' THEN c.amount
+        WHEN tm.matched_table = 'bank_transfers' THEN t.amount
+        WHEN tm.matched_table = 'invoices' THEN i.amount
+        WHEN tm.matched_table = 'receipts' THEN r.amount
+    END AS matched_amount,
+    (CASE
+        WHEN tm.matched_table = 'checks' THEN c.check_number
+        WHEN tm.matched_table = 'bank_transfers' THEN t.reference_number
+        WHEN tm.matched_table = 'invoices' THEN i.invoice_number
+        WHEN tm.matched_table = 'receipts' THEN r.receipt_number
+    END)::TEXT AS matched_reference,
+    tm.match_score,
+    tm.match_date
+FROM transaction_matches tm
+JOIN bank_transactions bt ON tm.bank_transaction_id = bt.id
+LEFT JOIN checks c ON tm.matched_table = 'checks' AND tm.matched_id = c.id
+LEFT JOIN bank_transfers t ON tm.matched_table = 'bank_transfers' AND tm.matched_id = t.id
+LEFT JOIN invoices i ON tm.matched_table = 'invoices' AND tm.matched_id = i.id
+LEFT JOIN receipts r ON tm.matched_table = 'receipts' AND tm.matched_id = r.id;
+
+-- עסקאות בנק שאין להן התאמה ואינן חלק מקבוצת התאמה (תשלום מפוצל)
+CREATE MATERIALIZED VIEW unmatched_bank_mv AS
+SELECT bt.id, bt.date, bt.amount, bt.description
+FROM bank_transactions bt
+WHERE NOT EXISTS (SELECT 1 FROM transaction_matches tm WHERE tm.bank_transaction_id = bt.id)
+  AND NOT EXISTS (SELECT 1 FROM match_group_items gi WHERE gi.bank_transaction_id = bt.id);
+
+-- אינדקס ייחודי בכל view - תנאי ל-REFRESH CONCURRENTLY, שלא חוסם קריאות של הדשבורד בזמן הרענון
+CREATE UNIQUE INDEX idx_match_details_mv_match_id ON match_details_mv (match_id);
+CREATE UNIQUE INDEX idx_unmatched_bank_mv_id ON unmatched_bank_mv (id);
+-- קריאה בעמודים לפי (match_date, match_id) ומסנני הדשבורד: טווח תאריכים וטבלת מקור
+CREATE INDEX idx_match_details_mv_match_date_id ON match_details_mv (match_date, match_id);
+CREATE INDEX idx_match_details_mv_bank_date ON match_details_mv (bank_date);
+CREATE INDEX idx_match_details_mv_matched_table_bank_date ON match_details_mv (matched_table, bank_date);
+CREATE INDEX idx_unmatched_bank_mv_date ON unmatched_bank_mv (date);
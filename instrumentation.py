@@ -0,0 +1,298 @@
+import functools
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+# קובץ JSON lines שאליו נכתב כל שלב עליון שהסתיים; ריק מבטל את הכתיבה
+METRICS_LOG = os.getenv("METRICS_LOG", "")
+# פרופיילר לשלבים עליונים: cprofile, pyinstrument או ריק
+PROFILER = os.getenv("PROFILER", "")
+# תיקיית קבצי הפרופיל (cProfile נשמר כ-.prof, pyinstrument כ-.txt)
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", Path.home() / ".cache" / "financial-matcher" / "profiles"))
+# פורט לנקודת /metrics בפורמט Prometheus; ריק לא מפעיל שרת
+METRICS_PORT = os.getenv("METRICS_PORT", "")
+# מספר השלבים האחרונים שנשמרים לתצוגה
+RECENT_SPANS = 50
+# מספר השלבים הפנימיים שנשמרים בכל שלב (למשל קריאת RPC לכל עמוד) - השאר נספרים בלבד
+MAX_CHILDREN = 100
+# מספר השורות מהפרופיל שנשמרות ברשומת השלב
+PROFILE_LINES = 25
+METRIC_PREFIX = 'financial_matcher'
+
+
+class Span:
+    """שלב אחד: שם, תוויות, משך, מונים ושלבים פנימיים"""
+
+    def __init__(self, name, labels, parent=None):
+        self.name = name
+        self.labels = labels
+        self.parent = parent
+        self.children = []
+        self.counters = {}
+        self.started_at = datetime.now(timezone.utc)
+        self.seconds = None
+        self.error = None
+        self.profile = None
+
+    def count(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def to_dict(self):
+        record = {
+            'name': self.name,
+            'labels': self.labels,
+            'started_at': self.started_at.isoformat(timespec='milliseconds'),
+            'seconds': self.seconds,
+            'counters': self.counters
+        }
+        if self.error:
+            record['error'] = self.error
+        if self.profile:
+            record['profile'] = self.profile
+        if self.children:
+            record['children'] = [child.to_dict() for child in self.children]
+        return record
+
+
+class _Profile:
+    """פרופיל של שלב עליון אחד - cProfile או pyinstrument"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        if kind == 'cprofile':
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif kind == 'pyinstrument':
+            from pyinstrument import Profiler
+            self.profiler = Profiler()
+            self.profiler.start()
+        else:
+            raise ValueError(f"פרופיילר לא מוכר: {kind}")
+
+    def stop(self, span):
+        """עצירה, שמירת הפרופיל המלא לקובץ והחזרת התקציר"""
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stem = PROFILE_DIR / f"{span.name}-{span.started_at.strftime('%Y%m%dT%H%M%S%f')}"
+        if self.kind == 'cprofile':
+            import pstats
+            self.profiler.disable()
+            path = stem.with_suffix('.prof')
+            self.profiler.dump_stats(path)
+            text = io.StringIO()
+            pstats.Stats(self.profiler, stream=text).sort_stats('cumulative').print_stats(PROFILE_LINES)
+            summary = text.getvalue()
+        else:
+            self.profiler.stop()
+            path = stem.with_suffix('.txt')
+            summary = self.profiler.output_text()
+            path.write_text(summary, encoding='utf-8')
+        return {'kind': self.kind, 'path': str(path), 'summary': '\n'.join(summary.splitlines()[:PROFILE_LINES * 2])}
+
+
+class Recorder:
+    """שלבים מקוננים עם זמנים ומונים, סיכומים מצטברים לכל שלב, יומן JSON ויצוא Prometheus.
+
+    השלב הפעיל נשמר לכל thread בנפרד; count() מחוץ לשלב נספר רק בסיכום הכללי
+    """
+
+    def __init__(self, log_path=METRICS_LOG, profiler=PROFILER, clock=time.perf_counter):
+        self.log_path = Path(log_path) if log_path else None
+        self.profiler = profiler or None
+        self.clock = clock
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=RECENT_SPANS)
+        # (שלב, תוויות) -> {'calls', 'errors', 'seconds', מונים...}
+        self.totals = {}
+
+    def current(self):
+        stack = getattr(self.local, 'stack', None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name, /, **labels):
+        """שלב עם מדידת זמן; מחזיר את ה-Span לצורך count()"""
+        stack = self.local.__dict__.setdefault('stack', [])
+        parent = stack[-1] if stack else None
+        current = Span(name, {key: str(value) for key, value in labels.items()}, parent)
+        if parent is not None:
+            if len(parent.children) < MAX_CHILDREN:
+                parent.children.append(current)
+            else:
+                parent.count('children_dropped')
+        profile = _Profile(self.profiler) if self.profiler and parent is None else None
+
+        stack.append(current)
+        started = self.clock()
+        try:
+            yield current
+        except Exception as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.seconds = self.clock() - started
+            stack.pop()
+            if profile is not None:
+                current.profile = profile.stop(current)
+            self._finish(current)
+
+    def timed(self, name=None, /, **labels):
+        """דקורטור: כל קריאה לפונקציה היא שלב"""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name or function.__qualname__, **labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, counter, value=1):
+        """הוספה למונה של השלב הפעיל"""
+        current = self.current()
+        if current is not None:
+            current.count(counter, value)
+        else:
+            with self.lock:
+                totals = self.totals.setdefault(('', ()), {'calls': 0, 'errors': 0, 'seconds': 0.0})
+                totals[counter] = totals.get(counter, 0) + value
+
+    def _finish(self, span):
+        key = (span.name, tuple(sorted(span.labels.items())))
+        with self.lock:
+            totals = self.totals.setdefault(key, {'calls': 0, 'errors': 0, 'seconds': 0.0})
+            totals['calls'] += 1
+            totals['errors'] += span.error is not None
+            totals['seconds'] += span.seconds
+            for counter, value in span.counters.items():
+                totals[counter] = totals.get(counter, 0) + value
+            if span.parent is None:
+                self.recent.append(span)
+
+        if span.parent is None and self.log_path is not None:
+            with self.lock, open(self.log_path, 'a', encoding='utf-8') as log:
+                log.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n')
+
+    def recent_spans(self):
+        """השלבים העליונים האחרונים, מהחדש לישן"""
+        with self.lock:
+            return list(reversed(self.recent))
+
+    def summary(self):
+        """שורה לכל (שלב, תוויות) עם מספר קריאות, זמן כולל וממוצע ומונים"""
+        with self.lock:
+            rows = []
+            for (name, labels), totals in self.totals.items():
+                if not name:
+                    continue
+                row = {'stage': name, **dict(labels), **totals}
+                row['mean_seconds'] = totals['seconds'] / totals['calls'] if totals['calls'] else 0.0
+                rows.append(row)
+            return rows
+
+    def prometheus_text(self):
+        """כל הסיכומים בפורמט הטקסט של Prometheus"""
+        with self.lock:
+            items = sorted(self.totals.items())
+        metrics = {}
+        for (name, labels), totals in items:
+            label_text = ','.join(
+                f'{key}="{_escape(value)}"' for key, value in ((('stage', name),) if name else ()) + labels
+            )
+            for counter, value in totals.items():
+                metric = {
+                    'calls': f'{METRIC_PREFIX}_stage_calls_total',
+                    'errors': f'{METRIC_PREFIX}_stage_errors_total',
+                    'seconds': f'{METRIC_PREFIX}_stage_seconds_total'
+                }.get(counter, f'{METRIC_PREFIX}_{counter}_total')
+                metrics.setdefault(metric, []).append(f'{metric}{{{label_text}}} {value}')
+
+        lines = []
+        for metric, samples in metrics.items():
+            lines.append(f'# TYPE {metric} counter')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.totals = {}
+            self.recent.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# מתעד אחד לתהליך, כמו query_cache
+recorder = Recorder()
+span = recorder.span
+timed = recorder.timed
+count = recorder.count
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port=None, source=None):
+    """שרת /metrics ב-thread רקע - מופעל פעם אחת לתהליך, גם כש-Streamlit מריץ את הסקריפט מחדש"""
+    global _server
+    port = int(port or METRICS_PORT or 0)
+    if not port:
+        return None
+    source = source or recorder
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = source.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def show_timing_panel():
+    """לוח זמנים מתקפל: השלבים האחרונים עם המונים, סיכום לכל שלב ובחירת פרופיילר"""
+    import pandas as pd
+    import streamlit as st
+
+    with st.expander("זמני ריצה", expanded=False):
+        choice = st.selectbox("פרופיילר", ['', 'cprofile', 'pyinstrument'], index=['', 'cprofile', 'pyinstrument']
+                              .index(recorder.profiler or ''), format_func=lambda kind: kind or 'כבוי')
+        recorder.profiler = choice or None
+
+        recent = recorder.recent_spans()
+        if not recent:
+            st.caption("עדיין לא נמדדו שלבים")
+            return
+        for item in recent[:10]:
+            st.markdown(f"**{item.name}** {' '.join(item.labels.values())} - {item.seconds:.3f} שניות"
+                        + (f" (שגיאה: {item.error})" if item.error else ""))
+            rows = [{'שלב': item.name, 'שניות': item.seconds, **item.counters}]
+            rows += [{'שלב': f"↳ {child.name} {' '.join(child.labels.values())}", 'שניות': child.seconds,
+                      **child.counters} for child in item.children]
+            st.dataframe(pd.DataFrame(rows), hide_index=True)
+            if item.profile:
+                st.code(item.profile['summary'])
+                st.caption(item.profile['path'])
+        st.subheader("סיכום לפי שלב")
+        st.dataframe(pd.DataFrame(recorder.summary()), hide_index=True)
@@ -1,91 +1,182 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from supabase import create_client
-import os
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from data_access import DataAccess, show_cache_stats
+from instrumentation import serve_metrics, show_timing_panel, timed
+from transaction_store import amounts_to_cents, dates_to_days, monthly_totals
+from datetime import datetime
 import calendar
 import numpy as np
 
 # טעינת הגדרות סביבה
 load_dotenv()
 
+# עמודות התוצאה של get_monthly_match_stats
+MONTHLY_STATS_COLUMNS = [
+    'year', 'month', 'total_transactions', 'matched_transactions', 'total_amount', 'matched_amount'
+]
+# חלון ברירת המחדל של הדשבורד בחודשים
+DASHBOARD_MONTHS = 12
+
 class IntegratedDashboard:
     def __init__(self):
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        
-        if not supabase_url or not supabase_key:
-            raise ValueError("נא להגדיר את פרטי ההתחברות ל-Supabase בקובץ .env")
-            
-        self.client = create_client(supabase_url, supabase_key)
+        self.data = DataAccess()
+        self.client = self.data.client
     
+    @timed()
     def get_financial_data(self):
-        """קבלת כל הנתונים הפיננסיים"""
+        """קבלת כל הנתונים הפיננסיים - קריאה בעמודים, בלי להיחתך במגבלת השורות של PostgREST"""
         try:
+            reader = self.data.reader()
+            
             # נתוני עו"ש
-            bank_data = self.client.table('bank_transactions').select('*').execute()
-            bank_df = pd.DataFrame(bank_data.data)
+            bank_df = reader.bank_transactions().to_frame()
             
             # נתוני התאמות
-            matches_data = self.client.rpc('get_match_details').execute()
-            matches_df = pd.DataFrame(matches_data.data)
+            matches_df = reader.match_details().to_frame()
             
             return bank_df, matches_df
         except Exception as e:
             st.error(f"שגיאה בטעינת נתונים: {str(e)}")
             return pd.DataFrame(), pd.DataFrame()
     
-    def calculate_monthly_stats(self, bank_df, matches_df):
-        """חישוב סטטיסטיקות חודשיות"""
+    @timed()
+    def get_monthly_stats(self, from_date=None, to_date=None):
+        """סטטיסטיקות חודשיות מחושבות בשרת; אם הפונקציה נכשלת - אזהרה וחישוב מקומי בעמודים"""
         try:
-            # המרת תאריכים
-            bank_df['date'] = pd.to_datetime(bank_df['date'])
-            matches_df['bank_date'] = pd.to_datetime(matches_df['bank_date'])
-            
-            # הוספת עמודות חודש ושנה
-            bank_df['month'] = bank_df['date'].dt.month
-            bank_df['year'] = bank_df['date'].dt.year
-            matches_df['month'] = matches_df['bank_date'].dt.month
-            matches_df['year'] = matches_df['bank_date'].dt.year
-            
-            # חישוב סטטיסטיקות לפי חודש
-            monthly_stats = []
-            
-            for year in bank_df['year'].unique():
-                for month in range(1, 13):
-                    month_bank = bank_df[(bank_df['year'] == year) & (bank_df['month'] == month)]
-                    month_matches = matches_df[(matches_df['year'] == year) & (matches_df['month'] == month)]
-                    
-                    if not month_bank.empty:
-                        total_transactions = len(month_bank)
-                        matched_transactions = len(month_matches)
-                        match_rate = (matched_transactions / total_transactions * 100) if total_transactions > 0 else 0
-                        
-                        total_amount = month_bank['amount'].sum()
-                        matched_amount = month_matches['bank_amount'].sum() if not month_matches.empty else 0
-                        
-                        monthly_stats.append({
-                            'year': year,
-                            'month': month,
-                            'month_name': calendar.month_name[month],
-                            'total_transactions': total_transactions,
-                            'matched_transactions': matched_transactions,
-                            'match_rate': match_rate,
-                            'total_amount': total_amount,
-                            'matched_amount': matched_amount,
-                            'unmatched_amount': total_amount - matched_amount
-                        })
-            
-            return pd.DataFrame(monthly_stats)
+            params = {
+                'from_date': from_date.isoformat() if from_date else None,
+                'to_date': to_date.isoformat() if to_date else None
+            }
+            stats_data = self.data.rpc('get_monthly_match_stats', params)
+            return self._finish_monthly_stats(pd.DataFrame(stats_data, columns=MONTHLY_STATS_COLUMNS))
+        except Exception as e:
+            st.warning(f"הסטטיסטיקות החודשיות מחושבות מקומית - get_monthly_match_stats נכשלה: {str(e)}")
+            return self.stream_monthly_stats(from_date, to_date)
+
+    @timed()
+    def get_match_type_counts(self):
+        """מספר ההתאמות לפי טבלת מקור, מתוך get_match_statistics בשרת"""
+        try:
+            stats_data = self.data.rpc('get_match_statistics')
+            row = stats_data[0] if stats_data else {}
+            return pd.Series(row.get('matches_by_type') or {}, dtype=int)
+        except Exception as e:
+            st.error(f"שגיאה בטעינת סוגי התאמות: {str(e)}")
+            return pd.Series(dtype=int)
+
+    def calculate_monthly_stats(self, bank_df, matches_df, from_date=None, to_date=None):
+        """חישוב סטטיסטיקות חודשיות מקומי - groupby אחד לכל טבלה במקום סינון לכל חודש"""
+        try:
+            if bank_df.empty:
+                return pd.DataFrame()
+
+            bank_totals = self._monthly_totals(
+                bank_df['date'], bank_df['amount'], 'total_transactions', 'total_amount', from_date, to_date
+            )
+            match_totals = None
+            if not matches_df.empty:
+                match_totals = self._monthly_totals(
+                    matches_df['bank_date'], matches_df['bank_amount'],
+                    'matched_transactions', 'matched_amount', from_date, to_date
+                )
+            return self._combine_monthly_totals(bank_totals, match_totals)
         except Exception as e:
             st.error(f"שגיאה בחישוב סטטיסטיקות חודשיות: {str(e)}")
             return pd.DataFrame()
+
+    @timed()
+    def stream_monthly_stats(self, from_date=None, to_date=None):
+        """אותו חישוב כמו get_monthly_match_stats, עמוד אחר עמוד מאותן טבלאות (ולא מה-views הממומשים).
+        טווח התאריכים מסונן בשרת; בזיכרון נשמרים רק מזהי העסקאות המותאמות וסיכומים חודשיים"""
+        try:
+            reader = self.data.reader()
+            matched_chunks = [chunk['bank_transaction_id'].to_numpy()
+                              for chunk in reader.table('transaction_matches', 'bank_transaction_id')]
+            matched_ids = np.concatenate(matched_chunks) if matched_chunks else np.array([], dtype='int64')
+
+            bank_totals, match_totals = [], []
+            for chunk in reader.bank_transactions('id,date,amount', from_date, to_date):
+                bank_totals.append(self._monthly_totals(chunk['date'], chunk['amount'],
+                                                        'total_transactions', 'total_amount'))
+                matched = chunk[np.isin(chunk['id'].to_numpy(), matched_ids)]
+                match_totals.append(self._monthly_totals(matched['date'], matched['amount'],
+                                                         'matched_transactions', 'matched_amount'))
+            if not bank_totals:
+                return pd.DataFrame()
+
+            return self._combine_monthly_totals(
+                pd.concat(bank_totals).groupby(level=0).sum(),
+                pd.concat(match_totals).groupby(level=0).sum()
+            )
+        except Exception as e:
+            st.error(f"שגיאה בחישוב סטטיסטיקות חודשיות: {str(e)}")
+            return pd.DataFrame()
+
+    @staticmethod
+    def _monthly_totals(dates, amounts, count_column, amount_column, from_date=None, to_date=None):
+        """מספר שורות וסכום לכל חודש, אחרי סינון לטווח התאריכים.
+        הסכומים מסוכמים באגורות (int64), כך שסכום חודשי לא צובר שגיאות עיגול"""
+        days = dates_to_days(dates)
+        cents = amounts_to_cents(amounts)
+        in_range = np.ones(len(days), dtype=bool)
+        if from_date:
+            in_range &= days >= dates_to_days([from_date])[0]
+        if to_date:
+            in_range &= days <= dates_to_days([to_date])[0]
+
+        totals = monthly_totals(days[in_range], cents[in_range])
+        totals.index.name = 'period'
+        return pd.DataFrame({
+            count_column: totals['count'],
+            amount_column: totals['amount_cents'] / 100
+        })
+
+    def _combine_monthly_totals(self, bank_totals, match_totals):
+        if match_totals is not None:
+            # רק חודשים שיש בהם עסקאות בנק, כמו בשאילתה בשרת
+            stats = bank_totals.join(match_totals, how='left')
+        else:
+            stats = bank_totals.assign(matched_transactions=0, matched_amount=0.0)
+
+        stats = stats.fillna({'matched_transactions': 0, 'matched_amount': 0.0})
+        stats['year'] = stats.index.year
+        stats['month'] = stats.index.month
+        return self._finish_monthly_stats(stats.reset_index(drop=True)[MONTHLY_STATS_COLUMNS])
+
+    @staticmethod
+    def _finish_monthly_stats(stats):
+        """עמודות נגזרות משותפות לתוצאת השרת ולחישוב המקומי"""
+        if stats.empty:
+            return pd.DataFrame()
+
+        stats = stats.astype({
+            'year': int,
+            'month': int,
+            'total_transactions': int,
+            'matched_transactions': int,
+            'total_amount': float,
+            'matched_amount': float
+        }).sort_values(['year', 'month'], ignore_index=True)
+        stats['month_name'] = [calendar.month_name[month] for month in stats['month']]
+        stats['match_rate'] = stats['matched_transactions'] / stats['total_transactions'] * 100
+        stats['unmatched_amount'] = stats['total_amount'] - stats['matched_amount']
+        return stats[[
+            'year', 'month', 'month_name', 'total_transactions', 'matched_transactions',
+            'match_rate', 'total_amount', 'matched_amount', 'unmatched_amount'
+        ]]
+
+    @staticmethod
+    def current_month_stats(monthly_stats):
+        """השורה של החודש הנוכחי, או החודש האחרון שיש בו נתונים"""
+        now = datetime.now()
+        current = monthly_stats[(monthly_stats['year'] == now.year) & (monthly_stats['month'] == now.month)]
+        return current.iloc[0] if not current.empty else monthly_stats.iloc[-1]
     
     def create_trend_chart(self, monthly_stats):
         """יצירת תרשים מגמות"""
+        import plotly.graph_objects as go
+
         fig = go.Figure()
         
         # הוספת קו מגמה לאחוז ההתאמות
@@ -124,8 +215,9 @@ class IntegratedDashboard:
     
     def create_completion_gauge(self, monthly_stats):
         """יצירת מד השלמת התאמות"""
-        current_month = datetime.now().month
-        current_stats = monthly_stats[monthly_stats['month'] == current_month].iloc[0]
+        import plotly.graph_objects as go
+
+        current_stats = self.current_month_stats(monthly_stats)
         
         fig = go.Figure(go.Indicator(
             mode = "gauge+number+delta",
@@ -154,25 +246,21 @@ class IntegratedDashboard:
 def main():
     st.set_page_config(page_title="דשבורד פיננסי משולב", layout="wide")
     st.title("דשבורד פיננסי משולב")
+    serve_metrics()
     
     try:
         dashboard = IntegratedDashboard()
         
-        # טעינת נתונים
-        bank_df, matches_df = dashboard.get_financial_data()
-        if bank_df.empty or matches_df.empty:
-            st.error("לא נמצאו נתונים להצגה")
-            return
-            
-        # חישוב סטטיסטיקות חודשיות
-        monthly_stats = dashboard.calculate_monthly_stats(bank_df, matches_df)
+        # סטטיסטיקות חודשיות לחלון האחרון - שורה לכל חודש, ללא משיכת הטבלאות המלאות
+        today = datetime.now().date()
+        from_date = (pd.Timestamp(today) - pd.DateOffset(months=DASHBOARD_MONTHS - 1)).replace(day=1).date()
+        monthly_stats = dashboard.get_monthly_stats(from_date, today)
         if monthly_stats.empty:
-            st.error("לא ניתן לחשב סטטיסטיקות")
+            st.error("לא נמצאו נתונים להצגה")
             return
         
         # הצגת מדדים עיקריים לחודש הנוכחי
-        current_month = datetime.now().month
-        current_stats = monthly_stats[monthly_stats['month'] == current_month].iloc[0]
+        current_stats = dashboard.current_month_stats(monthly_stats)
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -192,7 +280,9 @@ def main():
         
         with col2:
             # תרשים התפלגות סוגי התאמות
-            match_types = matches_df['matched_table'].value_counts()
+            import plotly.express as px
+
+            match_types = dashboard.get_match_type_counts()
             fig = px.pie(values=match_types.values, names=match_types.index, 
                         title='התפלגות סוגי התאמות')
             st.plotly_chart(fig, use_container_width=True)
@@ -209,6 +299,9 @@ def main():
             'unmatched_amount': '₪{:,.2f}'
         }))
         
+        show_cache_stats()
+        show_timing_panel()
+        
     except Exception as e:
         st.error(f"שגיאה בטעינת הדשבורד: {str(e)}")
 
@@ -0,0 +1,129 @@
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from notifier import logger
+
+# מספר העבודות שרצות במקביל
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# מספר העבודות שממתינות בתור - מעבר לזה submit נדחה במקום לצבור זיכרון
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+# מספר העבודות שהסתיימו ונשמרות לשאילת סטטוס ותוצאה
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "100"))
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class Job:
+    """עבודה אחת בתור: queued, running, done או failed"""
+
+    def __init__(self, function, description):
+        self.id = uuid.uuid4().hex
+        self.function = function
+        self.description = description
+        self.status = 'queued'
+        self.submitted_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            **self.description,
+            'submitted_at': self.submitted_at.isoformat(timespec='seconds'),
+            'started_at': self.started_at and self.started_at.isoformat(timespec='seconds'),
+            'finished_at': self.finished_at and self.finished_at.isoformat(timespec='seconds'),
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """תור עבודות חסום עם מספר קבוע של threads עובדים.
+    submit לא חוסם: כשהתור מלא נזרק queue.Full. מעבר ל-history עבודות שהסתיימו, הישנות נמחקות"""
+
+    def __init__(self, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE, history=JOB_HISTORY):
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.history = history
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, function, **description):
+        """הוספת עבודה לתור; description (למשל שמות הקבצים) מוצג בסטטוס"""
+        job = Job(function, description)
+        with self.lock:
+            self.jobs[job.id] = job
+        try:
+            self.pending.put_nowait(job)
+        except queue.Full:
+            with self.lock:
+                del self.jobs[job.id]
+            raise
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def stats(self):
+        with self.lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {
+            'workers': len(self.threads),
+            'capacity': self.pending.maxsize,
+            **{status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed')}
+        }
+
+    def join(self):
+        """המתנה עד שכל העבודות שבתור הסתיימו"""
+        self.pending.join()
+
+    def shutdown(self):
+        for _ in self.threads:
+            self.pending.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            job = self.pending.get()
+            if job is None:
+                self.pending.task_done()
+                return
+            job.status = 'running'
+            job.started_at = _now()
+            try:
+                job.result = job.function()
+                job.status = 'done'
+            except Exception as e:
+                logger.exception("עבודה %s נכשלה", job.id)
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = 'failed'
+            finally:
+                # שחרור הקבצים שהועלו - נשארים רק הסטטוס והתוצאה
+                job.function = None
+                job.finished_at = _now()
+                self._trim()
+                self.pending.task_done()
+
+    def _trim(self):
+        with self.lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+            for job_id in finished[:max(len(finished) - self.history, 0)]:
+                del self.jobs[job_id]
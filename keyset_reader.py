@@ -0,0 +1,122 @@
+import json
+import time
+
+import pandas as pd
+
+from instrumentation import count
+
+
+class ReadReport:
+    """סיכום קריאה זורמת: כמה עמודים, שורות ובתים (גודל ה-JSON) התקבלו"""
+
+    def __init__(self, source):
+        self.source = source
+        self.pages_fetched = 0
+        self.rows_fetched = 0
+        self.bytes_fetched = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows_fetched / self.elapsed if self.elapsed else 0.0
+
+
+class ReadStream:
+    """זרם עמודים מבסיס הנתונים - כל מעבר עליו מתחיל מההתחלה ומאפס את הדוח"""
+
+    def __init__(self, source, fetch_page, next_cursor):
+        self.source = source
+        self.fetch_page = fetch_page
+        self.next_cursor = next_cursor
+        self.report = ReadReport(source)
+
+    def __iter__(self):
+        """DataFrame לכל עמוד; הסריקה נעצרת רק בעמוד ריק, כך שמגבלת max-rows בשרת לא קוטעת אותה"""
+        self.report = ReadReport(self.source)
+        cursor = None
+        while True:
+            started = time.perf_counter()
+            rows = self.fetch_page(cursor)
+            self.report.elapsed += time.perf_counter() - started
+            if not rows:
+                return
+
+            page_bytes = len(json.dumps(rows, default=str).encode('utf-8'))
+            self.report.pages_fetched += 1
+            self.report.rows_fetched += len(rows)
+            self.report.bytes_fetched += page_bytes
+            count('pages_fetched')
+            count('rows_fetched', len(rows))
+            count('bytes_fetched', page_bytes)
+            cursor = self.next_cursor(rows[-1])
+            yield pd.DataFrame(rows)
+
+    def page(self, cursor=None):
+        """עמוד אחד אחרי cursor (None - מההתחלה) וה-cursor של העמוד הבא, לדפדוף מבחוץ.
+        עמוד ריק מסמן את הסוף; עמוד קצר מ-page_size לא, בגלל מגבלת max-rows בשרת"""
+        rows = self.fetch_page(cursor)
+        return rows, self.next_cursor(rows[-1]) if rows else None
+
+    def record_batches(self):
+        """אותם עמודים כ-pyarrow.RecordBatch"""
+        import pyarrow as pa
+
+        for chunk in self:
+            yield pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+
+    def to_frame(self):
+        """כל העמודים כ-DataFrame אחד - רק כשהנתונים צריכים להיות בזיכרון בבת אחת"""
+        chunks = list(self)
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+class KeysetReader:
+    """קריאה בעמודים לפי מפתח (keyset) במקום offset - כל עמוד הוא חיפוש באינדקס"""
+
+    def __init__(self, client, page_size=1000):
+        self.client = client
+        self.page_size = page_size
+
+    def table(self, table_name, columns='*', from_date=None, to_date=None):
+        """שורות הטבלה לפי סדר id; העמודה id נוספת לבחירה אם חסרה.
+        from_date ו-to_date מסננים בשרת לפי עמודת date - שורות מחוץ לטווח לא נשלחות"""
+        if columns != '*' and 'id' not in [column.strip() for column in columns.split(',')]:
+            columns = f"id,{columns}"
+
+        def fetch_page(last_id):
+            query = self.client.table(table_name).select(columns)
+            if from_date is not None:
+                query = query.gte('date', str(from_date))
+            if to_date is not None:
+                query = query.lte('date', str(to_date))
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            return query.order('id').limit(self.page_size).execute().data
+
+        return ReadStream(table_name, fetch_page, lambda row: row['id'])
+
+    def bank_transactions(self, columns='*', from_date=None, to_date=None):
+        return self.table('bank_transactions', columns, from_date, to_date)
+
+    def unmatched_bank(self, columns='*'):
+        """עסקאות הבנק ללא התאמה, מתוך unmatched_bank_mv"""
+        return self.table('unmatched_bank_mv', columns)
+
+    def match_details(self, from_date=None, to_date=None, matched_table=None):
+        """פרטי ההתאמות מהחדשה לישנה, בעמודים לפי (match_date, id).
+        המסננים (טווח תאריכי עסקת הבנק, טבלת מקור) מוחלים בשרת על match_details_mv"""
+        filters = {
+            key: str(value) for key, value in
+            (('from_date', from_date), ('to_date', to_date), ('table_filter', matched_table)) if value is not None
+        }
+
+        def fetch_page(cursor):
+            after_match_date, after_id = cursor or (None, None)
+            return self.client.rpc('get_match_details_page', {
+                'after_match_date': after_match_date,
+                'after_id': after_id,
+                'page_size': self.page_size,
+                **filters
+            }).execute().data
+
+        return ReadStream('get_match_details', fetch_page, lambda row: (row['match_date'], row['match_id']))
@@ -0,0 +1,494 @@
+import re
+from itertools import chain
+
+import pandas as pd
+import numpy as np
+
+from assignment import SparseAssignment
+from transaction_store import TransactionStore
+
+# טבלאות המקור להתאמה ועמודת האסמכתא של כל אחת - לפי הסדר ב-match_transactions
+SOURCE_TABLES = {
+    'checks': 'check_number',
+    'bank_transfers': 'reference_number',
+    'invoices': 'invoice_number',
+    'receipts': 'receipt_number'
+}
+
+# היסט ימים כך שמפתח (סנטים, יום) יהיה חיובי ומונוטוני
+_DAY_OFFSET = 1 << 20
+_DAY_SPAN = 1 << 21
+
+# עמודת התיאור של כל טבלת מקור, להשוואה לתיאור עסקת הבנק
+DESCRIPTION_COLUMNS = {
+    'checks': 'payer_name',
+    'bank_transfers': 'description'
+}
+
+# משקלות ברירת המחדל של רכיבי הציון במצב הסובלני; התאמה מדויקת באותו יום בלי טקסט מקבלת 0.8
+DEFAULT_WEIGHTS = {
+    'date': 0.4,
+    'amount': 0.4,
+    'reference': 0.15,
+    'description': 0.05
+}
+
+# רכיבי הציון שמוחזרים לכל מועמד במצב הסובלני
+SCORE_COLUMNS = ['amount_delta', 'date_score', 'amount_score', 'reference_score', 'description_score']
+
+# אגורות נשמרות ב-40 ביט במפתח המשולב (יום, אגורות)
+_CENT_SPAN = 1 << 40
+# מספר עסקאות הבנק בכל מנה של חיפוש הרצועה - מגביל את הזיכרון של הזוגות הזמניים
+_BANK_BLOCK = 1 << 16
+_NON_ALNUM = re.compile(r'[^0-9a-zא-ת]+')
+_TOKEN = re.compile(r'[0-9a-zא-ת]+')
+
+
+class MatchEngine:
+    """מנוע התאמות בזיכרון - מקביל לפונקציות match_transactions ו-save_best_matches"""
+
+    def __init__(self, tolerance_days=3, min_score=0.7):
+        self.tolerance_days = tolerance_days
+        self.min_score = min_score
+        self.assignment = SparseAssignment()
+
+    @staticmethod
+    def to_cents(amounts):
+        """המרת סכומים לערך מוחלט באגורות (int64)"""
+        values = pd.to_numeric(pd.Series(amounts), errors='coerce').to_numpy(dtype='float64')
+        return np.rint(np.abs(values) * 100).astype('int64')
+
+    @staticmethod
+    def to_days(dates):
+        """המרת תאריכים למספר ימים מאז 1970-01-01 (int64)"""
+        values = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+        return values.astype('int64')
+
+    @classmethod
+    def columns(cls, df):
+        """(מזהים, סכום מוחלט באגורות, ימים) - מ-TransactionStore בלי המרה, או מ-DataFrame"""
+        if isinstance(df, TransactionStore):
+            return df.ids, np.abs(df.cents), df.days.astype('int64')
+        return df['id'].to_numpy(dtype='int64'), cls.to_cents(df['amount']), cls.to_days(df['date'])
+
+    @classmethod
+    def _keys(cls, df):
+        """מזהים ומפתח מיון משולב (סכום מוחלט באגורות, תאריך)"""
+        ids, cents, days = cls.columns(df)
+        return ids, cents, days, cls.sort_key(cents, days)
+
+    @staticmethod
+    def sort_key(cents, days):
+        """מפתח מיון משולב (סכום באגורות, תאריך) - כל דלי סכום רציף וממוין לפי תאריך"""
+        return cents * _DAY_SPAN + (days + _DAY_OFFSET)
+
+    def _window_join(self, bank, documents):
+        """צירוף חלון תאריכים בתוך כל דלי סכום - מחזיר זוגות אינדקסים (בנק, מסמך)"""
+        _, bank_cents, bank_days, _ = bank
+        _, _, _, doc_keys = documents
+
+        order = np.argsort(doc_keys, kind='stable')
+        sorted_keys = doc_keys[order]
+
+        # כל דלי סכום הוא טווח רציף במערך הממוין, ובתוכו התאריכים ממוינים
+        base = bank_cents * _DAY_SPAN + _DAY_OFFSET
+        lo = np.searchsorted(sorted_keys, base + bank_days - self.tolerance_days, side='left')
+        hi = np.searchsorted(sorted_keys, base + bank_days + self.tolerance_days, side='right')
+
+        counts = hi - lo
+        total = int(counts.sum())
+        bank_index = np.repeat(np.arange(len(counts)), counts)
+        starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        doc_index = order[starts + np.arange(total)]
+        return bank_index, doc_index
+
+    def _score(self, day_delta):
+        """ציון לפי מרחק התאריכים - כמו ב-match_transactions"""
+        delta = np.abs(day_delta)
+        return np.where(delta == 0, 1.0, 1.0 - delta / float(max(self.tolerance_days, 1)))
+
+    def match_transactions(self, bank_df, sources):
+        """כל ההתאמות האפשריות עם ציון - מקביל ל-match_transactions()
+
+        sources הוא מילון של שם טבלה -> DataFrame עם העמודות id, date, amount
+        """
+        bank = self._keys(bank_df)
+        frames = []
+
+        for table_name in SOURCE_TABLES:
+            source_df = sources.get(table_name)
+            if source_df is None or source_df.empty or bank_df.empty:
+                continue
+
+            documents = self._keys(source_df)
+            bank_index, doc_index = self._window_join(bank, documents)
+            frames.append(pd.DataFrame({
+                'bank_transaction_id': bank[0][bank_index],
+                'matched_table': table_name,
+                'matched_id': documents[0][doc_index],
+                'match_score': self._score(bank[2][bank_index] - documents[2][doc_index])
+            }))
+
+        if not frames:
+            return pd.DataFrame({
+                'bank_transaction_id': pd.Series(dtype='int64'),
+                'matched_table': pd.Series(dtype=object),
+                'matched_id': pd.Series(dtype='int64'),
+                'match_score': pd.Series(dtype='float64')
+            })
+
+        candidates = pd.concat(frames, ignore_index=True)
+        return candidates.sort_values('match_score', ascending=False, kind='stable', ignore_index=True)
+
+    def rank_best(self, candidates):
+        """בחירת ההתאמה הטובה ביותר לכל עסקת בנק - ROW_NUMBER() ... WHERE rank = 1
+
+        שוויון בציון מוכרע לפי סדר הטבלאות ואז לפי מזהה המסמך, כדי שהתוצאה תהיה דטרמיניסטית
+        """
+        candidates = candidates[candidates['match_score'] >= self.min_score]
+        table_order = candidates['matched_table'].map({name: i for i, name in enumerate(SOURCE_TABLES)})
+
+        order = np.lexsort((
+            candidates['matched_id'].to_numpy(),
+            table_order.to_numpy(),
+            -candidates['match_score'].to_numpy(),
+            candidates['bank_transaction_id'].to_numpy()
+        ))
+        ranked = candidates.iloc[order]
+        best = ranked[~ranked['bank_transaction_id'].duplicated()]
+        return best.reset_index(drop=True)
+
+    def rank_assigned(self, candidates):
+        """השמה אחד-לאחד: כל עסקת בנק וכל מסמך בהתאמה אחת לכל היותר, בסכום ציונים מקסימלי.
+
+        בניגוד ל-rank_best, אותו מסמך לא נבחר לכמה עסקאות בנק. שוויון מוכרע כמו ב-rank_best
+        """
+        candidates = candidates[candidates['match_score'] >= self.min_score]
+        table_order = candidates['matched_table'].map({name: i for i, name in enumerate(SOURCE_TABLES)})
+        order = np.lexsort((
+            candidates['matched_id'].to_numpy(),
+            table_order.to_numpy(),
+            candidates['bank_transaction_id'].to_numpy(),
+            -candidates['match_score'].to_numpy()
+        ))
+        ranked = candidates.iloc[order]
+
+        rows = pd.factorize(ranked['bank_transaction_id'])[0]
+        cols = pd.MultiIndex.from_arrays([ranked['matched_table'], ranked['matched_id']]).factorize()[0]
+        chosen = self.assignment.solve(rows, cols, ranked['match_score'].to_numpy())
+        return ranked[chosen].sort_values('bank_transaction_id', kind='stable', ignore_index=True)
+
+    def best_matches(self, bank_df, sources, one_to_one=False):
+        """ההתאמות שנשמרות ב-transaction_matches - מקביל ל-save_best_matches().
+        one_to_one בוחר השמה אופטימלית שבה כל מסמך מותאם לעסקת בנק אחת לכל היותר"""
+        candidates = self.match_transactions(bank_df, sources)
+        return self.rank_assigned(candidates) if one_to_one else self.rank_best(candidates)
+
+    @staticmethod
+    def match_details(best, bank_df, sources):
+        """פרטי ההתאמות בפורמט של get_match_details()"""
+        bank = bank_df.reindex(columns=['id', 'date', 'amount', 'description']).rename(columns={
+            'id': 'bank_transaction_id',
+            'date': 'bank_date',
+            'amount': 'bank_amount',
+            'description': 'bank_description'
+        })
+
+        matched = []
+        for table_name, reference_column in SOURCE_TABLES.items():
+            source_df = sources.get(table_name)
+            if source_df is None or source_df.empty:
+                continue
+            matched.append(pd.DataFrame({
+                'matched_table': table_name,
+                'matched_id': source_df['id'].to_numpy(dtype='int64'),
+                'matched_date': source_df['date'].to_numpy(),
+                'matched_amount': source_df['amount'].to_numpy(),
+                'matched_reference': source_df[reference_column].to_numpy()
+                if reference_column in source_df.columns else None
+            }))
+
+        details = best[['bank_transaction_id', 'matched_table', 'matched_id']].merge(
+            bank, on='bank_transaction_id', how='inner'
+        )
+        if matched:
+            details = details.merge(
+                pd.concat(matched, ignore_index=True), on=['matched_table', 'matched_id'], how='left'
+            )
+
+        return details.reindex(columns=[
+            'bank_transaction_id', 'bank_date', 'bank_amount', 'bank_description',
+            'matched_table', 'matched_id', 'matched_date', 'matched_amount', 'matched_reference'
+        ])
+
+
+def _canonical_tokens(tokens):
+    """מספרים מושווים בלי אפסים מובילים - "שיק 004512" מול מספר שיק 4512"""
+    return [
+        (token.lstrip('0') or '0') if token[:1] == '0' and token.isdigit() else token
+        for token in tokens
+    ]
+
+
+class TokenIndex:
+    """מילים של עמודת טקסט כ-hash מספרי, לחיפוש וקטורי של מילים משותפות בין זוגות שורות"""
+
+    def __init__(self, values):
+        values = pd.Series(values, dtype=object).reset_index(drop=True)
+        present = values.notna().to_numpy()
+        # פיצול בלולאה אחת על המחרוזות - מהיר בהרבה משרשרת פעולות .str על מיליון שורות
+        words = [_TOKEN.findall(str(text).lower()) for text in values[present]]
+        tokens = np.array(_canonical_tokens(chain.from_iterable(words)), dtype=object)
+
+        self.rows = np.repeat(np.flatnonzero(present), np.fromiter(map(len, words), dtype='int64', count=len(words)))
+        self.hashes = pd.util.hash_array(tokens) if len(tokens) else np.empty(0, dtype='uint64')
+        self.sizes = np.bincount(self.rows, minlength=len(values))
+        keys = np.sort(self.pair_keys(self.rows, self.hashes))
+        self.keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+
+    @staticmethod
+    def pair_keys(rows, hashes):
+        """מפתח אחד לזוג (שורה, מילה)"""
+        with np.errstate(over='ignore'):
+            return (rows.astype('uint64') * np.uint64(0x9E3779B97F4A7C15)) ^ hashes
+
+    def contains(self, rows, hashes):
+        """האם המילה מופיעה בשורה, לכל זוג - חיפוש בינארי במפתחות הממוינים"""
+        if len(self.keys) == 0:
+            return np.zeros(len(rows), dtype=bool)
+        keys = self.pair_keys(rows, hashes)
+        # חיפוש של מפתחות ממוינים עובר על self.keys ברצף, במקום קפיצות אקראיות בזיכרון
+        order = np.argsort(keys)
+        positions = np.empty(len(keys), dtype='int64')
+        positions[order] = np.minimum(np.searchsorted(self.keys, keys[order]), len(self.keys) - 1)
+        return self.keys[positions] == keys
+
+    def shared_tokens(self, rows, other, other_rows):
+        """מספר המילים של other_rows (באינדקס other) שמופיעות גם בשורות rows, לכל זוג"""
+        counts = other.sizes[other_rows]
+        pair = np.repeat(np.arange(len(rows)), counts)
+        if len(pair) == 0:
+            return np.zeros(len(rows))
+
+        # מיקום המילים של כל שורה ב-other, שמסודרות לפי השורה
+        starts = np.searchsorted(other.rows, other_rows)
+        offsets = np.arange(len(pair)) - np.repeat(np.cumsum(counts) - counts, counts)
+        hashes = other.hashes[np.repeat(starts, counts) + offsets]
+        hits = self.contains(rows[pair], hashes)
+        return np.bincount(pair, weights=hits, minlength=len(rows))
+
+
+class TolerantMatchEngine(MatchEngine):
+    """התאמה עם סבילות בסכום (מוחלטת ובאחוזים) וציון משוקלל של תאריך, סכום, אסמכתא ותיאור.
+
+    המועמדים נמצאים בחיפוש רצועה על אינדקס ממוין לפי (יום, סכום): לכל הפרש ימים בחלון
+    שני חיפושים בינאריים, כך שהרחבת הסבילות לא הופכת לצירוף מלא. זוגות שגם עם ציון
+    טקסט מלא לא יגיעו ל-min_score נזרקים לפני חישוב הטקסט, ולכל עסקת בנק נשמרים
+    לכל היותר max_candidates המועמדים הטובים מכל טבלה.
+    """
+
+    def __init__(self, tolerance_days=3, min_score=0.7, amount_tolerance=0.0, amount_tolerance_pct=0.0,
+                 weights=None, max_candidates_per_day=8, max_candidates=5):
+        super().__init__(tolerance_days, min_score)
+        self.amount_tolerance = amount_tolerance
+        self.amount_tolerance_pct = amount_tolerance_pct
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.max_candidates_per_day = max_candidates_per_day
+        self.max_candidates = max_candidates
+
+    def _tolerance_cents(self, cents):
+        """הסבילות באגורות לכל עסקת בנק - הגדולה מבין הסבילות המוחלטת והיחסית"""
+        absolute = int(round(self.amount_tolerance * 100))
+        relative = np.floor(cents * (self.amount_tolerance_pct / 100.0)).astype('int64')
+        return np.maximum(relative, absolute)
+
+    def _band_join(self, bank, documents):
+        """שלשות (בנק, מסמך, סדר) של זוגות שהסכום שלהם ברצועת הסבילות - מנה לכל בלוק של עסקאות בנק.
+
+        בכל יום נלקחים לכל היותר max_candidates_per_day מסמכים - חלון סביב המסמכים בסכום המדויק.
+        כשיש יותר מסמכים בסכום המדויק מגודל החלון, כל עסקה ברצף עסקאות זהות (יום וסכום) מקבלת
+        חלון מוזז לפי מקומה ברצף, ו"סדר" מכריע שוויון בציון באותו סיבוב - אחרת כל העסקאות
+        ברצף מקבלות את אותם מסמכים וההשמה אחד-לאחד משאירה את רובן בלי התאמה
+        """
+        _, bank_cents, bank_days, _ = bank
+        _, doc_cents, doc_days, _ = documents
+
+        doc_keys = (doc_days + _DAY_OFFSET) * _CENT_SPAN + doc_cents
+        order = np.argsort(doc_keys, kind='stable')
+        sorted_keys = doc_keys[order]
+
+        # גם עסקאות הבנק ממוינות לפי אותו מפתח - חיפוש בינארי על שאילתות ממוינות מהיר בהרבה
+        bank_keys = (bank_days + _DAY_OFFSET) * _CENT_SPAN + bank_cents
+        bank_order = np.argsort(bank_keys, kind='stable')
+        bank_cents, bank_days, bank_keys = bank_cents[bank_order], bank_days[bank_order], bank_keys[bank_order]
+        tolerance = self._tolerance_cents(bank_cents)
+        first = np.r_[True, bank_keys[1:] != bank_keys[:-1]]
+        positions = np.arange(len(bank_keys))
+        bank_rank = positions - np.maximum.accumulate(np.where(first, positions, 0))
+        limit = self.max_candidates_per_day
+
+        for block in range(0, len(bank_order), _BANK_BLOCK):
+            rows = slice(block, block + _BANK_BLOCK)
+            cents, days, band, rank = bank_cents[rows], bank_days[rows], tolerance[rows], bank_rank[rows]
+            bank_parts, doc_parts, tie_parts = [], [], []
+
+            for offset in range(-self.tolerance_days, self.tolerance_days + 1):
+                day_base = (days + offset + _DAY_OFFSET) * _CENT_SPAN
+                lo = np.searchsorted(sorted_keys, day_base + np.maximum(cents - band, 0), side='left')
+                hi = np.searchsorted(sorted_keys, day_base + cents + band, side='right')
+                exact = np.searchsorted(sorted_keys, day_base + cents, side='left')
+                run = np.searchsorted(sorted_keys, day_base + cents, side='right') - exact
+                shift = np.zeros(len(lo), dtype='int64')
+
+                if limit is not None:
+                    # חלון של limit מסמכים סביב המסמכים בסכום המדויק, בתוך גבולות הרצועה
+                    start = np.clip(exact - (limit - run + 1) // 2, lo, np.maximum(hi - limit, lo))
+                    lo, hi = start, np.minimum(start + limit, hi)
+                    rotated = run > limit
+                    lo[rotated], hi[rotated] = exact[rotated], exact[rotated] + limit
+                    shift[rotated] = rank[rotated] % run[rotated]
+
+                counts = hi - lo
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                step = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                span = np.repeat(np.where(shift > 0, run, np.maximum(counts, 1)), counts)
+                doc_position = np.repeat(lo, counts) + (np.repeat(shift, counts) + step) % span
+
+                # סדר המסמכים בסכום המדויק מסובב לפי מקום העסקה ברצף; השאר אחריהם
+                relative = doc_position - np.repeat(exact, counts)
+                run_pairs = np.repeat(run, counts)
+                within = (relative >= 0) & (relative < run_pairs)
+                bank_parts.append(np.repeat(bank_order[rows], counts))
+                doc_parts.append(order[doc_position])
+                tie_parts.append(np.where(
+                    within,
+                    (relative - np.repeat(rank, counts)) % np.maximum(run_pairs, 1),
+                    run_pairs + np.abs(relative)
+                ))
+
+            if bank_parts:
+                yield np.concatenate(bank_parts), np.concatenate(doc_parts), np.concatenate(tie_parts)
+
+    @staticmethod
+    def _top_candidates(bank_index, ties, scores, max_candidates):
+        """מסכה של max_candidates המועמדים בעלי הציון הגבוה ביותר לכל עסקת בנק; שוויון לפי ties"""
+        keep = np.ones(len(bank_index), dtype=bool)
+        if max_candidates is None or len(bank_index) == 0:
+            return keep
+
+        # רק עסקאות עם יותר מ-max_candidates מועמדים ממוינות לפי ציון
+        crowded = np.flatnonzero(np.bincount(bank_index)[bank_index] > max_candidates)
+        if len(crowded) == 0:
+            return keep
+        order = crowded[np.lexsort((ties[crowded], -scores[crowded], bank_index[crowded]))]
+        grouped = bank_index[order]
+        first = np.r_[True, grouped[1:] != grouped[:-1]]
+        group_start = np.maximum.accumulate(np.where(first, np.arange(len(grouped)), 0))
+        keep[order] = np.arange(len(grouped)) - group_start < max_candidates
+        return keep
+
+    def match_transactions(self, bank_df, sources):
+        """המועמדים ברצועת הסבילות עם ציון משוקלל ורכיבי הציון"""
+        return self._candidates(bank_df, sources, self.max_candidates)
+
+    def best_matches(self, bank_df, sources, one_to_one=False):
+        """כמו ב-MatchEngine; בלי השמה rank_best בוחר רק מבין הטובים של כל טבלה,
+        ולכן נשמר מועמד אחד לכל עסקת בנק מכל טבלה במקום max_candidates"""
+        if one_to_one:
+            return self.rank_assigned(self.match_transactions(bank_df, sources))
+        return self.rank_best(self._candidates(bank_df, sources, max_candidates=1))
+
+    def _candidates(self, bank_df, sources, max_candidates):
+        """המועמדים עם ציון לפחות min_score, עד max_candidates לכל עסקת בנק מכל טבלה"""
+        bank = self._keys(bank_df)
+        bank_tokens = TokenIndex(bank_df['description']) if 'description' in bank_df.columns else None
+        frames = []
+
+        for table_name, reference_column in SOURCE_TABLES.items():
+            source_df = sources.get(table_name)
+            if source_df is None or source_df.empty or bank_df.empty:
+                continue
+
+            documents = self._keys(source_df)
+            references = descriptions = None
+            if bank_tokens is not None and reference_column in source_df.columns:
+                references = self._reference_hashes(source_df[reference_column])
+            description_column = DESCRIPTION_COLUMNS.get(table_name)
+            if bank_tokens is not None and description_column in source_df.columns:
+                descriptions = TokenIndex(source_df[description_column])
+                if len(descriptions.hashes) == 0:
+                    # עמודת תיאור ריקה לא מוסיפה לציון - גם לא לתקרה שלפיה מסננים מראש
+                    descriptions = None
+
+            # הציון המקסימלי שרכיבי הטקסט יכולים להוסיף בטבלה הזו
+            text_ceiling = (
+                (self.weights['reference'] if references is not None else 0.0)
+                + (self.weights['description'] if descriptions is not None else 0.0)
+            )
+
+            for bank_index, doc_index, ties in self._band_join(bank, documents):
+                cents_delta = np.abs(bank[1][bank_index] - documents[1][doc_index])
+                tolerance = self._tolerance_cents(bank[1][bank_index])
+                amount_score = np.where(tolerance > 0, 1.0 - cents_delta / np.maximum(tolerance, 1), 1.0)
+                date_score = self._score(bank[2][bank_index] - documents[2][doc_index])
+                base = self.weights['date'] * date_score + self.weights['amount'] * amount_score
+
+                keep = base + text_ceiling >= self.min_score - 1e-9
+                bank_index, doc_index, ties = bank_index[keep], doc_index[keep], ties[keep]
+                cents_delta, amount_score, date_score, base = (
+                    cents_delta[keep], amount_score[keep], date_score[keep], base[keep]
+                )
+
+                reference_score = np.zeros(len(bank_index))
+                if references is not None:
+                    hashes, present = references
+                    has_reference = present[doc_index]
+                    reference_score[has_reference] = bank_tokens.contains(
+                        bank_index[has_reference], hashes[doc_index[has_reference]]
+                    )
+
+                description_score = np.zeros(len(bank_index))
+                if descriptions is not None:
+                    shared = bank_tokens.shared_tokens(bank_index, descriptions, doc_index)
+                    union = bank_tokens.sizes[bank_index] + descriptions.sizes[doc_index] - shared
+                    description_score = np.divide(shared, union, out=np.zeros(len(shared)), where=union > 0)
+
+                score = (
+                    base
+                    + self.weights['reference'] * reference_score
+                    + self.weights['description'] * description_score
+                )
+                # מועמד מתחת ל-min_score לא נבחר לעולם - נזרק לפני המיון לפי ציון
+                top = score >= self.min_score - 1e-9
+                top[top] = self._top_candidates(bank_index[top], ties[top], score[top], max_candidates)
+                frames.append(pd.DataFrame({
+                    'bank_transaction_id': bank[0][bank_index[top]],
+                    'matched_table': table_name,
+                    'matched_id': documents[0][doc_index[top]],
+                    'match_score': score[top],
+                    'amount_delta': cents_delta[top] / 100.0,
+                    'date_score': date_score[top],
+                    'amount_score': amount_score[top],
+                    'reference_score': reference_score[top],
+                    'description_score': description_score[top]
+                }))
+
+        if not frames:
+            empty = super().match_transactions(bank_df, {})
+            return empty.assign(**{column: pd.Series(dtype='float64') for column in SCORE_COLUMNS})
+
+        candidates = pd.concat(frames, ignore_index=True)
+        return candidates.sort_values('match_score', ascending=False, kind='stable', ignore_index=True)
+
+    @staticmethod
+    def _reference_hashes(values):
+        """hash של מספר האסמכתא כמילה אחת (3 תווים לפחות) ומסכה של אסמכתאות קיימות"""
+        values = pd.Series(values, dtype=object).reset_index(drop=True)
+        tokens = np.array(_canonical_tokens(
+            _NON_ALNUM.sub('', str(value).lower()) if present else ''
+            for value, present in zip(values, values.notna())
+        ), dtype=object)
+        present = values.notna().to_numpy() & (np.fromiter(map(len, tokens), dtype='int64', count=len(tokens)) >= 3)
+        return pd.util.hash_array(tokens), present
@@ -9,6 +9,11 @@ RETURNS TABLE (
 LANGUAGE plpgsql 
 AS $$
 BEGIN
+    -- כל הפונקציות שכותבות התאמות לוקחות את אותה נעילה עד סוף הטרנזקציה, כך ששתי ריצות במקביל
+    -- (למשל שתי עבודות בשירות) לא משלבות DELETE ו-INSERT ולא שומרות את אותן התאמות פעמיים.
+    -- הריצה השנייה ממתינה, ואחרי שהראשונה הסתיימה רואה את השורות שהיא כבר סימנה כסרוקות
+    PERFORM pg_advisory_xact_lock(hashtext('transaction_matches'));
+    
     -- מחיקת התאמות קודמות
     DELETE FROM transaction_matches;
     
@@ -25,7 +30,7 @@ BEGIN
         END as score
     FROM bank_transactions bt
     JOIN checks c ON ABS(bt.amount) = ABS(c.amount)
-    WHERE ABS(bt.date - c.date) <= tolerance_days
+    WHERE c.date BETWEEN bt.date - tolerance_days AND bt.date + tolerance_days
     
     UNION ALL
     
@@ -40,7 +45,7 @@ BEGIN
         END as score
     FROM bank_transactions bt
     JOIN bank_transfers t ON ABS(bt.amount) = ABS(t.amount)
-    WHERE ABS(bt.date - t.date) <= tolerance_days
+    WHERE t.date BETWEEN bt.date - tolerance_days AND bt.date + tolerance_days
     
     UNION ALL
     
@@ -55,7 +60,7 @@ BEGIN
         END as score
     FROM bank_transactions bt
     JOIN invoices i ON ABS(bt.amount) = ABS(i.amount)
-    WHERE ABS(bt.date - i.date) <= tolerance_days
+    WHERE i.date BETWEEN bt.date - tolerance_days AND bt.date + tolerance_days
     
     UNION ALL
     
@@ -70,18 +75,68 @@ BEGIN
         END as score
     FROM bank_transactions bt
     JOIN receipts r ON ABS(bt.amount) = ABS(r.amount)
-    WHERE ABS(bt.date - r.date) <= tolerance_days
+    WHERE r.date BETWEEN bt.date - tolerance_days AND bt.date + tolerance_days
     
     ORDER BY score DESC;
 END;
 $$;
 
+-- רענון ה-views הממומשים שהדשבורד קורא (match_details_mv, unmatched_bank_mv).
+-- CONCURRENTLY מחשב את ה-view מחדש ומחיל רק את ההפרשים, בלי לחסום קריאות בזמן הרענון
+CREATE OR REPLACE FUNCTION refresh_reconciliation_views()
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- שורת המצב ננעלת לפני הרענון: ריצה מצטברת שמסיימת בינתיים מסמנת views_stale רק אחריו
+    PERFORM 1 FROM match_state FOR UPDATE;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY match_details_mv;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY unmatched_bank_mv;
+    UPDATE match_state SET views_stale = false, views_refreshed_at = now();
+END;
+$$;
+
+-- הרענון מחשב את כל ההתאמות מחדש (כ-18 שניות למיליון התאמות ב-benchmarks/bench_view_refresh.py), ולכן הריצה המצטברת רק מסמנת
+-- views_stale והרענון נעשה כאן, לפי דרישה: רק כשיש שינוי, ולא יותר מפעם ב-min_interval_seconds.
+-- כשריצת התאמה או רענון אחר מחזיקים את שורת המצב הקריאה חוזרת מיד (false) במקום להמתין
+CREATE OR REPLACE FUNCTION refresh_stale_views(min_interval_seconds INTEGER DEFAULT 0)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    due BOOLEAN;
+BEGIN
+    SELECT ms.views_stale AND ms.views_refreshed_at <= now() - make_interval(secs => min_interval_seconds)
+    INTO due
+    FROM match_state ms
+    FOR UPDATE SKIP LOCKED;
+    
+    IF NOT COALESCE(due, false) THEN
+        RETURN false;
+    END IF;
+    PERFORM refresh_reconciliation_views();
+    RETURN true;
+END;
+$$;
+
 -- פונקציה לשמירת ההתאמות הטובות ביותר
 CREATE OR REPLACE FUNCTION save_best_matches(min_score FLOAT DEFAULT 0.7)
 RETURNS void 
 LANGUAGE plpgsql 
 AS $$
 BEGIN
+    -- ריצת התאמה אחת בכל פעם - ראו match_transactions
+    PERFORM pg_advisory_xact_lock(hashtext('transaction_matches'));
+    
+    -- ריצה מלאה מכסה את כל השורות שגלויות לה. הסימון נמחק לפני החישוב, כך ששורה שתיכתב בינתיים
+    -- נשארת מסומנת ונסרקת שוב בריצה המצטברת הבאה
+    UPDATE bank_transactions SET pending_match = false WHERE pending_match;
+    UPDATE checks SET pending_match = false WHERE pending_match;
+    UPDATE bank_transfers SET pending_match = false WHERE pending_match;
+    UPDATE invoices SET pending_match = false WHERE pending_match;
+    UPDATE receipts SET pending_match = false WHERE pending_match;
+    UPDATE match_state SET one_to_one = false, updated_at = now();
+    
     -- מחיקת התאמות קודמות
     DELETE FROM transaction_matches;
     
@@ -96,14 +151,223 @@ BEGIN
         FROM match_transactions()
         WHERE match_score >= min_score
     )
-    INSERT INTO transaction_matches (bank_transaction_id, matched_table, matched_id)
-    SELECT bank_transaction_id, matched_table, matched_id
+    INSERT INTO transaction_matches (bank_transaction_id, matched_table, matched_id, match_score)
+    SELECT bank_transaction_id, matched_table, matched_id, match_score
     FROM ranked_matches
     WHERE rank = 1;
+    
+    PERFORM refresh_reconciliation_views();
 END;
 $$;
 
--- פונקציה לקבלת פרטי ההתאמות
+-- מועמדים להתאמה מצטברת: עסקאות בנק חדשות מול כל המסמכים, ומסמכים חדשים מול עסקאות בנק שכבר נסרקו
+-- (לא מסומנות pending_match). כל ענף מתחיל מהמזהים החדשים (מפתח ראשי) ומחפש בצד השני דרך אינדקס
+-- (ABS(amount), date). פונקציית SQL יציבה עם SELECT יחיד נפתחת (inline) בשאילתה שקוראת לה,
+-- ולכן EXPLAIN SELECT * FROM new_match_candidates(...) מציג את התוכנית שהריצה המצטברת מבצעת
+CREATE OR REPLACE FUNCTION new_match_candidates(
+    new_bank INTEGER[] DEFAULT '{}',
+    new_checks INTEGER[] DEFAULT '{}',
+    new_transfers INTEGER[] DEFAULT '{}',
+    new_invoices INTEGER[] DEFAULT '{}',
+    new_receipts INTEGER[] DEFAULT '{}',
+    tolerance_days INTEGER DEFAULT 3
+)
+RETURNS TABLE (
+    bank_transaction_id INTEGER,
+    matched_table TEXT,
+    matched_id INTEGER,
+    day_delta INTEGER
+)
+LANGUAGE sql
+STABLE
+AS $$
+SELECT bt.id AS bank_transaction_id, 'checks'::TEXT AS matched_table, c.id AS matched_id, bt.date - c.date AS day_delta
+FROM bank_transactions bt
+JOIN checks c ON ABS(bt.amount) = ABS(c.amount)
+WHERE bt.id = ANY(new_bank)
+  AND c.date BETWEEN bt.date - tolerance_days AND bt.date + tolerance_days
+
+UNION ALL
+
+SELECT bt.id, 'checks'::TEXT, c.id, bt.date - c.date
+FROM checks c
+JOIN bank_transactions bt ON ABS(bt.amount) = ABS(c.amount)
+WHERE c.id = ANY(new_checks)
+  AND NOT bt.pending_match
+  AND bt.date BETWEEN c.date - tolerance_days AND c.date + tolerance_days
+
+UNION ALL
+
+SELECT bt.id, 'bank_transfers'::TEXT, t.id, bt.date - t.date
+FROM bank_transactions bt
+JOIN bank_transfers t ON ABS(bt.amount) = ABS(t.amount)
+WHERE bt.id = ANY(new_bank)
+  AND t.date BETWEEN bt.date - tolerance_days AND bt.date + tolerance_days
+
+UNION ALL
+
+SELECT bt.id, 'bank_transfers'::TEXT, t.id, bt.date - t.date
+FROM bank_transfers t
+JOIN bank_transactions bt ON ABS(bt.amount) = ABS(t.amount)
+WHERE t.id = ANY(new_transfers)
+  AND NOT bt.pending_match
+  AND bt.date BETWEEN t.date - tolerance_days AND t.date + tolerance_days
+
+UNION ALL
+
+SELECT bt.id, 'invoices'::TEXT, i.id, bt.date - i.date
+FROM bank_transactions bt
+JOIN invoices i ON ABS(bt.amount) = ABS(i.amount)
+WHERE bt.id = ANY(new_bank)
+  AND i.date BETWEEN bt.date - tolerance_days AND bt.date + tolerance_days
+
+UNION ALL
+
+SELECT bt.id, 'invoices'::TEXT, i.id, bt.date - i.date
+FROM invoices i
+JOIN bank_transactions bt ON ABS(bt.amount) = ABS(i.amount)
+WHERE i.id = ANY(new_invoices)
+  AND NOT bt.pending_match
+  AND bt.date BETWEEN i.date - tolerance_days AND i.date + tolerance_days
+
+UNION ALL
+
+SELECT bt.id, 'receipts'::TEXT, r.id, bt.date - r.date
+FROM bank_transactions bt
+JOIN receipts r ON ABS(bt.amount) = ABS(r.amount)
+WHERE bt.id = ANY(new_bank)
+  AND r.date BETWEEN bt.date - tolerance_days AND bt.date + tolerance_days
+
+UNION ALL
+
+SELECT bt.id, 'receipts'::TEXT, r.id, bt.date - r.date
+FROM receipts r
+JOIN bank_transactions bt ON ABS(bt.amount) = ABS(r.amount)
+WHERE r.id = ANY(new_receipts)
+  AND NOT bt.pending_match
+  AND bt.date BETWEEN r.date - tolerance_days AND r.date + tolerance_days;
+$$;
+
+-- פונקציה להתאמה מצטברת - סורקת רק שורות שנוספו מאז הריצה הקודמת
+CREATE OR REPLACE FUNCTION match_new_transactions(tolerance_days INTEGER DEFAULT 3, min_score FLOAT DEFAULT 0.7)
+RETURNS TABLE (
+    bank_rows_considered INTEGER,
+    document_rows_considered INTEGER,
+    candidates_scored INTEGER,
+    matches_saved INTEGER
+) 
+LANGUAGE plpgsql 
+AS $$
+DECLARE
+    new_bank INTEGER[];
+    new_checks INTEGER[];
+    new_transfers INTEGER[];
+    new_invoices INTEGER[];
+    new_receipts INTEGER[];
+    exclusive BOOLEAN;
+BEGIN
+    -- ריצת התאמה אחת בכל פעם; השורות המסומנות נקראות רק אחרי שריצה מקבילה הסתיימה
+    PERFORM pg_advisory_xact_lock(hashtext('transaction_matches'));
+    
+    SELECT ms.one_to_one INTO exclusive FROM match_state ms;
+    exclusive := COALESCE(exclusive, false);
+    
+    -- השורות החדשות: כל השורות המסומנות pending_match שגלויות לריצה. שורה מטרנזקציה שעוד לא הסתיימה
+    -- נשארת מסומנת ונסרקת בריצה הבאה - גם אם המזהה שלה נמוך ממזהים שכבר נסרקו
+    SELECT COALESCE(array_agg(id), '{}') INTO new_bank FROM bank_transactions WHERE pending_match;
+    SELECT COALESCE(array_agg(id), '{}') INTO new_checks FROM checks WHERE pending_match;
+    SELECT COALESCE(array_agg(id), '{}') INTO new_transfers FROM bank_transfers WHERE pending_match;
+    SELECT COALESCE(array_agg(id), '{}') INTO new_invoices FROM invoices WHERE pending_match;
+    SELECT COALESCE(array_agg(id), '{}') INTO new_receipts FROM receipts WHERE pending_match;
+    
+    bank_rows_considered := cardinality(new_bank);
+    document_rows_considered := cardinality(new_checks) + cardinality(new_transfers)
+        + cardinality(new_invoices) + cardinality(new_receipts);
+    
+    -- המועמדים נשמרים בטבלה זמנית - נספרים ומדורגים בלי לחשב את הצירוף פעמיים
+    DROP TABLE IF EXISTS new_candidates;
+    CREATE TEMP TABLE new_candidates ON COMMIT DROP AS
+    SELECT * FROM new_match_candidates(new_bank, new_checks, new_transfers, new_invoices, new_receipts, tolerance_days);
+    
+    SELECT COUNT(*) INTO candidates_scored FROM new_candidates;
+    
+    -- שמירת המועמד הטוב ביותר לכל עסקה, רק אם הוא עדיף על ההתאמה הקיימת.
+    -- כשההתאמות השמורות הן השמה אחד-לאחד (match_state.one_to_one), מסמך שכבר מותאם לעסקה אחרת אינו
+    -- מועמד, ומסמך חדש נשאר רק אצל העסקה שבה הציון שלו הגבוה ביותר. הבחירה חמדנית - השמה אופטימלית
+    -- מחושבת מחדש בריצת one_to_one מלאה
+    WITH ranked_matches AS (
+        SELECT 
+            nc.bank_transaction_id,
+            nc.matched_table,
+            nc.matched_id,
+            CASE
+                WHEN nc.day_delta = 0 THEN 1.0
+                ELSE 1.0 - (ABS(nc.day_delta) / tolerance_days::FLOAT)
+            END as match_score
+        FROM new_candidates nc
+        WHERE NOT exclusive OR NOT EXISTS (
+            SELECT 1 FROM transaction_matches tm
+            WHERE tm.matched_table = nc.matched_table
+              AND tm.matched_id = nc.matched_id
+              AND tm.bank_transaction_id <> nc.bank_transaction_id
+        )
+    ),
+    document_ranked AS (
+        SELECT rm.*, ROW_NUMBER() OVER (
+            PARTITION BY rm.matched_table, rm.matched_id ORDER BY rm.match_score DESC, rm.bank_transaction_id
+        ) as document_rank
+        FROM ranked_matches rm
+        WHERE rm.match_score >= min_score
+    ),
+    best_matches AS (
+        SELECT *
+        FROM (
+            SELECT dr.*, ROW_NUMBER() OVER (PARTITION BY dr.bank_transaction_id ORDER BY dr.match_score DESC) as rank
+            FROM document_ranked dr
+            WHERE NOT exclusive OR dr.document_rank = 1
+        ) ranked
+        WHERE rank = 1
+    ),
+    updated AS (
+        UPDATE transaction_matches tm
+        SET matched_table = bm.matched_table,
+            matched_id = bm.matched_id,
+            match_score = bm.match_score,
+            match_date = now()
+        FROM best_matches bm
+        WHERE tm.bank_transaction_id = bm.bank_transaction_id
+          AND COALESCE(tm.match_score, min_score) < bm.match_score
+        RETURNING tm.id
+    ),
+    inserted AS (
+        INSERT INTO transaction_matches (bank_transaction_id, matched_table, matched_id, match_score)
+        SELECT bm.bank_transaction_id, bm.matched_table, bm.matched_id, bm.match_score
+        FROM best_matches bm
+        WHERE NOT EXISTS (
+            SELECT 1 FROM transaction_matches tm WHERE tm.bank_transaction_id = bm.bank_transaction_id
+        )
+        RETURNING id
+    )
+    SELECT (SELECT COUNT(*) FROM updated) + (SELECT COUNT(*) FROM inserted) INTO matches_saved;
+    
+    -- מחיקת הסימון רק מהשורות שנסרקו בריצה הזו
+    UPDATE bank_transactions SET pending_match = false WHERE id = ANY(new_bank);
+    UPDATE checks SET pending_match = false WHERE id = ANY(new_checks);
+    UPDATE bank_transfers SET pending_match = false WHERE id = ANY(new_transfers);
+    UPDATE invoices SET pending_match = false WHERE id = ANY(new_invoices);
+    UPDATE receipts SET pending_match = false WHERE id = ANY(new_receipts);
+    
+    -- עסקאות בנק חדשות נכנסות ל-unmatched_bank_mv גם כשלא נמצאה להן התאמה. הרענון עצמו
+    -- ב-refresh_stale_views, כדי שכל העלאה לא תשלם על חישוב מחדש של כל ההתאמות
+    IF matches_saved > 0 OR bank_rows_considered > 0 THEN
+        UPDATE match_state SET views_stale = true;
+    END IF;
+    
+    RETURN NEXT;
+END;
+$$;
+
+-- פונקציה לקבלת פרטי ההתאמות - מתוך match_details_mv
 CREATE OR REPLACE FUNCTION get_match_details()
 RETURNS TABLE (
     bank_transaction_id INTEGER,
@@ -121,38 +385,324 @@ LANGUAGE plpgsql
 AS $$
 BEGIN
     RETURN QUERY
-    SELECT 
-        tm.bank_transaction_id,
-        bt.date as bank_date,
-        bt.amount as bank_amount,
-        bt.description as bank_description,
-        tm.matched_table,
-        tm.matched_id,
-        CASE
-            WHEN tm.matched_table = 'checks' THEN c.date
-            WHEN tm.matched_table = 'bank_transfers' THEN t.date
-            WHEN tm.matched_table = 'invoices' THEN i.date
-            WHEN tm.matched_table = 'receipts' THEN r.date
-        END as matched_date,
-        CASE
-            WHEN tm.matched_table = 'checks' THEN c.amount
-            WHEN tm.matched_table = 'bank_transfers' THEN t.amount
-            WHEN tm.matched_table = 'invoices' THEN i.amount
-            WHEN tm.matched_table = 'receipts' THEN r.amount
-        END as matched_amount,
-        CASE
-            WHEN tm.matched_table = 'checks' THEN c.check_number
-            WHEN tm.matched_table = 'bank_transfers' THEN t.reference_number
-            WHEN tm.matched_table = 'invoices' THEN i.invoice_number
-            WHEN tm.matched_table = 'receipts' THEN r.receipt_number
-        END as matched_reference,
-        tm.match_date
-    FROM transaction_matches tm
-    JOIN bank_transactions bt ON tm.bank_transaction_id = bt.id
-    LEFT JOIN checks c ON tm.matched_table = 'checks' AND tm.matched_id = c.id
-    LEFT JOIN bank_transfers t ON tm.matched_table = 'bank_transfers' AND tm.matched_id = t.id
-    LEFT JOIN invoices i ON tm.matched_table = 'invoices' AND tm.matched_id = i.id
-    LEFT JOIN receipts r ON tm.matched_table = 'receipts' AND tm.matched_id = r.id
-    ORDER BY tm.match_date DESC;
+    SELECT
+        md.bank_transaction_id,
+        md.bank_date,
+        md.bank_amount,
+        md.bank_description,
+        md.matched_table,
+        md.matched_id,
+        md.matched_date,
+        md.matched_amount,
+        md.matched_reference,
+        md.match_date
+    FROM match_details_mv md
+    ORDER BY md.match_date DESC;
+END;
+$$;
+
+-- סטטיסטיקות חודשיות לדשבורד: שורה אחת לכל חודש, מחושבת בשרת.
+-- טווח התאריכים אופציונלי; עם טווח הסריקה נעשית דרך idx_bank_transactions_date
+CREATE OR REPLACE FUNCTION get_monthly_match_stats(from_date DATE DEFAULT NULL, to_date DATE DEFAULT NULL)
+RETURNS TABLE (
+    year INTEGER,
+    month INTEGER,
+    total_transactions BIGINT,
+    matched_transactions BIGINT,
+    total_amount NUMERIC,
+    matched_amount NUMERIC
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        EXTRACT(YEAR FROM bt.date)::INTEGER AS year,
+        EXTRACT(MONTH FROM bt.date)::INTEGER AS month,
+        COUNT(*) AS total_transactions,
+        COUNT(tm.bank_transaction_id) AS matched_transactions,
+        SUM(bt.amount) AS total_amount,
+        COALESCE(SUM(bt.amount) FILTER (WHERE tm.bank_transaction_id IS NOT NULL), 0) AS matched_amount
+    FROM bank_transactions bt
+    LEFT JOIN transaction_matches tm ON tm.bank_transaction_id = bt.id
+    WHERE bt.date >= COALESCE(from_date, '-infinity'::DATE)
+      AND bt.date <= COALESCE(to_date, 'infinity'::DATE)
+    GROUP BY 1, 2
+    ORDER BY 1, 2;
+END;
+$$;
+
+
+-- סטטיסטיקות התאמה לדשבורד במעבר אחד: אחוז התאמה, סכומים ומספר התאמות לפי טבלת מקור
+CREATE OR REPLACE FUNCTION get_match_statistics()
+RETURNS TABLE (
+    total_transactions BIGINT,
+    matched_transactions BIGINT,
+    total_amount_matched NUMERIC,
+    total_amount_unmatched NUMERIC,
+    matches_by_type JSONB
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH by_table AS (
+        -- matched_table ריק מייצג את העסקאות ללא התאמה
+        SELECT tm.matched_table, COUNT(*) AS row_count, SUM(bt.amount) AS amount
+        FROM bank_transactions bt
+        LEFT JOIN transaction_matches tm ON tm.bank_transaction_id = bt.id
+        GROUP BY tm.matched_table
+    )
+    SELECT
+        COALESCE(SUM(row_count), 0)::BIGINT,
+        COALESCE(SUM(row_count) FILTER (WHERE matched_table IS NOT NULL), 0)::BIGINT,
+        COALESCE(SUM(amount) FILTER (WHERE matched_table IS NOT NULL), 0),
+        COALESCE(SUM(amount) FILTER (WHERE matched_table IS NULL), 0),
+        COALESCE(jsonb_object_agg(matched_table, row_count) FILTER (WHERE matched_table IS NOT NULL), '{}'::JSONB)
+    FROM by_table;
+END;
+$$;
+
+-- סיכום unmatched_bank_mv לדשבורד: המספר והסכום מאותו view שממנו נקראות השורות, ומתי רוענן.
+-- views_stale - ריצה מצטברת שינתה התאמות מאז הרענון, כך שה-view מפגר אחרי get_match_statistics
+CREATE OR REPLACE FUNCTION get_unmatched_summary()
+RETURNS TABLE (
+    unmatched_transactions BIGINT,
+    unmatched_amount NUMERIC,
+    views_refreshed_at TIMESTAMPTZ,
+    views_stale BOOLEAN
+)
+LANGUAGE sql
+STABLE
+AS $$
+SELECT
+    (SELECT COUNT(*) FROM unmatched_bank_mv),
+    (SELECT COALESCE(SUM(amount), 0) FROM unmatched_bank_mv),
+    ms.views_refreshed_at,
+    ms.views_stale
+FROM match_state ms;
+$$;
+
+-- עסקאות ללא התאמה בעמודים לפי מזהה (keyset) - העמוד הבא מתחיל אחרי המזהה האחרון שהוצג
+CREATE OR REPLACE FUNCTION get_unmatched_transactions(after_id INTEGER DEFAULT 0, page_size INTEGER DEFAULT 100)
+RETURNS SETOF bank_transactions
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT bt.*
+    FROM bank_transactions bt
+    WHERE bt.id > after_id
+      AND NOT EXISTS (
+          SELECT 1 FROM transaction_matches tm WHERE tm.bank_transaction_id = bt.id
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM match_group_items gi WHERE gi.bank_transaction_id = bt.id
+      )
+    ORDER BY bt.id
+    LIMIT page_size;
 END;
-$$; 
\ No newline at end of file
+$$;
+
+
+-- פרטי התאמות בעמודים לפי (match_date, id) בסדר יורד - לקריאה זורמת בלי לעקוף את מגבלת PostgREST.
+-- העמוד הבא מתחיל אחרי הזוג האחרון שהתקבל; NULL מתחיל מההתאמה החדשה ביותר.
+-- הקריאה מ-match_details_mv; המסננים האופציונליים (תאריך עסקת הבנק, טבלת מקור) נתמכים באינדקסים שלו.
+-- העמוד הראשון והעמודים הבאים הם שני ענפים נפרדים: תנאי "after_match_date IS NULL OR ..." אחד היה
+-- נשאר מסנן בתוכנית כללית (generic plan), והסריקה הייתה מתחילה תמיד מההתאמה החדשה ביותר במקום לקפוץ
+-- לסמן. כך התנאי בענף העמודים הבאים הוא Index Cond, והענף שלא רלוונטי נפסל ב-One-Time Filter
+CREATE OR REPLACE FUNCTION get_match_details_page(
+    after_match_date TIMESTAMP DEFAULT NULL,
+    after_id INTEGER DEFAULT NULL,
+    page_size INTEGER DEFAULT 1000,
+    from_date DATE DEFAULT NULL,
+    to_date DATE DEFAULT NULL,
+    table_filter TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    match_id INTEGER,
+    bank_transaction_id INTEGER,
+    bank_date DATE,
+    bank_amount NUMERIC,
+    bank_description TEXT,
+    matched_table TEXT,
+    matched_id INTEGER,
+    matched_date DATE,
+    matched_amount NUMERIC,
+    matched_reference TEXT,
+    match_date TIMESTAMP
+)
+LANGUAGE sql
+STABLE
+AS $$
+SELECT page.*
+FROM (
+    (SELECT
+        md.match_id,
+        md.bank_transaction_id,
+        md.bank_date,
+        md.bank_amount,
+        md.bank_description,
+        md.matched_table,
+        md.matched_id,
+        md.matched_date,
+        md.matched_amount,
+        md.matched_reference,
+        md.match_date
+    FROM match_details_mv md
+    WHERE after_match_date IS NULL
+      AND md.bank_date >= COALESCE(from_date, '-infinity'::DATE)
+      AND md.bank_date <= COALESCE(to_date, 'infinity'::DATE)
+      AND (table_filter IS NULL OR md.matched_table = table_filter)
+    ORDER BY md.match_date DESC, md.match_id DESC
+    LIMIT page_size)
+
+    UNION ALL
+
+    (SELECT
+        md.match_id,
+        md.bank_transaction_id,
+        md.bank_date,
+        md.bank_amount,
+        md.bank_description,
+        md.matched_table,
+        md.matched_id,
+        md.matched_date,
+        md.matched_amount,
+        md.matched_reference,
+        md.match_date
+    FROM match_details_mv md
+    WHERE (md.match_date, md.match_id) < (after_match_date, after_id)
+      AND md.bank_date >= COALESCE(from_date, '-infinity'::DATE)
+      AND md.bank_date <= COALESCE(to_date, 'infinity'::DATE)
+      AND (table_filter IS NULL OR md.matched_table = table_filter)
+    ORDER BY md.match_date DESC, md.match_id DESC
+    LIMIT page_size)
+) page
+ORDER BY page.match_date DESC, page.match_id DESC;
+$$;
+
+-- שמירת קבוצות התאמה (תשלומים מפוצלים) שנמצאו ב-GroupMatchEngine.
+-- groups הוא מערך JSON של {match_type, matched_table, total_amount, amount_delta, match_score,
+-- bank_transaction_ids, matched_ids}; החיפוש רץ על כל השורות שלא הותאמו, ולכן הקבוצות הקודמות מוחלפות
+CREATE OR REPLACE FUNCTION save_match_groups(groups JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    item JSONB;
+    new_group_id INTEGER;
+    saved INTEGER := 0;
+BEGIN
+    -- ריצת התאמה אחת בכל פעם - ראו match_transactions
+    PERFORM pg_advisory_xact_lock(hashtext('transaction_matches'));
+
+    DELETE FROM match_groups;
+
+    FOR item IN SELECT value FROM jsonb_array_elements(groups)
+    LOOP
+        INSERT INTO match_groups (match_type, matched_table, total_amount, amount_delta, match_score)
+        VALUES (
+            item->>'match_type',
+            item->>'matched_table',
+            (item->>'total_amount')::NUMERIC,
+            (item->>'amount_delta')::NUMERIC,
+            (item->>'match_score')::FLOAT
+        )
+        RETURNING id INTO new_group_id;
+
+        -- באחד הצדדים יש מזהה יחיד, ולכן המכפלה נותנת זוג לכל פריט
+        INSERT INTO match_group_items (group_id, bank_transaction_id, matched_id)
+        SELECT new_group_id, bank_id::INTEGER, matched_id::INTEGER
+        FROM jsonb_array_elements_text(item->'bank_transaction_ids') AS bank_id
+        CROSS JOIN jsonb_array_elements_text(item->'matched_ids') AS matched_id;
+
+        saved := saved + 1;
+    END LOOP;
+
+    -- שורות שנכנסו לקבוצה יוצאות מ-unmatched_bank_mv
+    PERFORM refresh_reconciliation_views();
+    RETURN saved;
+END;
+$$;
+
+-- קבוצות ההתאמה עם מזהי החברים בכל צד
+CREATE OR REPLACE FUNCTION get_match_groups()
+RETURNS TABLE (
+    group_id INTEGER,
+    match_type VARCHAR,
+    matched_table VARCHAR,
+    total_amount NUMERIC,
+    amount_delta NUMERIC,
+    match_score FLOAT,
+    bank_transaction_ids INTEGER[],
+    matched_ids INTEGER[]
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        mg.id,
+        mg.match_type,
+        mg.matched_table,
+        mg.total_amount,
+        mg.amount_delta,
+        mg.match_score,
+        array_agg(DISTINCT gi.bank_transaction_id ORDER BY gi.bank_transaction_id),
+        array_agg(DISTINCT gi.matched_id ORDER BY gi.matched_id)
+    FROM match_groups mg
+    JOIN match_group_items gi ON gi.group_id = mg.id
+    GROUP BY mg.id
+    ORDER BY mg.id;
+END;
+$$;
+
+-- שמירת התאמות שחושבו בזיכרון (השמה אחד-לאחד ב-MatchEngine.rank_assigned, או מנוע סבילות) - מחליפה
+-- את כל ההתאמות, כמו save_best_matches.
+-- matches הוא מערך JSON של {bank_transaction_id, matched_table, matched_id, match_score}.
+-- scanned הוא {טבלה: [[מזהה ראשון, מזהה אחרון], ...]} - טווחי המזהים שנקראו לזיכרון לחישוב; הסימון
+-- pending_match נמחק רק בהם, כך ששורה שנכתבה אחרי הקריאה נשארת לריצה המצטברת הבאה.
+-- exclusive - כל מסמך מופיע בהתאמה אחת לכל היותר, והריצות המצטברות הבאות שומרות על כך
+CREATE OR REPLACE FUNCTION save_assigned_matches(matches JSONB, scanned JSONB DEFAULT '{}', exclusive BOOLEAN DEFAULT true)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    saved INTEGER;
+BEGIN
+    -- ריצת התאמה אחת בכל פעם - ראו match_transactions
+    PERFORM pg_advisory_xact_lock(hashtext('transaction_matches'));
+
+    UPDATE bank_transactions bt SET pending_match = false
+    FROM jsonb_array_elements(scanned->'bank_transactions') AS scanned_range
+    WHERE bt.pending_match AND bt.id BETWEEN (scanned_range->>0)::INTEGER AND (scanned_range->>1)::INTEGER;
+    UPDATE checks c SET pending_match = false
+    FROM jsonb_array_elements(scanned->'checks') AS scanned_range
+    WHERE c.pending_match AND c.id BETWEEN (scanned_range->>0)::INTEGER AND (scanned_range->>1)::INTEGER;
+    UPDATE bank_transfers t SET pending_match = false
+    FROM jsonb_array_elements(scanned->'bank_transfers') AS scanned_range
+    WHERE t.pending_match AND t.id BETWEEN (scanned_range->>0)::INTEGER AND (scanned_range->>1)::INTEGER;
+    UPDATE invoices i SET pending_match = false
+    FROM jsonb_array_elements(scanned->'invoices') AS scanned_range
+    WHERE i.pending_match AND i.id BETWEEN (scanned_range->>0)::INTEGER AND (scanned_range->>1)::INTEGER;
+    UPDATE receipts r SET pending_match = false
+    FROM jsonb_array_elements(scanned->'receipts') AS scanned_range
+    WHERE r.pending_match AND r.id BETWEEN (scanned_range->>0)::INTEGER AND (scanned_range->>1)::INTEGER;
+    UPDATE match_state SET one_to_one = exclusive, updated_at = now();
+
+    DELETE FROM transaction_matches;
+
+    INSERT INTO transaction_matches (bank_transaction_id, matched_table, matched_id, match_score)
+    SELECT
+        (m->>'bank_transaction_id')::INTEGER,
+        m->>'matched_table',
+        (m->>'matched_id')::INTEGER,
+        (m->>'match_score')::FLOAT
+    FROM jsonb_array_elements(matches) AS m;
+
+    GET DIAGNOSTICS saved = ROW_COUNT;
+    PERFORM refresh_reconciliation_views();
+    RETURN saved;
+END;
+$$;
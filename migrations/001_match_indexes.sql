@@ -0,0 +1,23 @@
+-- מיגרציה לבסיסי נתונים קיימים שנוצרו לפני הוספת האינדקסים וההתאמה המצטברת.
+-- ניתן להריץ שוב ושוב; לאחר מכן יש לטעון מחדש את matching_functions.sql
+
+ALTER TABLE transaction_matches ADD COLUMN IF NOT EXISTS match_score FLOAT;
+
+CREATE TABLE IF NOT EXISTS match_watermarks (
+    table_name VARCHAR(50) PRIMARY KEY,
+    last_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT now()
+);
+
+-- אינדקסים להתאמות: צירוף על ABS(amount) וחלון תאריכים בכל טבלת מקור
+CREATE INDEX IF NOT EXISTS idx_bank_transactions_abs_amount_date ON bank_transactions ((ABS(amount)), date);
+CREATE INDEX IF NOT EXISTS idx_checks_abs_amount_date ON checks ((ABS(amount)), date);
+CREATE INDEX IF NOT EXISTS idx_bank_transfers_abs_amount_date ON bank_transfers ((ABS(amount)), date);
+CREATE INDEX IF NOT EXISTS idx_invoices_abs_amount_date ON invoices ((ABS(amount)), date);
+CREATE INDEX IF NOT EXISTS idx_receipts_abs_amount_date ON receipts ((ABS(amount)), date);
+
+-- אינדקסים על טבלת ההתאמות לחיפוש לפי מסמך ולפי עסקת בנק
+CREATE INDEX IF NOT EXISTS idx_transaction_matches_matched ON transaction_matches (matched_table, matched_id);
+CREATE INDEX IF NOT EXISTS idx_transaction_matches_bank_transaction ON transaction_matches (bank_transaction_id);
+
+ANALYZE bank_transactions, checks, bank_transfers, invoices, receipts, transaction_matches;
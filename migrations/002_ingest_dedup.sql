@@ -0,0 +1,23 @@
+-- מיגרציה: קליטה אידמפוטנטית של קבצים.
+-- מפתח טבעי לכל שורה (ON CONFLICT DO NOTHING בהעלאה) ויומן hash של קבצים שנקלטו
+
+ALTER TABLE bank_transactions ADD COLUMN IF NOT EXISTS natural_key VARCHAR(32);
+ALTER TABLE checks ADD COLUMN IF NOT EXISTS natural_key VARCHAR(32);
+ALTER TABLE bank_transfers ADD COLUMN IF NOT EXISTS natural_key VARCHAR(32);
+ALTER TABLE invoices ADD COLUMN IF NOT EXISTS natural_key VARCHAR(32);
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS natural_key VARCHAR(32);
+
+-- שורות ישנות נשארות עם NULL, ולכן אינן מתנגשות באינדקס הייחודי
+CREATE UNIQUE INDEX IF NOT EXISTS bank_transactions_natural_key_key ON bank_transactions (natural_key);
+CREATE UNIQUE INDEX IF NOT EXISTS checks_natural_key_key ON checks (natural_key);
+CREATE UNIQUE INDEX IF NOT EXISTS bank_transfers_natural_key_key ON bank_transfers (natural_key);
+CREATE UNIQUE INDEX IF NOT EXISTS invoices_natural_key_key ON invoices (natural_key);
+CREATE UNIQUE INDEX IF NOT EXISTS receipts_natural_key_key ON receipts (natural_key);
+
+CREATE TABLE IF NOT EXISTS ingest_ledger (
+    file_hash CHAR(64) PRIMARY KEY,
+    file_name TEXT,
+    table_name VARCHAR(50),
+    row_count INT,
+    ingested_at TIMESTAMP DEFAULT now()
+);
@@ -0,0 +1,6 @@
+-- מיגרציה: אינדקס תאריכים לסטטיסטיקות החודשיות של הדשבורד.
+-- לאחר מכן יש לטעון מחדש את matching_functions.sql (get_monthly_match_stats)
+
+CREATE INDEX IF NOT EXISTS idx_bank_transactions_date ON bank_transactions (date);
+
+ANALYZE bank_transactions;
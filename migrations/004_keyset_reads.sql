@@ -0,0 +1,6 @@
+-- מיגרציה: אינדקס לקריאת פרטי ההתאמות בעמודים לפי (match_date, id).
+-- לאחר מכן יש לטעון מחדש את matching_functions.sql (get_match_details_page)
+
+CREATE INDEX IF NOT EXISTS idx_transaction_matches_match_date_id ON transaction_matches (match_date, id);
+
+ANALYZE transaction_matches;
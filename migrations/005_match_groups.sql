@@ -0,0 +1,21 @@
+-- מיגרציה: קבוצות התאמה לתשלומים מפוצלים.
+-- לאחר מכן יש לטעון מחדש את matching_functions.sql (save_match_groups, get_match_groups, get_unmatched_transactions)
+
+CREATE TABLE IF NOT EXISTS match_groups (
+    id SERIAL PRIMARY KEY,
+    match_type VARCHAR(20) NOT NULL,
+    matched_table VARCHAR(50) NOT NULL,
+    total_amount NUMERIC NOT NULL,
+    amount_delta NUMERIC NOT NULL DEFAULT 0,
+    match_score FLOAT,
+    match_date TIMESTAMP DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS match_group_items (
+    group_id INT NOT NULL REFERENCES match_groups(id) ON DELETE CASCADE,
+    bank_transaction_id INT NOT NULL REFERENCES bank_transactions(id),
+    matched_id INT NOT NULL,
+    PRIMARY KEY (group_id, bank_transaction_id, matched_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_match_group_items_bank_transaction ON match_group_items (bank_transaction_id);
@@ -0,0 +1,60 @@
+-- מיגרציה: views ממומשים לפרטי ההתאמות ולעסקאות ללא התאמה, עם אינדקסים למסנני הדשבורד.
+-- get_match_details_page מקבלת מסננים חדשים, ולכן החתימה הישנה נמחקת לפני טעינה מחדש של matching_functions.sql
+
+DROP FUNCTION IF EXISTS get_match_details_page(TIMESTAMP, INTEGER, INTEGER);
+
+-- פרטי ההתאמות עם שדות המסמך המותאם - מחושבים פעם אחת בכל ריצת התאמה במקום ארבעה LEFT JOIN בכל קריאה.
+-- מתרענן ב-refresh_reconciliation_views() בסוף כל פונקציה שכותבת התאמות
+CREATE MATERIALIZED VIEW IF NOT EXISTS match_details_mv AS
+SELECT
+    tm.id AS match_id,
+    tm.bank_transaction_id,
+    bt.date AS bank_date,
+    bt.amount AS bank_amount,
+    bt.description AS bank_description,
+    tm.matched_table::TEXT AS matched_table,
+    tm.matched_id,
+    CASE
+        WHEN tm.matched_table = 'checks' THEN c.date
+        WHEN tm.matched_table = 'bank_transfers' THEN t.date
+        WHEN tm.matched_table = 'invoices' THEN i.date
+        WHEN tm.matched_table = 'receipts' THEN r.date
+    END AS matched_date,
+    CASE
+        WHEN tm.matched_table = 'checks' THEN c.amount
+        WHEN tm.matched_table = 'bank_transfers' THEN t.amount
+        WHEN tm.matched_table = 'invoices' THEN i.amount
+        WHEN tm.matched_table = 'receipts' THEN r.amount
+    END AS matched_amount,
+    (CASE
+        WHEN tm.matched_table = 'checks' THEN c.check_number
+        WHEN tm.matched_table = 'bank_transfers' THEN t.reference_number
+        WHEN tm.matched_table = 'invoices' THEN i.invoice_number
+        WHEN tm.matched_table = 'receipts' THEN r.receipt_number
+    END)::TEXT AS matched_reference,
+    tm.match_score,
+    tm.match_date
+FROM transaction_matches tm
+JOIN bank_transactions bt ON tm.bank_transaction_id = bt.id
+LEFT JOIN checks c ON tm.matched_table = 'checks' AND tm.matched_id = c.id
+LEFT JOIN bank_transfers t ON tm.matched_table = 'bank_transfers' AND tm.matched_id = t.id
+LEFT JOIN invoices i ON tm.matched_table = 'invoices' AND tm.matched_id = i.id
+LEFT JOIN receipts r ON tm.matched_table = 'receipts' AND tm.matched_id = r.id;
+
+-- עסקאות בנק שאין להן התאמה ואינן חלק מקבוצת התאמה (תשלום מפוצל)
+CREATE MATERIALIZED VIEW IF NOT EXISTS unmatched_bank_mv AS
+SELECT bt.id, bt.date, bt.amount, bt.description
+FROM bank_transactions bt
+WHERE NOT EXISTS (SELECT 1 FROM transaction_matches tm WHERE tm.bank_transaction_id = bt.id)
+  AND NOT EXISTS (SELECT 1 FROM match_group_items gi WHERE gi.bank_transaction_id = bt.id);
+
+-- אינדקס ייחודי בכל view - תנאי ל-REFRESH CONCURRENTLY, שלא חוסם קריאות של הדשבורד בזמן הרענון
+CREATE UNIQUE INDEX IF NOT EXISTS idx_match_details_mv_match_id ON match_details_mv (match_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_unmatched_bank_mv_id ON unmatched_bank_mv (id);
+-- קריאה בעמודים לפי (match_date, match_id) ומסנני הדשבורד: טווח תאריכים וטבלת מקור
+CREATE INDEX IF NOT EXISTS idx_match_details_mv_match_date_id ON match_details_mv (match_date, match_id);
+CREATE INDEX IF NOT EXISTS idx_match_details_mv_bank_date ON match_details_mv (bank_date);
+CREATE INDEX IF NOT EXISTS idx_match_details_mv_matched_table_bank_date ON match_details_mv (matched_table, bank_date);
+CREATE INDEX IF NOT EXISTS idx_unmatched_bank_mv_date ON unmatched_bank_mv (date);
+
+ANALYZE match_details_mv, unmatched_bank_mv;
@@ -0,0 +1,52 @@
+-- מיגרציה: סימון שורות שטרם נסרקו (pending_match) במקום סימניית MAX(id) ב-match_watermarks.
+-- מזהה SERIAL נקבע בהכנסה ולא בסיום הטרנזקציה, ולכן שורה שנכתבה בטרנזקציה ארוכה יכלה להיות גלויה
+-- רק אחרי שהסימנייה כבר עברה את המזהה שלה - ולא להיסרק לעולם. הסימון נמחק רק לשורות שנסרקו בפועל.
+-- לאחר מכן יש לטעון מחדש את matching_functions.sql
+
+-- ברירת המחדל false בהוספה (בלי לכתוב מחדש את הטבלה), ו-true לשורות שייכנסו מעכשיו
+ALTER TABLE bank_transactions ADD COLUMN IF NOT EXISTS pending_match BOOLEAN NOT NULL DEFAULT false;
+ALTER TABLE checks ADD COLUMN IF NOT EXISTS pending_match BOOLEAN NOT NULL DEFAULT false;
+ALTER TABLE bank_transfers ADD COLUMN IF NOT EXISTS pending_match BOOLEAN NOT NULL DEFAULT false;
+ALTER TABLE invoices ADD COLUMN IF NOT EXISTS pending_match BOOLEAN NOT NULL DEFAULT false;
+ALTER TABLE receipts ADD COLUMN IF NOT EXISTS pending_match BOOLEAN NOT NULL DEFAULT false;
+
+ALTER TABLE bank_transactions ALTER COLUMN pending_match SET DEFAULT true;
+ALTER TABLE checks ALTER COLUMN pending_match SET DEFAULT true;
+ALTER TABLE bank_transfers ALTER COLUMN pending_match SET DEFAULT true;
+ALTER TABLE invoices ALTER COLUMN pending_match SET DEFAULT true;
+ALTER TABLE receipts ALTER COLUMN pending_match SET DEFAULT true;
+
+-- מסומנות: שורות מעבר לסימנייה, ושורות שלא הותאמו - ביניהן גם שורות שהסימנייה דילגה עליהן.
+-- סריקה חוזרת של שורה שכבר נסרקה לא משנה את התוצאה
+DO $$
+BEGIN
+    IF to_regclass('match_watermarks') IS NOT NULL THEN
+        UPDATE bank_transactions bt SET pending_match = true
+        WHERE bt.id > COALESCE((SELECT last_id FROM match_watermarks WHERE table_name = 'bank_transactions'), 0)
+           OR NOT EXISTS (SELECT 1 FROM transaction_matches tm WHERE tm.bank_transaction_id = bt.id);
+        UPDATE checks c SET pending_match = true
+        WHERE c.id > COALESCE((SELECT last_id FROM match_watermarks WHERE table_name = 'checks'), 0)
+           OR NOT EXISTS (SELECT 1 FROM transaction_matches tm WHERE tm.matched_table = 'checks' AND tm.matched_id = c.id);
+        UPDATE bank_transfers t SET pending_match = true
+        WHERE t.id > COALESCE((SELECT last_id FROM match_watermarks WHERE table_name = 'bank_transfers'), 0)
+           OR NOT EXISTS (SELECT 1 FROM transaction_matches tm WHERE tm.matched_table = 'bank_transfers' AND tm.matched_id = t.id);
+        UPDATE invoices i SET pending_match = true
+        WHERE i.id > COALESCE((SELECT last_id FROM match_watermarks WHERE table_name = 'invoices'), 0)
+           OR NOT EXISTS (SELECT 1 FROM transaction_matches tm WHERE tm.matched_table = 'invoices' AND tm.matched_id = i.id);
+        UPDATE receipts r SET pending_match = true
+        WHERE r.id > COALESCE((SELECT last_id FROM match_watermarks WHERE table_name = 'receipts'), 0)
+           OR NOT EXISTS (SELECT 1 FROM transaction_matches tm WHERE tm.matched_table = 'receipts' AND tm.matched_id = r.id);
+    END IF;
+END;
+$$;
+
+DROP TABLE IF EXISTS match_watermarks;
+
+-- שורות שטרם נסרקו בהתאמה (pending_match) - ההתאמה המצטברת מוצאת אותן בלי לסרוק את הטבלה
+CREATE INDEX IF NOT EXISTS idx_bank_transactions_pending ON bank_transactions (id) WHERE pending_match;
+CREATE INDEX IF NOT EXISTS idx_checks_pending ON checks (id) WHERE pending_match;
+CREATE INDEX IF NOT EXISTS idx_bank_transfers_pending ON bank_transfers (id) WHERE pending_match;
+CREATE INDEX IF NOT EXISTS idx_invoices_pending ON invoices (id) WHERE pending_match;
+CREATE INDEX IF NOT EXISTS idx_receipts_pending ON receipts (id) WHERE pending_match;
+
+ANALYZE bank_transactions, checks, bank_transfers, invoices, receipts;
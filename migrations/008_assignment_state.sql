@@ -0,0 +1,12 @@
+-- מיגרציה: save_assigned_matches מקבלת את טווחי המזהים שנקראו בפועל ואת סוג ההשמה, ו-match_state
+-- שומר אם ההתאמות השמורות הן אחד-לאחד כדי שהריצה המצטברת תשמור על כך.
+-- החתימה הישנה נמחקת לפני טעינה מחדש של matching_functions.sql
+
+DROP FUNCTION IF EXISTS save_assigned_matches(JSONB);
+
+CREATE TABLE IF NOT EXISTS match_state (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    one_to_one BOOLEAN NOT NULL DEFAULT false,
+    updated_at TIMESTAMP DEFAULT now()
+);
+INSERT INTO match_state DEFAULT VALUES ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,6 @@
+-- מיגרציה: הריצה המצטברת לא מרעננת את match_details_mv ו-unmatched_bank_mv בעצמה אלא מסמנת
+-- views_stale, והרענון נעשה ב-refresh_stale_views לפי דרישה ולכל היותר פעם בפרק זמן.
+-- לאחר מכן יש לטעון מחדש את matching_functions.sql
+
+ALTER TABLE match_state ADD COLUMN IF NOT EXISTS views_stale BOOLEAN NOT NULL DEFAULT false;
+ALTER TABLE match_state ADD COLUMN IF NOT EXISTS views_refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now();
@@ -0,0 +1,51 @@
+import logging
+
+logger = logging.getLogger('financial_matcher')
+
+
+class LogNotifier:
+    """הודעות ללא ממשק משתמש - נכתבות ללוג ונשמרות ברשימה לדוח הריצה (CLI או עבודה בשירות)"""
+
+    def __init__(self, log=logger):
+        self.log = log
+        self.messages = []
+
+    def _add(self, level, message):
+        self.messages.append({'level': level, 'message': message})
+        self.log.log(getattr(logging, level.upper()), message)
+
+    def error(self, message):
+        self._add('error', message)
+
+    def warning(self, message):
+        self._add('warning', message)
+
+    def info(self, message):
+        self._add('info', message)
+
+    def progress(self, label=''):
+        """פונקציית עדכון (חלק בין 0 ל-1, טקסט) - בלוג ברמת debug בלבד"""
+        def update(fraction, text=''):
+            self.log.debug("%s %.0f%% %s", label, fraction * 100, text)
+        return update
+
+
+class StreamlitNotifier:
+    """הודעות ופסי התקדמות בדף Streamlit"""
+
+    def __init__(self):
+        import streamlit as st
+        self.st = st
+
+    def error(self, message):
+        self.st.error(message)
+
+    def warning(self, message):
+        self.st.warning(message)
+
+    def info(self, message):
+        self.st.caption(message)
+
+    def progress(self, label=''):
+        bar = self.st.progress(0.0, text=label or None)
+        return lambda fraction, text='': bar.progress(fraction, text=text)
@@ -0,0 +1,101 @@
+import os
+import hashlib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# תיקיית ברירת המחדל למטמון OCR - ניתן לשנות דרך OCR_CACHE_DIR
+DEFAULT_CACHE_DIR = Path(os.getenv("OCR_CACHE_DIR", Path.home() / ".cache" / "financial-matcher" / "ocr"))
+
+
+class OCRFallback:
+    """OCR לעמודים ללא שכבת טקסט: רסטריזציה, Tesseract במאגר עובדים ומטמון בדיסק"""
+
+    def __init__(self, dpi=300, lang='heb+eng', max_workers=None, cache_dir=None):
+        self.dpi = dpi
+        self.lang = lang
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.timings = []
+
+    def page_key(self, page):
+        """hash של תוכן העמוד (זרמי התוכן והתמונות שבו) יחד עם הגדרות ה-OCR"""
+        from pdfminer.pdftypes import resolve1
+
+        digest = hashlib.sha256(f"{self.dpi}:{self.lang}".encode())
+        page_obj = page.page_obj
+        for stream in page_obj.contents:
+            digest.update(resolve1(stream).get_data() or b'')
+        xobjects = resolve1(page_obj.resources.get('XObject', {})) or {}
+        for name in sorted(xobjects):
+            xobject = resolve1(xobjects[name])
+            if hasattr(xobject, 'get_data'):
+                digest.update(xobject.get_data() or b'')
+        return digest.hexdigest()
+
+    def _cache_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.txt"
+
+    def _read_cache(self, key):
+        path = self._cache_path(key)
+        return path.read_text(encoding='utf-8') if path.exists() else None
+
+    def _write_cache(self, key, text):
+        path = self._cache_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # כתיבה לקובץ זמני והחלפה, כדי שתהליכים מקבילים לא יקראו קובץ חלקי
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(text, encoding='utf-8')
+        os.replace(temp_path, path)
+
+    def _run_tesseract(self, page_number, key, image, rasterize_seconds):
+        import pytesseract
+
+        started = time.perf_counter()
+        text = pytesseract.image_to_string(image, lang=self.lang)
+        self._write_cache(key, text)
+        self.timings.append({
+            'page': page_number,
+            'cached': False,
+            'rasterize_seconds': rasterize_seconds,
+            'ocr_seconds': time.perf_counter() - started
+        })
+        return text
+
+    def _submit(self, executor, page_number, page):
+        """מחזיר טקסט מהמטמון, או Future של הרצת Tesseract על העמוד"""
+        key = self.page_key(page)
+        cached = self._read_cache(key)
+        if cached is not None:
+            self.timings.append({'page': page_number, 'cached': True, 'rasterize_seconds': 0.0, 'ocr_seconds': 0.0})
+            return cached
+
+        # הרסטריזציה נעשית בתהליך הראשי - pdfium אינו בטוח לשימוש ממספר חוטים
+        started = time.perf_counter()
+        image = page.to_image(resolution=self.dpi).original
+        return executor.submit(self._run_tesseract, page_number, key, image, time.perf_counter() - started)
+
+    def iter_texts(self, pages):
+        """טקסט לכל עמוד לפי הסדר; עמודים ריקים עוברים OCR במקביל עם חלון קדימה בגודל המאגר"""
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        window = deque()
+        try:
+            for page_number, page in enumerate(pages):
+                text = page.extract_text() or ""
+                window.append(text if text.strip() else self._submit(executor, page_number, page))
+                page.close()
+
+                while window and (isinstance(window[0], str) or len(window) > self.max_workers):
+                    item = window.popleft()
+                    yield item if isinstance(item, str) else item.result()
+
+            while window:
+                item = window.popleft()
+                yield item if isinstance(item, str) else item.result()
+        finally:
+            # הצרכן עצר מוקדם - ביטול עמודים שעוד לא התחילו
+            for item in window:
+                if not isinstance(item, str):
+                    item.cancel()
+            executor.shutdown(wait=True)
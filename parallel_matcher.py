@@ -0,0 +1,233 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from match_engine import MatchEngine, SOURCE_TABLES
+
+# מספר דליי ה-hash של הסכום בכל חודש - סכום מדויק תמיד נופל לאותו דלי
+DEFAULT_AMOUNT_BUCKETS = 16
+# מספר המשימות לכל תהליך, כדי שמחיצה כבדה אחת לא תשאיר תהליכים אחרים בהמתנה
+TASKS_PER_WORKER = 4
+# עמודת החברה, אם קיימת - התאמות לא חוצות חברות
+COMPANY_COLUMN = 'company_id'
+# מספר קבוע לכל טבלת מקור, לפי הסדר ב-SOURCE_TABLES
+SOURCE_TABLES_ORDER = {name: code for code, name in enumerate(SOURCE_TABLES)}
+# חפיפה לחודש הסמוך בלבד - חלון ארוך יותר מהחודש הקצר ביותר יחייב שכפול לכמה חודשים
+MAX_TOLERANCE_DAYS = 27
+
+
+def _month_index(days):
+    """מספר חודש רציף (שנה*12 + חודש) מימים מאז 1970-01-01"""
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+
+
+def _month_start(months):
+    return months.astype('datetime64[M]').astype('datetime64[D]').astype('int64')
+
+
+class SharedArrays:
+    """מערכי NumPy בזיכרון משותף - התהליכים מצטרפים לפי שם במקום לקבל עותק מכווץ"""
+
+    def __init__(self, arrays):
+        self.blocks = {}
+        self.spec = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self.blocks[name] = block
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(spec):
+    """מבטים על המערכים המשותפים; הבלוקים מוחזרים כדי שלא ייסגרו לפני סוף העבודה"""
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+
+def _partition_keys(arrays, side, start, end):
+    """(מזהים, סנטים, ימים, מפתח מיון) של טווח שורות - באותו מבנה כמו MatchEngine._keys"""
+    cents = arrays[f'{side}_cents'][start:end]
+    days = arrays[f'{side}_days'][start:end]
+    return arrays[f'{side}_ids'][start:end], cents, days, MatchEngine.sort_key(cents, days)
+
+
+def _match_partitions(spec, tolerance_days, tasks):
+    """ריצת ההתאמה על רשימת מחיצות בתהליך עובד.
+
+    tasks היא רשימה של (טווח עסקאות הבנק, טווח המסמכים) במערכים הממוינים לפי מחיצה
+    """
+    blocks, arrays = _attach(spec)
+    try:
+        engine = MatchEngine(tolerance_days=tolerance_days)
+        parts = []
+        for (bank_start, bank_end), (doc_start, doc_end) in tasks:
+            if bank_start == bank_end or doc_start == doc_end:
+                continue
+            bank = _partition_keys(arrays, 'bank', bank_start, bank_end)
+            documents = _partition_keys(arrays, 'doc', doc_start, doc_end)
+            bank_index, doc_index = engine._window_join(bank, documents)
+            parts.append(np.stack([
+                bank[0][bank_index],
+                arrays['doc_table'][doc_start:doc_end][doc_index],
+                documents[0][doc_index],
+                bank[2][bank_index] - documents[2][doc_index]
+            ]))
+        return np.concatenate(parts, axis=1) if parts else np.empty((4, 0), dtype='int64')
+    finally:
+        # המבטים צריכים להשתחרר לפני סגירת הבלוקים
+        del arrays
+        for block in blocks:
+            block.close()
+
+
+class ParallelMatchEngine(MatchEngine):
+    """אותה התאמה כמו MatchEngine, מחולקת למחיצות (חברה, חודש, hash של הסכום) ומורצת במקביל.
+
+    כל עסקת בנק שייכת למחיצה אחת לפי התאריך שלה. מסמכים בקצה חודש, בטווח tolerance_days
+    מהחודש הסמוך, משוכפלים גם למחיצה הסמוכה, כך שלכל עסקה יש בתוך המחיצה את כל המועמדים שלה.
+    המערכים עוברים לתהליכים בזיכרון משותף, והתוצאות ממוזגות בסדר קבוע שאינו תלוי בתזמון
+    """
+
+    def __init__(self, tolerance_days=3, min_score=0.7, workers=None, amount_buckets=DEFAULT_AMOUNT_BUCKETS):
+        if tolerance_days > MAX_TOLERANCE_DAYS:
+            raise ValueError(f"חלון התאריכים בהתאמה מקבילית מוגבל ל-{MAX_TOLERANCE_DAYS} ימים")
+        super().__init__(tolerance_days, min_score)
+        self.workers = workers or os.cpu_count() or 1
+        self.amount_buckets = amount_buckets
+        self.stats = {}
+
+    def _partitions(self, df, company_codes):
+        """רכיבי מפתח המחיצה לכל שורה: (חברה, חודש, דלי סכום)"""
+        ids, cents, days = self.columns(df)
+        months = _month_index(days)
+        buckets = pd.util.hash_array(cents).astype('uint64') % np.uint64(self.amount_buckets)
+        return ids, cents, days, months, company_codes, buckets.astype('int64')
+
+    @staticmethod
+    def _partition_id(company, month, bucket, buckets):
+        return (company * (1 << 24) + month) * buckets + bucket
+
+    def match_transactions(self, bank_df, sources):
+        """כל ההתאמות האפשריות עם ציון - זהות לאלה של MatchEngine, בסדר דטרמיניסטי"""
+        frames = [(name, df) for name, df in ((t, sources.get(t)) for t in SOURCE_TABLES)
+                  if df is not None and not df.empty]
+        if bank_df.empty or not frames:
+            return super().match_transactions(bank_df, {})
+
+        # קודי חברה משותפים לבנק ולמסמכים. חלוקה לפי חברה רק כשהעמודה קיימת בכל הטבלאות -
+        # אחרת שורות בלי חברה היו מקבלות קוד 0 ולא היו מותאמות לאף שורה עם חברה
+        companies = pd.Index([])
+        if all(COMPANY_COLUMN in df.columns for df in [bank_df] + [df for _, df in frames]):
+            companies = pd.Index(pd.concat(
+                [bank_df[COMPANY_COLUMN]] + [df[COMPANY_COLUMN] for _, df in frames]
+            ).dropna().unique())
+
+        def company_codes(df):
+            if not len(companies):
+                return np.zeros(len(df), dtype='int64')
+            return companies.get_indexer(df[COMPANY_COLUMN]).astype('int64') + 1
+
+        bank_ids, bank_cents, bank_days, bank_months, bank_company, bank_bucket = self._partitions(
+            bank_df, company_codes(bank_df)
+        )
+        bank_partition = self._partition_id(bank_company, bank_months, bank_bucket, self.amount_buckets)
+
+        doc_columns = {'ids': [], 'cents': [], 'days': [], 'table': [], 'partition': []}
+        for table_name, df in frames:
+            ids, cents, days, months, company, bucket = self._partitions(df, company_codes(df))
+            # עותק למחיצה של החודש שלו, ועותק לחודש הסמוך אם התאריך קרוב לקצה
+            next_start, month_start = _month_start(months + 1), _month_start(months)
+            copies = [
+                (np.ones(len(df), dtype=bool), months),
+                (days - month_start < self.tolerance_days, months - 1),
+                (next_start - days <= self.tolerance_days, months + 1)
+            ]
+            table_code = SOURCE_TABLES_ORDER[table_name]
+            for mask, month in copies:
+                doc_columns['ids'].append(ids[mask])
+                doc_columns['cents'].append(cents[mask])
+                doc_columns['days'].append(days[mask])
+                doc_columns['table'].append(np.full(int(mask.sum()), table_code, dtype='int64'))
+                doc_columns['partition'].append(
+                    self._partition_id(company[mask], month[mask], bucket[mask], self.amount_buckets)
+                )
+        docs = {name: np.concatenate(values) for name, values in doc_columns.items()}
+
+        bank_order = np.argsort(bank_partition, kind='stable')
+        doc_order = np.argsort(docs['partition'], kind='stable')
+        bank_partition, doc_partition = bank_partition[bank_order], docs['partition'][doc_order]
+
+        # גבולות כל מחיצה של הבנק, והטווח המתאים במסמכים
+        partitions, bank_starts = np.unique(bank_partition, return_index=True)
+        bank_ends = np.r_[bank_starts[1:], len(bank_partition)]
+        doc_starts = np.searchsorted(doc_partition, partitions, side='left')
+        doc_ends = np.searchsorted(doc_partition, partitions, side='right')
+        tasks = self._balance(bank_starts, bank_ends, doc_starts, doc_ends)
+
+        arrays = {
+            'bank_ids': bank_ids[bank_order],
+            'bank_cents': bank_cents[bank_order],
+            'bank_days': bank_days[bank_order],
+            'doc_ids': docs['ids'][doc_order],
+            'doc_cents': docs['cents'][doc_order],
+            'doc_days': docs['days'][doc_order],
+            'doc_table': docs['table'][doc_order]
+        }
+        self.stats = {'partitions': len(partitions), 'tasks': len(tasks), 'workers': self.workers,
+                      'documents_with_overlap': len(doc_partition)}
+
+        with SharedArrays(arrays) as shared:
+            if self.workers == 1:
+                results = [_match_partitions(shared.spec, self.tolerance_days, task) for task in tasks]
+            else:
+                context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+                    results = list(pool.map(_match_partitions, [shared.spec] * len(tasks),
+                                            [self.tolerance_days] * len(tasks), tasks))
+
+        return self._merge(results)
+
+    def _balance(self, bank_starts, bank_ends, doc_starts, doc_ends):
+        """חלוקת המחיצות למשימות בגודל דומה (לפי מספר שורות), ברצף ובסדר קבוע"""
+        sizes = (bank_ends - bank_starts) + (doc_ends - doc_starts)
+        count = min(len(sizes), self.workers * TASKS_PER_WORKER)
+        cuts = np.searchsorted(np.cumsum(sizes), np.linspace(0, sizes.sum(), count + 1)[1:-1])
+        tasks = []
+        for indices in np.split(np.arange(len(sizes)), cuts):
+            if len(indices):
+                tasks.append([((int(bank_starts[i]), int(bank_ends[i])), (int(doc_starts[i]), int(doc_ends[i])))
+                              for i in indices])
+        return tasks
+
+    def _merge(self, results):
+        """איחוד התוצאות: מיון לפי ציון ואז טבלה, עסקת בנק ומסמך - אותה תוצאה בכל מספר תהליכים"""
+        bank_ids, tables, matched_ids, day_delta = np.concatenate(results, axis=1)
+        scores = self._score(day_delta)
+        order = np.lexsort((matched_ids, bank_ids, tables, -scores))
+        return pd.DataFrame({
+            'bank_transaction_id': bank_ids[order],
+            'matched_table': np.array(list(SOURCE_TABLES), dtype=object)[tables[order]],
+            'matched_id': matched_ids[order],
+            'match_score': scores[order]
+        })
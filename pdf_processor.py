@@ -0,0 +1,121 @@
+import os
+import io
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ocr_fallback import OCRFallback
+from field_extractor import FieldExtractor
+
+
+class PDFProcessor:
+    # מחלץ שדות משותף - התבניות מקומפלות ותבניות הספקים נטענות פעם אחת לכל תהליך
+    field_extractor = FieldExtractor()
+    
+    # מספר העמודים המקסימלי שנסרק לכל מסמך - התאריך, הסכום והאסמכתא כמעט תמיד בעמוד הראשון
+    MAX_PAGES = 10
+    
+    @staticmethod
+    def iter_page_texts(pdf_file, max_pages=None, ocr=None):
+        """חילוץ טקסט עמוד אחר עמוד - עמוד נפתח רק כשהצרכן מבקש אותו
+
+        כאשר ocr הוא OCRFallback, עמודים ללא שכבת טקסט עוברים OCR
+        """
+        import pdfplumber
+
+        with pdfplumber.open(pdf_file) as pdf:
+            pages = pdf.pages if max_pages is None else pdf.pages[:max_pages]
+            if ocr is not None:
+                yield from ocr.iter_texts(pages)
+                return
+            
+            for page in pages:
+                # extract_text מחזיר None בעמוד ללא שכבת טקסט (למשל עמוד סרוק)
+                text = page.extract_text() or ""
+                page.close()
+                yield text
+    
+    @classmethod
+    def extract_text_from_pdf(cls, pdf_file, max_pages=None):
+        """חילוץ טקסט מקובץ PDF"""
+        return "\n".join(cls.iter_page_texts(pdf_file, max_pages)) + "\n"
+    
+    @classmethod
+    def extract_data_from_text(cls, text, doc_type):
+        """חילוץ נתונים מטקסט"""
+        return cls.extract_data_from_pages([text] if text else [], doc_type)
+    
+    @classmethod
+    def extract_data_from_pages(cls, pages, doc_type):
+        """חילוץ נתונים מזרם של עמודים - העצירה מיד כשכל השדות נמצאו"""
+        fields = cls.field_extractor.document(doc_type)
+        for text in pages:
+            if fields.feed(text):
+                break
+        
+        return fields.data
+    
+    @classmethod
+    def extract_data_from_pdf(cls, pdf_file, doc_type, max_pages=None, ocr=None):
+        """חילוץ נתונים ישירות מקובץ PDF בלי לבנות את הטקסט המלא"""
+        pages = cls.iter_page_texts(pdf_file, cls.MAX_PAGES if max_pages is None else max_pages, ocr)
+        try:
+            return cls.extract_data_from_pages(pages, doc_type)
+        finally:
+            # סגירת הקובץ גם כשהחילוץ הסתיים לפני העמוד האחרון
+            pages.close()
+
+
+def parse_pdf(name, content, doc_type, ocr_options=None):
+    """עיבוד קובץ PDF אחד בתהליך עובד - מחזיר רשומה לטבלה או הודעת שגיאה
+
+    ocr_options הם פרמטרים ל-OCRFallback; None מבטל את ה-OCR
+    """
+    result = {'name': name, 'doc_type': doc_type, 'record': None, 'error': None, 'ocr_timings': []}
+    ocr = OCRFallback(**ocr_options) if ocr_options is not None else None
+    try:
+        data = PDFProcessor.extract_data_from_pdf(io.BytesIO(content), doc_type, ocr=ocr)
+        if not all(data.values()):
+            result['error'] = f"לא ניתן היה לחלץ את כל הנתונים מהקובץ {name}"
+        else:
+            result['record'] = {
+                'date': data['date'],
+                'amount': data['amount'],
+                f'{doc_type}_number': data['reference']
+            }
+    except Exception as e:
+        result['error'] = f"שגיאה בקריאת קובץ PDF {name}: {str(e)}"
+    if ocr is not None:
+        result['ocr_timings'] = ocr.timings
+    return result
+
+
+class PDFBatchProcessor:
+    """חילוץ נתונים ממספר קבצי PDF במקביל במאגר תהליכים"""
+
+    def __init__(self, max_workers=None, ocr_options=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # המקביליות כבר ברמת הקבצים, ולכן ברירת המחדל היא עובד OCR אחד לכל תהליך
+        self.ocr_options = {'max_workers': 1} if ocr_options is None else ocr_options
+
+    def process(self, documents):
+        """documents הוא רשימה של (שם, תוכן בבתים, סוג מסמך)
+
+        מחזיר תוצאות לפי סדר הסיום; result['index'] הוא מיקום המסמך ברשימה
+        """
+        if not documents:
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(documents))) as executor:
+            futures = {
+                executor.submit(parse_pdf, name, content, doc_type, self.ocr_options): index
+                for index, (name, content, doc_type) in enumerate(documents)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                name, _, doc_type = documents[index]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # קריסת תהליך עובד על קובץ פגום לא עוצרת את שאר הקבצים
+                    result = {'name': name, 'doc_type': doc_type, 'record': None, 'ocr_timings': [],
+                              'error': f"שגיאה בעיבוד קובץ PDF {name}: {str(e)}"}
+                result['index'] = index
+                yield result
@@ -0,0 +1,123 @@
+import argparse
+import io
+import json
+import logging
+import sys
+from pathlib import Path
+
+from instrumentation import span
+from notifier import LogNotifier
+
+# סוג דף החשבון לפי מילות מפתח בשם הקובץ (באותיות קטנות), לפי סדר הבדיקה
+STATEMENT_KEYWORDS = {
+    'checks': ('שיק', 'check', 'cheque'),
+    'transfers': ('העבר', 'transfer'),
+    'bank': ('עו"ש', 'עוש', 'bank')
+}
+STATEMENT_SUFFIXES = ('.csv', '.xlsx')
+# מצבי ההתאמה של process_matches
+MATCH_MODES = ('incremental', 'full', 'one_to_one', 'tolerant')
+
+
+class LocalFile(io.BytesIO):
+    """קובץ מהדיסק או מהעלאה לשירות, עם name, size ו-getvalue() כמו UploadedFile של Streamlit"""
+
+    def __init__(self, name, content):
+        super().__init__(content)
+        self.name = name
+        self.size = len(content)
+
+    @classmethod
+    def from_path(cls, path):
+        path = Path(path)
+        return cls(path.name, path.read_bytes())
+
+
+def statement_type(name):
+    """bank, checks או transfers לפי שם הקובץ; None לקובץ שאינו דף חשבון מזוהה"""
+    lowered = name.lower()
+    if not lowered.endswith(STATEMENT_SUFFIXES):
+        return None
+    for file_type, keywords in STATEMENT_KEYWORDS.items():
+        if any(keyword in lowered for keyword in keywords):
+            return file_type
+    return None
+
+
+def document_type(name):
+    """סוג מסמך PDF לפי שם הקובץ, כמו בהעלאה בדף"""
+    lowered = name.lower()
+    return 'invoice' if 'חשבונית' in lowered or 'invoice' in lowered else 'receipt'
+
+
+def classify(files):
+    """(דפי חשבון, קבצי PDF, קבצים שדולגו) - שתי הרשימות הראשונות של (קובץ, סוג)"""
+    statements, pdfs, skipped = [], [], []
+    for file in files:
+        if file.name.lower().endswith('.pdf'):
+            pdfs.append((file, document_type(file.name)))
+        elif statement_type(file.name):
+            statements.append((file, statement_type(file.name)))
+        else:
+            skipped.append(file.name)
+    return statements, pdfs, skipped
+
+
+def reconcile(matcher, files, mode='incremental', groups=False, details=True):
+    """קליטת הקבצים והרצת ההתאמות בלי ממשק - מחזיר (דוח ריצה, טבלת ההתאמות).
+    details=False מחזיר None במקום טבלת ההתאמות; report['matches'] הוא תמיד מספר ההתאמות שהריצה שמרה"""
+    if mode not in MATCH_MODES:
+        raise ValueError(f"מצב התאמה לא מוכר: {mode}")
+
+    statements, pdfs, skipped = classify(files)
+    report = {'statements': {}, 'pdfs': len(pdfs), 'pdfs_ingested': 0, 'skipped': skipped}
+    with span('reconcile', mode=mode):
+        for file, file_type in statements:
+            report['statements'][file.name] = matcher.load_excel_file(file, file_type)
+        if pdfs:
+            report['pdfs_ingested'] = matcher.process_pdf_files(pdfs)
+
+        results = matcher.process_matches(incremental=mode == 'incremental', one_to_one=mode == 'one_to_one',
+                                          tolerant=mode == 'tolerant', details=details)
+        report['match_run'] = matcher.supabase.last_assignment_run if mode in ('one_to_one', 'tolerant') \
+            else matcher.supabase.last_match_run
+        report['matches'] = report['match_run'].get('matches_saved') or 0
+        if groups:
+            report['groups'] = len(matcher.process_group_matches())
+            report['group_run'] = matcher.supabase.last_group_run
+
+    report['ok'] = all(report['statements'].values()) and report['pdfs_ingested'] == len(pdfs)
+    report['messages'] = getattr(matcher.notifier, 'messages', [])
+    return report, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="התאמה ללא ממשק: קליטת כל דפי החשבון וקבצי ה-PDF שבתיקייה והרצת ההתאמות"
+    )
+    parser.add_argument('directory', type=Path)
+    parser.add_argument('--mode', choices=MATCH_MODES, default='incremental')
+    parser.add_argument('--groups', action='store_true', help="חיפוש תשלומים מפוצלים אחרי ההתאמה")
+    parser.add_argument('--output', type=Path, help="קובץ CSV לטבלת ההתאמות")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(levelname)s %(message)s')
+    # נטען רק כאן - פענוח הארגומנטים ו---help לא מחכים לספריות ההתאמה
+    from financial_matcher import FinancialMatcher
+
+    files = [LocalFile.from_path(path) for path in sorted(args.directory.iterdir()) if path.is_file()]
+    matcher = FinancialMatcher(LogNotifier())
+    if matcher.supabase is None:
+        return 2
+
+    report, results = reconcile(matcher, files, mode=args.mode, groups=args.groups)
+    if args.output:
+        results.to_csv(args.output, index=False)
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    print()
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import io
+
+import pandas as pd
+
+# מספר השורות בכל מנה בקליטה זורמת
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+class StatementReader:
+    """קריאת קובץ CSV/Excel במנות - בזיכרון נמצאת בכל רגע מנה אחת בלבד.
+
+    הערכים נקראים כמו שהם (טקסט ב-CSV, ערך התא ב-Excel) בלי הסקת טיפוס לכל מנה, וההמרה לסכום
+    ולתאריך נעשית ב-DataCleaner. אחרת עמודת טקסט כמו מספר שיק הייתה מתפרשת כמספר במנה עם תא ריק
+    ('123.0', בלי אפסים מובילים), והמפתח הטבעי היה תלוי בחלוקה למנות"""
+
+    def __init__(self, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+
+    def iter_chunks(self, file):
+        """מחזיר (DataFrame, חלק הקובץ שנקרא עד כה בין 0 ל-1) לכל מנה"""
+        name = getattr(file, 'name', '')
+        if name.endswith('.csv'):
+            return self._csv_chunks(file)
+        if name.endswith('.xlsx'):
+            return self._xlsx_chunks(file)
+        raise ValueError("פורמט קובץ לא נתמך. נא להשתמש ב-CSV או Excel")
+
+    def _csv_chunks(self, file):
+        file.seek(0, io.SEEK_END)
+        size = file.tell() or 1
+        file.seek(0)
+
+        with pd.read_csv(file, chunksize=self.chunk_rows, dtype=str) as chunks:
+            for chunk in chunks:
+                # המפענח קורא קדימה בבלוקים, ולכן המיקום בקובץ הוא הערכה מלמעלה
+                yield chunk, min(file.tell() / size, 1.0)
+
+    def _xlsx_chunks(self, file):
+        from openpyxl import load_workbook
+
+        # מצב read-only מזרים שורות מה-XML במקום לבנות את כל הגיליון בזיכרון
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            total_rows = max((sheet.max_row or 1) - 1, 1)
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+
+            columns = [str(column) if column is not None else f"Unnamed: {i}" for i, column in enumerate(header)]
+            batch, rows_read = [], 0
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                batch.append(row)
+                if len(batch) == self.chunk_rows:
+                    rows_read += len(batch)
+                    yield pd.DataFrame(batch, columns=columns, dtype=object), min(rows_read / total_rows, 1.0)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=columns, dtype=object), 1.0
+        finally:
+            workbook.close()
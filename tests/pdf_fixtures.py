@@ -0,0 +1,78 @@
+"""יצירת קבצי PDF קטנים עם טקסט עברי לבדיקות, ללא תלות בגופן מותקן.
+
+התווים העבריים מקודדים לבתים 0x80-0x9A ומפת ToUnicode מחזירה אותם לאותיות א-ת בחילוץ.
+"""
+
+_HEBREW_FIRST = 0x05D0
+_HEBREW_LAST = 0x05EA
+_HEBREW_BASE = 0x80
+
+
+def _encode(text):
+    encoded = bytearray()
+    for char in text:
+        code = ord(char)
+        if _HEBREW_FIRST <= code <= _HEBREW_LAST:
+            encoded.append(_HEBREW_BASE + code - _HEBREW_FIRST)
+        elif 32 <= code < 127:
+            if char in '()\\':
+                encoded.append(ord('\\'))
+            encoded.append(code)
+        else:
+            encoded.append(ord('?'))
+    return bytes(encoded)
+
+
+_TO_UNICODE = (
+    b"/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+    b"/CMapName /HebrewTest def /CMapType 2 def\n"
+    b"1 begincodespacerange <00> <FF> endcodespacerange\n"
+    b"2 beginbfrange\n<20> <7E> <0020>\n<80> <9A> <05D0>\nendbfrange\n"
+    b"endcmap CMapName currentdict /CMap defineresource pop end end\n"
+)
+
+
+def make_pdf(pages):
+    """pages היא רשימה של עמודים, כל עמוד רשימת שורות טקסט; מחזיר את תוכן הקובץ בבתים"""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    def stream(data, extra=b''):
+        return b'<< /Length %d %s>>\nstream\n' % (len(data), extra) + data + b'\nendstream'
+
+    to_unicode = add(stream(_TO_UNICODE))
+    widths = b' '.join([b'600'] * (0x9A - 32 + 1))
+    font = add(
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /FirstChar 32 /LastChar 154 '
+        b'/Widths [' + widths + b'] /ToUnicode %d 0 R >>' % to_unicode
+    )
+    pages_id = len(objects) + 1 + 2 * len(pages)
+
+    page_ids = []
+    for lines in pages:
+        content = b'BT /F1 12 Tf 14 TL 50 780 Td '
+        content += b' '.join(b'(' + _encode(line) + b') Tj T*' for line in lines)
+        content += b' ET'
+        content_id = add(stream(content))
+        page_ids.append(add(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>' % (pages_id, font, content_id)
+        ))
+
+    kids = b' '.join(b'%d 0 R' % page_id for page_id in page_ids)
+    assert add(b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % len(page_ids)) == pages_id
+    catalog = add(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, catalog, xref)
+    return bytes(output)
@@ -0,0 +1,82 @@
+"""תחליף בזיכרון ל-PostgREST עבור קריאות בעמודים, כולל מגבלת max-rows של השרת"""
+from types import SimpleNamespace
+
+
+class FakeQuery:
+    def __init__(self, server, rows):
+        self.server = server
+        self.rows = rows
+        self.columns = None
+        self.row_limit = None
+
+    def select(self, columns):
+        self.columns = None if columns == '*' else [column.strip() for column in columns.split(',')]
+        return self
+
+    def gt(self, column, value):
+        self.rows = [row for row in self.rows if row[column] > value]
+        return self
+
+    def gte(self, column, value):
+        self.server.filters.append((column, 'gte', value))
+        self.rows = [row for row in self.rows if row[column] >= value]
+        return self
+
+    def lte(self, column, value):
+        self.server.filters.append((column, 'lte', value))
+        self.rows = [row for row in self.rows if row[column] <= value]
+        return self
+
+    def order(self, column):
+        self.rows = sorted(self.rows, key=lambda row: row[column])
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        rows = self.server.cap(self.rows[:self.row_limit])
+        if self.columns:
+            rows = [{column: row[column] for column in self.columns} for row in rows]
+        return SimpleNamespace(data=rows)
+
+
+class FakePostgrest:
+    def __init__(self, tables=None, match_details=None, max_rows=None, rpc_error=None):
+        self.tables = tables or {}
+        self.match_details = match_details or []
+        self.max_rows = max_rows
+        self.rpc_error = rpc_error
+        self.requests = []
+        self.filters = []
+
+    def cap(self, rows):
+        return rows[:self.max_rows] if self.max_rows else rows
+
+    def table(self, name):
+        self.requests.append(('table', name))
+        return FakeQuery(self, self.tables.get(name, []))
+
+    def rpc(self, name, params=None):
+        self.requests.append((name, params))
+        if name != 'get_match_details_page':
+            return SimpleNamespace(execute=self._raise)
+
+        # אותו סדר ותנאי keyset כמו ב-get_match_details_page
+        rows = sorted(self.match_details, key=lambda row: (row['match_date'], row['match_id']), reverse=True)
+        if params['after_match_date'] is not None:
+            cursor = (params['after_match_date'], params['after_id'])
+            rows = [row for row in rows if (row['match_date'], row['match_id']) < cursor]
+        # המסננים האופציונליים של get_match_details_page
+        if 'table_filter' in params:
+            rows = [row for row in rows if row['matched_table'] == params['table_filter']]
+        if 'from_date' in params:
+            rows = [row for row in rows if row['bank_date'] >= params['from_date']]
+        if 'to_date' in params:
+            rows = [row for row in rows if row['bank_date'] <= params['to_date']]
+        rows = self.cap(rows[:params['page_size']])
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=rows))
+
+    def _raise(self):
+        raise self.rpc_error or RuntimeError('function does not exist')
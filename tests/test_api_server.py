@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import api_server  # noqa: E402
+import data_access  # noqa: E402
+from job_queue import JobQueue  # noqa: E402
+from supabase_fakes import FakePostgrest  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    def fake_run_job(files, mode, groups):
+        calls.append(([(file.name, file.getvalue()) for file in files], mode, groups))
+        return {'report': {'ok': True, 'matches': 1}}
+
+    # ההתאמות נקראות בעמודים מהשרת; max-rows קטן מגודל העמוד המבוקש
+    server = FakePostgrest(match_details=[
+        {'match_id': i, 'match_date': f'2024-03-0{i}T00:00:00', 'bank_transaction_id': i, 'bank_date': '2024-03-01',
+         'matched_table': 'checks'} for i in range(1, 4)
+    ], max_rows=2)
+    jobs = JobQueue(workers=1, max_pending=2)
+    monkeypatch.setattr(api_server, 'run_job', fake_run_job)
+    monkeypatch.setattr(data_access, 'get_client', lambda: server)
+    monkeypatch.setattr(api_server, 'jobs', jobs)
+    with TestClient(api_server.app) as test_client:
+        test_client.calls = calls
+        yield test_client
+    jobs.shutdown()
+
+
+def _wait(client, job_id):
+    for _ in range(100):
+        status = client.get(f'/jobs/{job_id}').json()
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(status)
+
+
+def test_submit_status_and_result(client):
+    response = client.post('/jobs', files=[
+        ('files', ('bank.csv', b'a,b\n1,2\n', 'text/csv')),
+        ('files', ('invoice_1.pdf', b'%PDF', 'application/pdf'))
+    ], data={'mode': 'one_to_one', 'groups': 'true'})
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job['files'] == ['bank.csv', 'invoice_1.pdf']
+
+    status = _wait(client, job['id'])
+    assert status['report'] == {'ok': True, 'matches': 1}
+    assert client.calls == [([('bank.csv', b'a,b\n1,2\n'), ('invoice_1.pdf', b'%PDF')], 'one_to_one', True)]
+
+    first = client.get(f"/jobs/{job['id']}/result", params={'limit': 5}).json()
+    assert [match['match_id'] for match in first['matches']] == [3, 2]
+    assert first['next'] == {'after_match_date': '2024-03-02T00:00:00', 'after_id': 2}
+    second = client.get(f"/jobs/{job['id']}/result", params={'limit': 5, **first['next']}).json()
+    assert [match['match_id'] for match in second['matches']] == [1]
+    last = client.get(f"/jobs/{job['id']}/result", params={'limit': 5, **second['next']}).json()
+    assert last == {'matches': [], 'next': None}
+
+
+def test_errors(client):
+    assert client.get('/jobs/missing').status_code == 404
+    response = client.post('/jobs', files=[('files', ('bank.csv', b'', 'text/csv'))], data={'mode': 'fast'})
+    assert response.status_code == 422
+
+
+def test_full_queue_returns_503(client, monkeypatch):
+    monkeypatch.setattr(api_server, 'jobs', JobQueue(workers=0, max_pending=1))
+    files = [('files', ('bank.csv', b'', 'text/csv'))]
+
+    assert client.post('/jobs', files=files).status_code == 202
+    response = client.post('/jobs', files=files)
+    assert response.status_code == 503 and response.headers['retry-after'] == '30'
+    assert client.get('/health').json()['queued'] == 1
+
+
+def test_metrics(client):
+    with api_server.span('reconcile', mode='nightly'):
+        pass
+
+    assert 'financial_matcher_stage_calls_total{stage="reconcile",mode="nightly"}' in client.get('/metrics').text
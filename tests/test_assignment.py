@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from assignment import SparseAssignment, connected_components
+
+
+def _brute_force_weight(rows, cols, weights):
+    """משקל ההשמה המקסימלית - מעבר רקורסיבי על כל הבחירות לכל שורה"""
+    edges = {}
+    for row, col, weight in zip(rows.tolist(), cols.tolist(), weights.tolist()):
+        edges.setdefault(row, []).append((col, weight))
+    ordered = sorted(edges)
+
+    def best(position, used):
+        if position == len(ordered):
+            return 0.0
+        result = best(position + 1, used)
+        for col, weight in edges[ordered[position]]:
+            if col not in used:
+                result = max(result, weight + best(position + 1, used | {col}))
+        return result
+
+    return best(0, frozenset())
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_solution_is_optimal_matching(seed):
+    rng = np.random.default_rng(seed)
+    n_rows, n_cols = rng.integers(1, 7, 2)
+    pairs = rng.choice(n_rows * n_cols, rng.integers(1, n_rows * n_cols + 1), replace=False)
+    rows, cols = pairs // n_cols, pairs % n_cols
+    # ציונים בדידים כמו בהתאמה לפי ימים יוצרים הרבה שוויונות
+    weights = rng.choice([0.7, 0.75, 0.8, 1.0], len(pairs)) if seed % 2 else rng.random(len(pairs))
+
+    chosen = SparseAssignment().solve(rows, cols, weights)
+
+    assert len(set(rows[chosen])) == chosen.sum() == len(set(cols[chosen]))
+    assert weights[chosen].sum() == pytest.approx(_brute_force_weight(rows, cols, weights))
+
+
+def test_components_follow_chains():
+    # שרשרת 0-0-1-1-2 ורכיב נפרד 3-3
+    labels = connected_components(np.array([0, 1, 1, 2, 3]), np.array([0, 0, 1, 1, 3]), 4, 4)
+
+    assert len(set(labels[:4])) == 1
+    assert labels[4] != labels[0]
+
+
+def test_greedy_conflict_resolved_globally():
+    # החמדן לוקח את 0-0 (1.0) ומשאיר את שורה 1 בלי התאמה; האופטימום 0.9 + 0.9
+    assignment = SparseAssignment()
+
+    chosen = assignment.solve(np.array([0, 0, 1]), np.array([0, 1, 0]), np.array([1.0, 0.9, 0.9]))
+
+    assert chosen.tolist() == [False, True, True]
+    assert assignment.stats['augmenting'] == 1
+
+
+def test_equal_amount_day_proven_optimal_by_greedy_bound():
+    n = 200
+    rows, cols = np.repeat(np.arange(n), n), np.tile(np.arange(n), n)
+    weights = np.where(rows == cols, 1.0, 0.7)
+    assignment = SparseAssignment()
+
+    chosen = assignment.solve(rows, cols, weights)
+
+    assert weights[chosen].sum() == n
+    assert assignment.stats['greedy'] == 1
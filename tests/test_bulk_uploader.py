@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pandas as pd
+
+from bulk_uploader import BulkUploader
+
+
+class FakeTable:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.records = None
+
+    def insert(self, records):
+        self.records = records
+        return self
+
+    def execute(self):
+        return self.client.receive(self.name, self.records)
+
+
+class FakeClient:
+    """תחליף ל-PostgREST: שומר את המנות שהתקבלו ומאפשר להכשיל מנות מסוימות"""
+
+    def __init__(self, latency=0.0, failures=None):
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.rows = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+    def receive(self, name, records):
+        key = records[0]['id']
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            with self.lock:
+                if self.failures.get(key, 0) > 0:
+                    self.failures[key] -= 1
+                    raise RuntimeError(f'batch {key} rejected')
+                self.rows.setdefault(name, []).extend(records)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _frame(rows):
+    return pd.DataFrame({'id': range(rows), 'date': '2024-01-01', 'amount': 1.5})
+
+
+def test_all_rows_uploaded_concurrently():
+    client = FakeClient(latency=0.01)
+    progress = []
+
+    report = BulkUploader(client, batch_size=10, max_workers=4).upload(
+        _frame(95), 'bank_transactions', on_progress=lambda done, total: progress.append((done, total))
+    )
+
+    assert report.ok
+    assert report.rows_sent == 95 and report.batches_sent == 10
+    assert sorted(row['id'] for row in client.rows['bank_transactions']) == list(range(95))
+    assert client.max_in_flight > 1
+    assert progress[-1] == (95, 95)
+
+
+def test_transient_failure_is_retried():
+    client = FakeClient(failures={20: 2})
+
+    report = BulkUploader(client, batch_size=10, max_retries=3, backoff_seconds=0).upload(_frame(40), 'checks')
+
+    assert report.ok
+    assert report.retries == 2
+    assert len(client.rows['checks']) == 40
+
+
+def test_failed_batch_reported_without_aborting_file():
+    client = FakeClient(failures={10: 99})
+
+    report = BulkUploader(client, batch_size=10, max_retries=1, backoff_seconds=0).upload(_frame(40), 'checks')
+
+    assert not report.ok
+    assert [(batch['start'], batch['end']) for batch in report.failed_batches] == [(10, 20)]
+    assert 'batch 10 rejected' in report.failed_batches[0]['error']
+    assert report.rows_sent == 30
+    assert len(client.rows['checks']) == 30
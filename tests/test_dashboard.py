@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('plotly')
+pytest.importorskip('streamlit')
+
+from dashboard import DashboardManager  # noqa: E402
+from data_access import DataAccess, QueryCache  # noqa: E402
+from supabase_fakes import FakePostgrest  # noqa: E402
+
+
+class FakeClient:
+    """תחליף ל-Supabase: תשובה קבועה לכל RPC ורישום הקריאות"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def rpc(self, name, params=None):
+        self.calls.append((name, params))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self.responses[name]))
+
+
+def _dashboard(client):
+    dashboard = DashboardManager.__new__(DashboardManager)
+    dashboard.client = client
+    dashboard.data = DataAccess(client, QueryCache())
+    return dashboard
+
+
+def test_statistics_from_single_rpc():
+    client = FakeClient({'get_match_statistics': [{
+        'total_transactions': 8,
+        'matched_transactions': 6,
+        'total_amount_matched': '1500.50',
+        'total_amount_unmatched': '-20.00',
+        'matches_by_type': {'checks': 4, 'invoices': 2}
+    }]})
+
+    stats = _dashboard(client).get_match_statistics()
+
+    assert client.calls == [('get_match_statistics', None)]
+    assert stats == {
+        'match_rate': 75.0,
+        'total_transactions': 8,
+        'unmatched_transactions': 2,
+        'total_amount_matched': 1500.5,
+        'total_amount_unmatched': -20.0,
+        'matches_by_type': {'checks': 4, 'invoices': 2}
+    }
+
+
+def test_statistics_for_empty_database():
+    client = FakeClient({'get_match_statistics': [{
+        'total_transactions': 0,
+        'matched_transactions': 0,
+        'total_amount_matched': 0,
+        'total_amount_unmatched': 0,
+        'matches_by_type': {}
+    }]})
+
+    stats = _dashboard(client).get_match_statistics()
+
+    assert (stats['match_rate'], stats['unmatched_transactions'], stats['matches_by_type']) == (0, 0, {})
+
+
+def test_unmatched_summary_from_view():
+    client = FakeClient({'get_unmatched_summary': [{
+        'unmatched_transactions': 3,
+        'unmatched_amount': '-45.50',
+        'views_refreshed_at': '2024-03-01T10:00:00+00:00',
+        'views_stale': True
+    }]})
+
+    summary = _dashboard(client).get_unmatched_summary()
+
+    assert client.calls == [('get_unmatched_summary', None)]
+    assert summary == {
+        'unmatched_transactions': 3,
+        'unmatched_amount': -45.5,
+        'views_refreshed_at': '2024-03-01T10:00:00+00:00',
+        'views_stale': True
+    }
+
+
+def test_unmatched_page_read_from_view_after_cursor():
+    rows = [{'id': i, 'amount': float(i)} for i in (12, 41, 57, 60)]
+    client = FakePostgrest(tables={'unmatched_bank_mv': rows})
+
+    page = _dashboard(client).get_unmatched_transactions(after_id=40, page_size=2)
+
+    assert client.requests == [('table', 'unmatched_bank_mv')]
+    assert page['id'].tolist() == [41, 57]
+
+
+def test_matches_filtered_on_server():
+    rows = [
+        {'match_id': i, 'match_date': f'2024-02-0{i}T10:00:00', 'bank_date': f'2024-01-0{i}',
+         'matched_table': 'checks' if i % 2 else 'invoices'}
+        for i in range(1, 7)
+    ]
+    client = FakePostgrest(match_details=rows)
+
+    matches = _dashboard(client).get_all_matches('2024-01-02', '2024-01-05', 'checks')
+
+    assert matches['match_id'].tolist() == [5, 3]
+    assert client.requests[0][1]['table_filter'] == 'checks'
@@ -0,0 +1,151 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('streamlit')
+
+from data_access import DataAccess, QueryCache  # noqa: E402
+from supabase_fakes import FakePostgrest  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClient:
+    """תחליף ל-Supabase שסופר כמה פעמים כל RPC הגיע לשרת"""
+
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params=None):
+        self.calls.append((name, params))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=[{'call': len(self.calls)}]))
+
+
+def test_repeated_rpc_served_from_cache():
+    client = FakeClient()
+    data = DataAccess(client, QueryCache())
+
+    first = data.rpc('get_match_statistics')
+    second = data.rpc('get_match_statistics')
+
+    assert first == second == [{'call': 1}]
+    assert len(client.calls) == 1
+    assert data.cache.stats()['hits'] == 1
+    assert data.cache.stats()['misses'] == 1
+
+
+def test_key_includes_arguments():
+    client = FakeClient()
+    data = DataAccess(client, QueryCache())
+
+    data.rpc('get_unmatched_transactions', {'after_id': 0, 'page_size': 100})
+    data.rpc('get_unmatched_transactions', {'page_size': 100, 'after_id': 0})
+    data.rpc('get_unmatched_transactions', {'after_id': 100, 'page_size': 100})
+
+    assert len(client.calls) == 2
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    client = FakeClient()
+    data = DataAccess(client, QueryCache(ttl_seconds=60, clock=clock))
+
+    data.rpc('get_match_details')
+    clock.now = 59
+    data.rpc('get_match_details')
+    clock.now = 61
+    data.rpc('get_match_details')
+
+    assert len(client.calls) == 2
+
+
+def test_least_recently_used_entry_evicted():
+    client = FakeClient()
+    data = DataAccess(client, QueryCache(max_entries=2))
+
+    data.rpc('a')
+    data.rpc('b')
+    data.rpc('a')
+    data.rpc('c')
+    data.rpc('a')
+    data.rpc('b')
+
+    assert [name for name, _ in client.calls] == ['a', 'b', 'c', 'b']
+    assert data.cache.stats()['evictions'] == 2
+
+
+def test_writes_invalidate_cached_reads():
+    client = FakeClient()
+    data = DataAccess(client, QueryCache())
+
+    data.rpc('get_match_details')
+    data.call('save_best_matches')
+    data.call('save_best_matches')
+    data.invalidate()
+    data.rpc('get_match_details')
+
+    assert [name for name, _ in client.calls] == [
+        'get_match_details', 'save_best_matches', 'save_best_matches', 'get_match_details'
+    ]
+    assert data.cache.stats()['invalidations'] == 1
+
+
+def test_result_loaded_during_invalidate_not_stored():
+    cache = QueryCache()
+    key = QueryCache.make_key('get_match_details')
+
+    def stale_loader():
+        # כתיבה שמסתיימת בזמן שהשאילתה עדיין רצה
+        cache.invalidate()
+        return 'stale'
+
+    first = cache.get_or_load(key, stale_loader)
+    second = cache.get_or_load(key, lambda: 'fresh')
+
+    assert (first, second) == ('stale', 'fresh')
+    assert cache.stats()['entries'] == 1
+
+
+def test_page_cached_per_cursor():
+    client = FakePostgrest(tables={'unmatched_bank_mv': [{'id': i} for i in range(1, 8)]})
+    data = DataAccess(client, QueryCache())
+
+    first = data.page('unmatched_bank_mv', after_id=0, page_size=3)
+    data.page('unmatched_bank_mv', after_id=0, page_size=3)
+    second = data.page('unmatched_bank_mv', after_id=3, page_size=3)
+
+    assert [row['id'] for row in first + second] == [1, 2, 3, 4, 5, 6]
+    assert len(client.requests) == 2
+
+
+class RefreshClient(FakeClient):
+    """refresh_stale_views מחזיר אם ה-views רועננו"""
+
+    def __init__(self, refreshed):
+        super().__init__()
+        self.refreshed = refreshed
+
+    def rpc(self, name, params=None):
+        if name != 'refresh_stale_views':
+            return super().rpc(name, params)
+        self.calls.append((name, params))
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self.refreshed))
+
+
+@pytest.mark.parametrize('refreshed', [False, True])
+def test_view_refresh_invalidates_only_when_refreshed(refreshed):
+    client = RefreshClient(refreshed)
+    data = DataAccess(client, QueryCache())
+    data.rpc('get_match_details')
+
+    assert data.refresh_views(min_interval=30) is refreshed
+    data.rpc('get_match_details')
+
+    assert client.calls[1] == ('refresh_stale_views', {'min_interval_seconds': 30})
+    assert len(client.calls) == (3 if refreshed else 2)
@@ -0,0 +1,102 @@
+import random
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaner import DataCleaner
+
+# ספרות ערביות-הודיות ופרסיות - \d של re תופס אותן ו-float() מפענח אותן
+ARABIC_INDIC = str.maketrans('0123456789', '٠١٢٣٤٥٦٧٨٩')
+EXTENDED_ARABIC_INDIC = str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹')
+
+
+def _random_amount(rng):
+    choice = rng.random()
+    if choice < 0.3:
+        return round(rng.uniform(-50000, 50000), rng.choice([0, 2, 3, 4]))
+    if choice < 0.5:
+        return f"₪ {rng.uniform(-9999, 9999):,.{rng.choice([0, 2, 3])}f}"
+    if choice < 0.6:
+        digits = rng.choice([ARABIC_INDIC, EXTENDED_ARABIC_INDIC])
+        return f"{rng.uniform(-9999, 9999):,.{rng.choice([0, 2])}f} ₪".translate(digits)
+    return rng.choice([None, np.nan, '', 'abc', '-', '1.2.3', '2.675', '1.005', ' 12 ש"ח ', 7, 0.285, 1e10 + 0.125])
+
+
+def _random_date(rng):
+    choice = rng.random()
+    if choice < 0.4:
+        return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2019, 2025)}"
+    if choice < 0.7:
+        return f"{rng.randint(2019, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if choice < 0.8:
+        return datetime(rng.randint(2019, 2025), rng.randint(1, 12), rng.randint(1, 28))
+    if choice < 0.9:
+        digits = rng.choice([ARABIC_INDIC, EXTENDED_ARABIC_INDIC])
+        return rng.choice([
+            f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2019, 2025)}",
+            f"{rng.randint(2019, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            f"{rng.randint(2019, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+        ]).translate(digits)
+    return rng.choice([None, np.nan, '', 'not a date', '31/31/2024', '2024-02-30', 12345, '20240105'])
+
+
+def _random_text(rng):
+    return rng.choice([None, np.nan, '', '   ', ' העברה  בנקאית ', 'שיק\t\n123', 42, 3.5, 'abc  def ', 'x'])
+
+
+def _random_frame(seed, rows=400):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'סכום': [_random_amount(rng) for _ in range(rows)],
+        'תאריך': [_random_date(rng) for _ in range(rows)],
+        'תיאור': [_random_text(rng) for _ in range(rows)],
+        'מספר_שיק': [_random_text(rng) for _ in range(rows)],
+        'שם_משלם': [_random_text(rng) for _ in range(rows)],
+        'מספר_אסמכתא': [_random_text(rng) for _ in range(rows)],
+        'מספר_חשבונית': [_random_text(rng) for _ in range(rows)],
+        'סטטוס': [_random_text(rng) for _ in range(rows)],
+    })
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('cleaner', [
+    DataCleaner.clean_bank_transactions,
+    DataCleaner.clean_checks,
+    DataCleaner.clean_transfers,
+    DataCleaner.clean_invoices,
+    DataCleaner.clean_receipts,
+])
+def test_vectorized_matches_scalar(cleaner, seed):
+    df = _random_frame(seed)
+
+    expected = cleaner(df)
+    actual = cleaner(df, vectorized=True)
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_vectorized_datetime_column():
+    df = pd.DataFrame({
+        'amount': [10.0, 20.555, None],
+        'date': pd.to_datetime(['2024-01-05', None, '2024-03-01']),
+    })
+
+    pd.testing.assert_frame_equal(
+        DataCleaner.clean_bank_transactions(df, vectorized=True),
+        DataCleaner.clean_bank_transactions(df)
+    )
+
+
+def test_round_amounts_matches_builtin_round():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        rng.uniform(-1e6, 1e6, 10000),
+        np.round(rng.uniform(-1e4, 1e4, 10000), 3),
+        [2.675, 1.005, 0.285, -0.125, 1e12 + 0.005, np.inf],
+    ])
+
+    expected = [round(float(value), 2) for value in values]
+
+    assert DataCleaner._round_amounts(values).tolist() == expected
@@ -0,0 +1,62 @@
+import json
+
+from field_extractor import FieldExtractor, SupplierTemplate, load_templates
+
+INVOICE = """חברת הדוגמה בע"מ  ע.מ 514433221
+טל: 03-5551234  פקס 03-5551235
+חשבונית מס: 20931
+תאריך: 14/07/2024
+שירותי ייעוץ 2 יח' 500.00
+סה"כ לפני מע"מ 1,000.00
+מע"מ 17% 170.00
+סה"כ לתשלום ₪ 1,170.00
+"""
+
+
+def test_total_preferred_over_phone_vat_and_subtotal():
+    data = FieldExtractor(templates=[]).extract(INVOICE, 'invoice')
+
+    assert data == {'date': '14/07/2024', 'amount': 1170.0, 'reference': '20931'}
+
+
+def test_receipt_reference_and_currency_amount():
+    text = 'קבלה מספר 8812\n01.03.2024\nהתקבל בהעברה ש"ח 2,450.50\nתודה'
+
+    data = FieldExtractor(templates=[]).extract(text, 'receipt')
+
+    assert data == {'date': '01.03.2024', 'amount': 2450.5, 'reference': '8812'}
+
+
+def test_document_fields_fed_page_by_page():
+    fields = FieldExtractor(templates=[]).document('invoice')
+
+    assert not fields.feed('חשבונית מס 77\nתאריך 05/05/2024\nפריט 40.00')
+    assert fields.data['amount'] == 40.0
+    assert fields.feed('סה"כ לתשלום 46.80')
+    assert fields.data['amount'] == 46.8
+
+
+def test_amount_without_keyword_settles_after_one_more_page():
+    fields = FieldExtractor(templates=[]).document('invoice')
+
+    assert not fields.feed('חשבונית מס 77\nתאריך 05/05/2024\nפריט 40.00')
+    assert not fields.feed('פריט נוסף ₪ 55.00')
+    assert fields.feed('תנאי תשלום: שוטף')
+    assert fields.data['amount'] == 55.0
+
+
+def test_supplier_template_overrides_generic_rules(tmp_path):
+    path = tmp_path / 'templates.json'
+    path.write_text(json.dumps([{
+        'name': 'חשמל',
+        'match': 'חברת החשמל',
+        'amount': r'סכום החשבון\s*([\d,]+\.\d{2})',
+        'reference': r'מספר חוזה\s*(\d+)'
+    }], ensure_ascii=False), encoding='utf-8')
+    templates = load_templates(str(path))
+    text = 'חברת החשמל\nמספר חוזה 3344\n10/06/2024\nסכום החשבון 612.40\nלתשלום עד 20/06/2024 בהוראת קבע 0.00'
+
+    data = FieldExtractor(templates=templates).extract(text, 'invoice')
+
+    assert isinstance(templates[0], SupplierTemplate)
+    assert data == {'date': '10/06/2024', 'amount': 612.4, 'reference': '3344'}
@@ -0,0 +1,109 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from group_matcher import GroupMatchEngine, SubsetSumSearch
+
+
+def _brute_force_delta(amounts, target, tolerance, max_size):
+    deltas = [
+        abs(sum(subset) - target)
+        for size in range(2, max_size + 1)
+        for subset in combinations(amounts, size)
+    ]
+    best = min(deltas, default=None)
+    return best if best is not None and best <= tolerance else None
+
+
+# עד 12 מועמדים נמנים ישירות; 18 מועמדים עם קבוצות של עד 6 עוברים ב-meet-in-the-middle
+@pytest.mark.parametrize('max_size, max_candidates', [(4, 12), (6, 18)])
+@pytest.mark.parametrize('seed', range(10))
+def test_search_matches_brute_force(seed, max_size, max_candidates):
+    rng = np.random.default_rng(seed)
+    amounts = rng.integers(1, 50, rng.integers(2, max_candidates + 1))
+    target = int(rng.integers(20, 120))
+    tolerance = int(rng.integers(0, 3))
+    search = SubsetSumSearch(max_size=max_size, time_budget=10)
+
+    chosen = search.find(amounts, target, tolerance)
+    expected = _brute_force_delta(list(amounts), target, tolerance, max_size)
+
+    if expected is None:
+        assert chosen is None
+    else:
+        assert 2 <= len(set(chosen)) == len(chosen) <= max_size
+        assert abs(int(amounts[chosen].sum()) - target) == expected
+
+
+def test_search_prefers_fewest_items():
+    chosen = SubsetSumSearch().find([100, 200, 300, 400, 600], 1000)
+
+    assert sorted(chosen) == [3, 4]
+
+
+def test_search_rejects_parity_trap_and_size_limit():
+    # סכומים זוגיים בלבד לא מגיעים ליעד אי-זוגי; ושלושה פריטים לא נכנסים במגבלה של שניים
+    assert SubsetSumSearch().find([2, 4, 6, 8, 10, 12], 21) is None
+    assert SubsetSumSearch(max_size=2).find([100, 200, 300], 600) is None
+
+
+def test_search_reports_exhausted_budget():
+    search = SubsetSumSearch(time_budget=0)
+
+    assert search.find([100, 200, 300, 400, 500, 600, 700, 800], 500) is None
+    assert search.timed_out
+
+
+def test_deposit_of_checks_from_one_payer():
+    bank = pd.DataFrame({'id': [1], 'date': ['2024-03-01'], 'amount': [1000.0], 'description': ['הפקדת שיקים']})
+    checks = pd.DataFrame({
+        'id': [10, 11, 12, 13],
+        'date': ['2024-02-28', '2024-03-01', '2024-03-02', '2024-03-01'],
+        'amount': [500.0, 300.0, 200.0, 500.0],
+        'check_number': None,
+        'payer_name': ['ישראל ישראלי', 'ישראל ישראלי', 'ישראל ישראלי', 'ספק אחר']
+    })
+
+    groups = GroupMatchEngine().find_groups(bank, {'checks': checks})
+
+    assert len(groups) == 1
+    group = groups.iloc[0]
+    assert (group['match_type'], group['matched_table']) == ('one_to_many', 'checks')
+    assert (group['bank_transaction_ids'], group['matched_ids']) == ([1], [10, 11, 12])
+    assert group['total_amount'] == 1000.0
+
+
+def test_invoice_paid_in_two_transfers():
+    bank = pd.DataFrame({
+        'id': [1, 2, 3],
+        'date': ['2024-03-05', '2024-03-06', '2024-03-06'],
+        'amount': [-600.0, -400.0, -400.0],
+        'description': ['העברה לספק', 'העברה לספק', 'משכורת']
+    })
+    invoices = pd.DataFrame({'id': [7], 'date': ['2024-03-05'], 'amount': [1000.0], 'invoice_number': ['55']})
+
+    groups = GroupMatchEngine().find_groups(bank, {'invoices': invoices})
+
+    assert len(groups) == 1
+    assert groups.iloc[0]['match_type'] == 'many_to_one'
+    assert (groups.iloc[0]['bank_transaction_ids'], groups.iloc[0]['matched_ids']) == ([1, 2], [7])
+
+
+def test_each_row_joins_one_group_within_window():
+    bank = pd.DataFrame({'id': [1, 2], 'date': ['2024-03-01', '2024-03-01'], 'amount': [300.0, 300.0],
+                         'description': None})
+    receipts = pd.DataFrame({
+        'id': [1, 2, 3, 4],
+        'date': ['2024-03-01', '2024-03-01', '2024-03-01', '2024-03-20'],
+        'amount': [100.0, 200.0, 150.0, 150.0],
+        'receipt_number': None
+    })
+    engine = GroupMatchEngine()
+
+    groups = engine.find_groups(bank, {'receipts': receipts})
+
+    # הקבלה מ-20/3 מחוץ לחלון, ולכן לעסקה השנייה לא נשארה קבוצה
+    assert groups['matched_ids'].tolist() == [[1, 2]]
+    assert engine.stats['found'] == 1
@@ -0,0 +1,64 @@
+import io
+
+import pandas as pd
+
+from ingest_ledger import IngestLedger, OccurrenceTracker
+
+
+def _statement(rows):
+    return pd.DataFrame(rows, columns=['date', 'amount', 'description'])
+
+
+def test_file_hash_depends_only_on_content():
+    first = io.BytesIO(b'date,amount\n2024-01-01,10\n')
+    first.read(5)
+
+    assert IngestLedger.file_hash(first) == IngestLedger.file_hash(io.BytesIO(b'date,amount\n2024-01-01,10\n'))
+    assert first.tell() == 5
+    assert IngestLedger.file_hash(first) != IngestLedger.file_hash(io.BytesIO(b'date,amount\n2024-01-02,10\n'))
+
+
+def test_overlapping_statements_share_natural_keys():
+    january = _statement([
+        ('2024-01-30', -25.0, 'קפה'),
+        ('2024-01-31', -25.0, 'קפה'),
+        ('2024-01-31', -25.0, 'קפה'),
+    ])
+    overlap = _statement([
+        ('2024-01-31', -25.0, 'קפה'),
+        ('2024-01-31', -25.0, 'קפה'),
+        ('2024-02-01', 300.0, 'משכורת'),
+    ])
+
+    january_keys = IngestLedger.add_natural_keys(january, 'bank_transactions')['natural_key']
+    overlap_keys = IngestLedger.add_natural_keys(overlap, 'bank_transactions')['natural_key']
+
+    # שתי העסקאות הזהות באותו יום מקבלות מפתחות שונים, וזהים בין שני הקבצים
+    assert january_keys.is_unique
+    assert list(overlap_keys[:2]) == list(january_keys[1:])
+    assert overlap_keys[2] not in set(january_keys)
+
+
+def test_tables_without_key_columns_are_unchanged():
+    df = pd.DataFrame({'other': [1, 2]})
+
+    assert 'natural_key' not in IngestLedger.add_natural_keys(df, 'bank_transactions').columns
+
+
+def test_identical_rows_with_missing_fields_get_distinct_keys():
+    df = _statement([('2024-01-01', 10.0, None), ('2024-01-01', 10.0, None)])
+
+    assert IngestLedger.add_natural_keys(df, 'bank_transactions')['natural_key'].is_unique
+
+
+def test_chunked_keys_match_whole_file():
+    rows = [(f'2024-01-{1 + i % 3:02d}', float(i % 4), 'קפה' if i % 5 else None) for i in range(60)]
+    whole = IngestLedger.add_natural_keys(_statement(rows), 'bank_transactions')['natural_key']
+
+    occurrences = OccurrenceTracker()
+    chunked = pd.concat([
+        IngestLedger.add_natural_keys(_statement(rows[start:start + 7]), 'bank_transactions', occurrences)['natural_key']
+        for start in range(0, len(rows), 7)
+    ])
+
+    assert chunked.tolist() == whole.tolist()
@@ -0,0 +1,137 @@
+import json
+import socket
+import urllib.request
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import instrumentation
+from data_access import DataAccess, QueryCache
+from data_cleaner import DataCleaner
+from instrumentation import Recorder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_nested_spans_and_counters():
+    clock = FakeClock()
+    recorder = Recorder(log_path=None, profiler=None, clock=clock)
+
+    with recorder.span('load', file_type='bank') as outer:
+        outer.count('rows_read', 10)
+        with recorder.span('clean'):
+            recorder.count('rows_dropped', 2)
+            clock.now += 0.5
+        clock.now += 0.25
+
+    [span] = recorder.recent_spans()
+    assert (span.name, span.labels, span.seconds, span.counters) == ('load', {'file_type': 'bank'}, 0.75, {'rows_read': 10})
+    assert span.children[0].counters == {'rows_dropped': 2}
+    summary = {row['stage']: row for row in recorder.summary()}
+    assert summary['clean']['seconds'] == 0.5 and summary['load']['calls'] == 1
+
+
+def test_error_is_recorded_and_raised():
+    recorder = Recorder(log_path=None, profiler=None)
+
+    with pytest.raises(ValueError):
+        with recorder.span('rpc', name='save_best_matches'):
+            raise ValueError('timeout')
+
+    assert recorder.recent_spans()[0].error == 'ValueError: timeout'
+    assert recorder.summary()[0]['errors'] == 1
+
+
+def test_timed_decorator():
+    recorder = Recorder(log_path=None, profiler=None)
+
+    @recorder.timed('loader', source='dashboard')
+    def load():
+        return 3
+
+    assert load() == 3
+    assert recorder.summary()[0]['stage'] == 'loader'
+
+
+def test_json_log_one_line_per_top_level_span(tmp_path):
+    log_path = tmp_path / 'metrics.jsonl'
+    recorder = Recorder(log_path=log_path, profiler=None)
+
+    for _ in range(2):
+        with recorder.span('process_matches', mode='full'):
+            with recorder.span('rpc', name='save_best_matches'):
+                pass
+
+    records = [json.loads(line) for line in log_path.read_text(encoding='utf-8').splitlines()]
+    assert [record['name'] for record in records] == ['process_matches', 'process_matches']
+    assert records[0]['children'][0]['labels'] == {'name': 'save_best_matches'}
+
+
+def test_prometheus_text():
+    recorder = Recorder(log_path=None, profiler=None)
+    with recorder.span('insert_transactions', table='checks') as span:
+        span.count('rows_sent', 500)
+        span.count('retries', 1)
+
+    text = recorder.prometheus_text()
+
+    assert '# TYPE financial_matcher_stage_calls_total counter' in text
+    assert 'financial_matcher_rows_sent_total{stage="insert_transactions",table="checks"} 500' in text
+    assert 'financial_matcher_retries_total{stage="insert_transactions",table="checks"} 1' in text
+
+
+def test_cprofile_capture(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, 'PROFILE_DIR', tmp_path)
+    recorder = Recorder(log_path=None, profiler='cprofile')
+
+    with recorder.span('clean'):
+        sorted(range(10000), key=lambda value: -value)
+
+    profile = recorder.recent_spans()[0].profile
+    assert profile['kind'] == 'cprofile'
+    assert profile['path'].endswith('.prof')
+    assert 'cumulative' in profile['summary']
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def test_metrics_endpoint():
+    recorder = Recorder(log_path=None, profiler=None)
+    with recorder.span('rpc', name='get_match_statistics'):
+        pass
+    try:
+        server = instrumentation.serve_metrics(port=_free_port(), source=recorder)
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics', timeout=5) as response:
+            body = response.read().decode('utf-8')
+    finally:
+        instrumentation._server.shutdown()
+        instrumentation._server.server_close()
+        instrumentation._server = None
+
+    assert 'financial_matcher_stage_calls_total{stage="rpc",name="get_match_statistics"} 1' in body
+
+
+def test_rpc_latency_and_rows_dropped_recorded_by_default_recorder():
+    instrumentation.recorder.reset()
+    client = SimpleNamespace(rpc=lambda name, params=None: SimpleNamespace(
+        execute=lambda: SimpleNamespace(data=[{'total_transactions': 1}])
+    ))
+
+    with instrumentation.span('dashboard'):
+        DataAccess(client, QueryCache()).rpc('get_match_statistics')
+        DataCleaner.clean_bank_transactions(pd.DataFrame({'סכום': ['10', 'abc'], 'תאריך': ['2024-01-01'] * 2}))
+
+    [span] = instrumentation.recorder.recent_spans()
+    assert span.counters == {'rows_dropped': 1}
+    assert (span.children[0].name, span.children[0].counters) == ('rpc', {'rows_fetched': 1})
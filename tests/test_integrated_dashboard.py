@@ -0,0 +1,159 @@
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('plotly')
+pytest.importorskip('streamlit')
+
+from data_access import DataAccess, QueryCache  # noqa: E402
+from integrated_dashboard import IntegratedDashboard  # noqa: E402
+from supabase_fakes import FakePostgrest  # noqa: E402
+
+
+class FakeRpc:
+    def __init__(self, rows=None, error=None):
+        self.rows = rows
+        self.error = error
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return SimpleNamespace(data=self.rows)
+
+
+class FakeClient:
+    """תחליף ל-Supabase: מחזיר שורות קבועות ל-RPC ורושם את הפרמטרים"""
+
+    def __init__(self, rows=None, error=None):
+        self.rows = rows
+        self.error = error
+        self.calls = []
+
+    def rpc(self, name, params=None):
+        self.calls.append((name, params))
+        return FakeRpc(self.rows, self.error)
+
+
+def _dashboard(client):
+    dashboard = IntegratedDashboard.__new__(IntegratedDashboard)
+    dashboard.client = client
+    dashboard.data = DataAccess(client, QueryCache())
+    return dashboard
+
+
+def _history(seed, rows=3000):
+    rng = np.random.default_rng(seed)
+    bank_df = pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'date': (pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 1000, rows), unit='D')).strftime('%Y-%m-%d'),
+        'amount': rng.integers(-50000, 50000, rows) / 100
+    })
+    matched = bank_df.sample(frac=0.6, random_state=seed)
+    matches_df = pd.DataFrame({
+        'bank_transaction_id': matched['id'],
+        'bank_date': matched['date'],
+        'bank_amount': matched['amount'],
+        'matched_table': 'checks'
+    })
+    return bank_df, matches_df
+
+
+def _loop_monthly_stats(bank_df, matches_df):
+    """החישוב הקודם - סינון לכל שנה וחודש"""
+    bank_df = bank_df.assign(date=pd.to_datetime(bank_df['date']))
+    matches_df = matches_df.assign(bank_date=pd.to_datetime(matches_df['bank_date']))
+    rows = []
+    for year in sorted(bank_df['date'].dt.year.unique()):
+        for month in range(1, 13):
+            month_bank = bank_df[(bank_df['date'].dt.year == year) & (bank_df['date'].dt.month == month)]
+            month_matches = matches_df[
+                (matches_df['bank_date'].dt.year == year) & (matches_df['bank_date'].dt.month == month)
+            ]
+            if not month_bank.empty:
+                rows.append({
+                    'year': year,
+                    'month': month,
+                    'total_transactions': len(month_bank),
+                    'matched_transactions': len(month_matches),
+                    'total_amount': month_bank['amount'].sum(),
+                    'matched_amount': month_matches['bank_amount'].sum()
+                })
+    return pd.DataFrame(rows)
+
+
+def test_vectorized_stats_match_monthly_loop():
+    bank_df, matches_df = _history(seed=3)
+
+    stats = _dashboard(FakeClient()).calculate_monthly_stats(bank_df, matches_df)
+    expected = _loop_monthly_stats(bank_df, matches_df)
+
+    assert stats[['year', 'month', 'total_transactions', 'matched_transactions']].values.tolist() == \
+        expected[['year', 'month', 'total_transactions', 'matched_transactions']].values.tolist()
+    np.testing.assert_allclose(stats['total_amount'], expected['total_amount'])
+    np.testing.assert_allclose(stats['matched_amount'], expected['matched_amount'])
+    np.testing.assert_allclose(stats['unmatched_amount'], expected['total_amount'] - expected['matched_amount'])
+
+
+def test_vectorized_stats_respect_date_range():
+    bank_df, matches_df = _history(seed=4)
+
+    stats = _dashboard(FakeClient()).calculate_monthly_stats(bank_df, matches_df, date(2023, 3, 1), date(2023, 5, 31))
+
+    assert stats[['year', 'month']].values.tolist() == [[2023, 3], [2023, 4], [2023, 5]]
+
+
+def test_monthly_stats_come_from_rpc():
+    client = FakeClient(rows=[
+        {'year': 2024, 'month': 2, 'total_transactions': 4, 'matched_transactions': 1,
+         'total_amount': '400.00', 'matched_amount': '100.00'},
+        {'year': 2024, 'month': 1, 'total_transactions': 2, 'matched_transactions': 2,
+         'total_amount': '50.00', 'matched_amount': '50.00'}
+    ])
+
+    stats = _dashboard(client).get_monthly_stats(date(2024, 1, 1), date(2024, 2, 29))
+
+    assert client.calls == [('get_monthly_match_stats', {'from_date': '2024-01-01', 'to_date': '2024-02-29'})]
+    assert stats['month_name'].tolist() == ['January', 'February']
+    assert stats['match_rate'].tolist() == [100.0, 25.0]
+    assert stats['unmatched_amount'].tolist() == [0.0, 300.0]
+
+
+def _fallback_server(bank_df, matches_df):
+    """השרת בלי get_monthly_match_stats; ההתאמות בטבלה החיה, ה-view הממומש ריק (לא רוענן)"""
+    return FakePostgrest(
+        tables={
+            'bank_transactions': bank_df.to_dict('records'),
+            'transaction_matches': [{'id': i, 'bank_transaction_id': bank_id}
+                                    for i, bank_id in enumerate(matches_df['bank_transaction_id'], 1)]
+        },
+        max_rows=300,
+        rpc_error=RuntimeError('function get_monthly_match_stats does not exist')
+    )
+
+
+def test_monthly_stats_fall_back_to_paged_reads():
+    bank_df, matches_df = _history(seed=5, rows=2000)
+    server = _fallback_server(bank_df, matches_df)
+
+    stats = _dashboard(server).get_monthly_stats()
+    expected = _loop_monthly_stats(bank_df, matches_df)
+
+    assert stats['total_transactions'].tolist() == expected['total_transactions'].tolist()
+    assert stats['matched_transactions'].tolist() == expected['matched_transactions'].tolist()
+    np.testing.assert_allclose(stats['matched_amount'], expected['matched_amount'])
+
+
+def test_fallback_filters_dates_in_server():
+    bank_df, matches_df = _history(seed=6, rows=2000)
+    server = _fallback_server(bank_df, matches_df)
+
+    stats = _dashboard(server).get_monthly_stats(date(2023, 3, 1), date(2023, 5, 31))
+    in_range = bank_df['date'].between('2023-03-01', '2023-05-31')
+    expected = _loop_monthly_stats(bank_df[in_range], matches_df[matches_df['bank_date'].between('2023-03-01', '2023-05-31')])
+
+    assert set(server.filters) == {('date', 'gte', '2023-03-01'), ('date', 'lte', '2023-05-31')}
+    assert stats[['year', 'month']].values.tolist() == [[2023, 3], [2023, 4], [2023, 5]]
+    assert stats['matched_transactions'].tolist() == expected['matched_transactions'].tolist()
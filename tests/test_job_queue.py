@@ -0,0 +1,50 @@
+import queue
+import threading
+
+import pytest
+
+from job_queue import JobQueue
+
+
+def test_jobs_run_concurrently():
+    jobs = JobQueue(workers=2, max_pending=4)
+    barrier = threading.Barrier(2, timeout=5)
+
+    submitted = [jobs.submit(lambda i=i: (barrier.wait(), i)[1], name=f'job {i}') for i in range(2)]
+    jobs.join()
+
+    # שתי העבודות הגיעו למחסום יחד - אחרת הראשונה הייתה נכשלת ב-BrokenBarrierError
+    assert [(job.status, job.result) for job in submitted] == [('done', 0), ('done', 1)]
+    assert submitted[0].to_dict()['name'] == 'job 0'
+    jobs.shutdown()
+
+
+def test_full_queue_rejects_without_blocking():
+    jobs = JobQueue(workers=1, max_pending=1)
+    release = threading.Event()
+    started = threading.Event()
+    jobs.submit(lambda: (started.set(), release.wait(5)))
+    started.wait(5)
+    jobs.submit(lambda: None)
+
+    with pytest.raises(queue.Full):
+        jobs.submit(lambda: None)
+    assert jobs.stats()['running'] == 1 and jobs.stats()['queued'] == 1
+    release.set()
+    jobs.shutdown()
+
+
+def test_failed_job_and_history():
+    jobs = JobQueue(workers=1, max_pending=4, history=2)
+
+    def fail():
+        raise ValueError('bad file')
+
+    failed = jobs.submit(fail)
+    rest = [jobs.submit(lambda: 1) for _ in range(2)]
+    jobs.join()
+
+    assert (failed.status, failed.error, failed.function) == ('failed', 'ValueError: bad file', None)
+    assert jobs.get(failed.id) is None
+    assert all(jobs.get(job.id) is job for job in rest)
+    jobs.shutdown()
@@ -0,0 +1,57 @@
+import pytest
+
+from keyset_reader import KeysetReader
+from supabase_fakes import FakePostgrest
+
+
+def _bank_rows(count):
+    return [{'id': i, 'date': f'2024-01-{1 + i % 28:02d}', 'amount': i * 1.5} for i in range(1, count + 1)]
+
+
+def _match_rows(count):
+    # כמה התאמות חולקות את אותו match_date, כדי שה-id יכריע בסדר
+    return [
+        {'match_id': i, 'match_date': f'2024-02-{1 + i // 4:02d}T10:00:00', 'bank_amount': float(i)}
+        for i in range(1, count + 1)
+    ]
+
+
+def test_bank_transactions_paged_by_id():
+    server = FakePostgrest(tables={'bank_transactions': _bank_rows(25)})
+    stream = KeysetReader(server, page_size=10).bank_transactions()
+
+    chunks = list(stream)
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [i for chunk in chunks for i in chunk['id']] == list(range(1, 26))
+    assert (stream.report.pages_fetched, stream.report.rows_fetched) == (3, 25)
+    assert stream.report.bytes_fetched > 0
+
+
+def test_server_row_cap_does_not_truncate():
+    server = FakePostgrest(tables={'bank_transactions': _bank_rows(25)}, max_rows=7)
+
+    frame = KeysetReader(server, page_size=1000).bank_transactions('date,amount').to_frame()
+
+    assert frame['id'].tolist() == list(range(1, 26))
+    assert list(frame.columns) == ['id', 'date', 'amount']
+
+
+def test_match_details_paged_by_match_date_and_id():
+    rows = _match_rows(30)
+    server = FakePostgrest(match_details=rows)
+
+    frame = KeysetReader(server, page_size=8).match_details().to_frame()
+
+    expected = sorted(rows, key=lambda row: (row['match_date'], row['match_id']), reverse=True)
+    assert frame['match_id'].tolist() == [row['match_id'] for row in expected]
+
+
+def test_record_batches():
+    pa = pytest.importorskip('pyarrow')
+    server = FakePostgrest(tables={'bank_transactions': _bank_rows(12)})
+
+    batches = list(KeysetReader(server, page_size=5).bank_transactions().record_batches())
+
+    assert all(isinstance(batch, pa.RecordBatch) for batch in batches)
+    assert sum(batch.num_rows for batch in batches) == 12
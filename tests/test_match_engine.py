@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from match_engine import MatchEngine, SOURCE_TABLES, TolerantMatchEngine
+
+
+def _random_table(rng, rows, start_id, with_reference=None):
+    df = pd.DataFrame({
+        'id': np.arange(start_id, start_id + rows),
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 40, rows), unit='D'),
+        # מעט סכומים שונים כדי שיהיו הרבה התנגשויות בתוך כל דלי
+        'amount': rng.choice([100.0, -100.0, 250.5, 99.99, 1200.0, 7.25], rows) * rng.choice([1, 1, 1, 2], rows)
+    })
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+    if with_reference:
+        df[with_reference] = [f'R{i}' for i in df['id']]
+    return df
+
+
+def _shared_fixture(seed):
+    rng = np.random.default_rng(seed)
+    bank = _random_table(rng, 120, 1)
+    bank['description'] = 'bank'
+    sources = {
+        table: _random_table(rng, 80, 1000 * (i + 1), reference)
+        for i, (table, reference) in enumerate(SOURCE_TABLES.items())
+    }
+    return bank, sources
+
+
+def _sql_match_transactions(bank, sources, tolerance_days):
+    """מימוש נאיבי שורה-אחר-שורה של match_transactions כפי שכתוב ב-SQL"""
+    rows = []
+    for table, source in sources.items():
+        for bt in bank.itertuples():
+            for doc in source.itertuples():
+                if abs(bt.amount) != abs(doc.amount):
+                    continue
+                delta = abs((pd.Timestamp(bt.date) - pd.Timestamp(doc.date)).days)
+                if delta <= tolerance_days:
+                    score = 1.0 if delta == 0 else 1.0 - (delta / float(tolerance_days))
+                    rows.append((bt.id, table, doc.id, score))
+    return pd.DataFrame(rows, columns=['bank_transaction_id', 'matched_table', 'matched_id', 'match_score'])
+
+
+def _sorted(df):
+    return df.sort_values(['bank_transaction_id', 'matched_table', 'matched_id']).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('tolerance_days', [1, 3, 7])
+def test_match_transactions_matches_sql(seed, tolerance_days):
+    bank, sources = _shared_fixture(seed)
+
+    expected = _sql_match_transactions(bank, sources, tolerance_days)
+    actual = MatchEngine(tolerance_days=tolerance_days).match_transactions(bank, sources)
+
+    assert actual['match_score'].is_monotonic_decreasing
+    pd.testing.assert_frame_equal(_sorted(actual), _sorted(expected), check_dtype=False)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_best_matches_matches_save_best_matches(seed):
+    bank, sources = _shared_fixture(seed)
+    engine = MatchEngine(tolerance_days=7, min_score=0.5)
+
+    candidates = _sql_match_transactions(bank, sources, 7)
+    candidates = candidates[candidates['match_score'] >= 0.5]
+    best = engine.best_matches(bank, sources)
+
+    # rank = 1 לכל עסקת בנק, עם הציון הגבוה ביותר מבין המועמדים
+    assert best['bank_transaction_id'].is_unique
+    assert set(best['bank_transaction_id']) == set(candidates['bank_transaction_id'])
+    top_scores = candidates.groupby('bank_transaction_id')['match_score'].max()
+    assert (best.set_index('bank_transaction_id')['match_score'] == top_scores.loc[best['bank_transaction_id']]).all()
+
+
+def test_default_thresholds_keep_only_same_day_matches():
+    bank = pd.DataFrame({'id': [1, 2, 3], 'date': ['2024-03-01', '2024-03-01', '2024-03-10'],
+                         'amount': [-500.0, 80.0, 42.0], 'description': ['a', 'b', 'c']})
+    sources = {
+        'checks': pd.DataFrame({'id': [10, 11], 'date': ['2024-03-01', '2024-03-02'],
+                                'amount': [500.0, 80.0], 'check_number': ['100', '101']}),
+        'invoices': pd.DataFrame({'id': [20], 'date': ['2024-03-10'], 'amount': [42.0],
+                                  'invoice_number': ['INV-1']})
+    }
+    engine = MatchEngine()
+
+    best = engine.best_matches(bank, sources)
+    details = engine.match_details(best, bank, sources)
+
+    assert best[['bank_transaction_id', 'matched_table', 'matched_id']].values.tolist() == [
+        [1, 'checks', 10], [3, 'invoices', 20]
+    ]
+    assert details['matched_reference'].tolist() == ['100', 'INV-1']
+
+
+def _brute_force_band(bank, sources, tolerance_days, amount_tolerance, amount_tolerance_pct):
+    """כל הזוגות שבתוך רצועת הסכום וחלון הימים, בלולאה מלאה"""
+    pairs = set()
+    for table, source in sources.items():
+        for bt in bank.itertuples():
+            bank_cents = round(abs(bt.amount) * 100)
+            tolerance = max(int(bank_cents * amount_tolerance_pct / 100), round(amount_tolerance * 100))
+            for doc in source.itertuples():
+                delta = abs((pd.Timestamp(bt.date) - pd.Timestamp(doc.date)).days)
+                if delta <= tolerance_days and abs(bank_cents - round(abs(doc.amount) * 100)) <= tolerance:
+                    pairs.add((bt.id, table, doc.id))
+    return pairs
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_zero_tolerance_finds_same_pairs_as_exact_engine(seed):
+    bank, sources = _shared_fixture(seed)
+
+    exact = MatchEngine(tolerance_days=3).match_transactions(bank, sources)
+    tolerant = TolerantMatchEngine(tolerance_days=3, min_score=0,
+                                   max_candidates_per_day=None, max_candidates=None).match_transactions(bank, sources)
+
+    columns = ['bank_transaction_id', 'matched_table', 'matched_id']
+    assert set(map(tuple, tolerant[columns].values.tolist())) == set(map(tuple, exact[columns].values.tolist()))
+
+
+@pytest.mark.parametrize('amount_tolerance, amount_tolerance_pct', [(1.0, 0.0), (0.0, 2.5), (0.5, 1.0)])
+def test_band_search_matches_brute_force(amount_tolerance, amount_tolerance_pct):
+    bank, sources = _shared_fixture(7)
+    engine = TolerantMatchEngine(tolerance_days=2, min_score=0, amount_tolerance=amount_tolerance,
+                                 amount_tolerance_pct=amount_tolerance_pct, max_candidates_per_day=None,
+                                 max_candidates=None)
+
+    candidates = engine.match_transactions(bank, sources)
+
+    columns = ['bank_transaction_id', 'matched_table', 'matched_id']
+    assert set(map(tuple, candidates[columns].values.tolist())) == \
+        _brute_force_band(bank, sources, 2, amount_tolerance, amount_tolerance_pct)
+
+
+def test_fee_and_reference_decide_the_match():
+    # עמלת בנק של 5 ש"ח; שני שיקים באותו סכום, מספר השיק מופיע בתיאור הבנק רק באחד
+    bank = pd.DataFrame({'id': [1], 'date': ['2024-03-01'], 'amount': [-495.0],
+                         'description': ['הפקדת שיק 004512 עמלה']})
+    sources = {'checks': pd.DataFrame({
+        'id': [10, 11, 12],
+        'date': ['2024-03-01', '2024-03-01', '2024-03-02'],
+        'amount': [500.0, 500.0, 480.0],
+        'check_number': ['7781', '4512', '4513'],
+        'payer_name': ['כהן', 'לוי', 'לוי']
+    })}
+    engine = TolerantMatchEngine(amount_tolerance=10, min_score=0.5)
+
+    candidates = engine.match_transactions(bank, sources)
+    best = engine.rank_best(candidates)
+
+    assert set(candidates['matched_id']) == {10, 11}
+    assert best[['matched_id', 'reference_score']].values.tolist() == [[11, 1.0]]
+    assert best['amount_delta'].tolist() == [5.0]
+    assert MatchEngine().best_matches(bank, sources).empty
+
+
+def test_candidates_per_day_capped_to_nearest_amounts():
+    bank = pd.DataFrame({'id': [1], 'date': ['2024-03-01'], 'amount': [100.0], 'description': [None]})
+    sources = {'invoices': pd.DataFrame({
+        'id': range(1, 21),
+        'date': '2024-03-01',
+        'amount': [90.0 + i for i in range(20)],
+        'invoice_number': None
+    })}
+    engine = TolerantMatchEngine(tolerance_days=0, min_score=0, amount_tolerance=10, max_candidates_per_day=4)
+
+    candidates = engine.match_transactions(bank, sources)
+
+    assert sorted(candidates['matched_id']) == [9, 10, 11, 12]
+
+
+def test_candidates_per_bank_row_keep_best_scores():
+    bank = pd.DataFrame({'id': [1, 2], 'date': '2024-03-01', 'amount': [100.0, 200.0], 'description': None})
+    sources = {'invoices': pd.DataFrame({
+        'id': range(1, 13),
+        'date': ['2024-03-01', '2024-03-02', '2024-03-03'] * 4,
+        'amount': [100.0] * 6 + [200.0] * 6,
+        'invoice_number': None
+    })}
+    engine = TolerantMatchEngine(tolerance_days=2, min_score=0, max_candidates=2)
+
+    candidates = engine.match_transactions(bank, sources)
+
+    assert candidates.groupby('bank_transaction_id')['matched_id'].apply(sorted).to_dict() == {1: [1, 4], 2: [7, 10]}
+
+
+def test_description_similarity_is_token_jaccard():
+    bank = pd.DataFrame({'id': [1], 'date': ['2024-03-01'], 'amount': [1200.0],
+                         'description': ['העברה מ ישראל ישראלי בעמ']})
+    sources = {'bank_transfers': pd.DataFrame({
+        'id': [5, 6], 'date': '2024-03-01', 'amount': 1200.0,
+        'reference_number': None, 'description': ['ישראל ישראלי', 'ספק אחר']
+    })}
+
+    candidates = TolerantMatchEngine(min_score=0).match_transactions(bank, sources).set_index('matched_id')
+
+    assert candidates.loc[5, 'description_score'] == pytest.approx(2 / 5)
+    assert candidates.loc[6, 'description_score'] == 0.0
+    assert candidates.index[0] == 5
+
+
+def test_one_to_one_assignment_never_reuses_document():
+    # שתי עסקאות בנק מעדיפות את אותו שיק; בהשמה השנייה מקבלת את השיק של יום אחרי
+    bank = pd.DataFrame({'id': [1, 2], 'date': ['2024-03-01', '2024-03-01'], 'amount': [500.0, 500.0]})
+    sources = {'checks': pd.DataFrame({'id': [10, 11], 'date': ['2024-03-01', '2024-03-02'],
+                                       'amount': [500.0, 500.0]})}
+    engine = MatchEngine(tolerance_days=3, min_score=0.5)
+
+    greedy = engine.best_matches(bank, sources)
+    assigned = engine.best_matches(bank, sources, one_to_one=True)
+
+    assert greedy['matched_id'].tolist() == [10, 10]
+    assert assigned[['bank_transaction_id', 'matched_id']].values.tolist() == [[1, 10], [2, 11]]
+
+
+def test_tolerant_one_to_one_assigns_every_equal_amount_row():
+    # יותר שורות בסכום שווה מ-max_candidates: החיתוך היה משאיר לכולן את אותם חמישה שיקים
+    bank = pd.DataFrame({'id': range(1, 21), 'date': '2024-03-01', 'amount': -250.0, 'description': None})
+    sources = {'checks': pd.DataFrame({'id': range(101, 121), 'date': '2024-03-01', 'amount': 250.0,
+                                       'check_number': None, 'payer_name': None})}
+    engine = TolerantMatchEngine(amount_tolerance=5, min_score=0.6)
+
+    assigned = engine.best_matches(bank, sources, one_to_one=True)
+
+    assert len(assigned) == len(MatchEngine().best_matches(bank, sources, one_to_one=True)) == 20
+    assert not assigned['matched_id'].duplicated().any()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_one_to_one_assignment_is_subset_of_candidates(seed):
+    bank, sources = _shared_fixture(seed)
+    engine = MatchEngine(tolerance_days=3, min_score=0.6)
+    candidates = engine.match_transactions(bank, sources)
+
+    assigned = engine.rank_assigned(candidates)
+
+    assert not assigned.duplicated(['matched_table', 'matched_id']).any()
+    assert not assigned['bank_transaction_id'].duplicated().any()
+    assert len(assigned.merge(candidates)) == len(assigned)
+    assert assigned['match_score'].sum() >= engine.rank_best(candidates).drop_duplicates(
+        ['matched_table', 'matched_id'])['match_score'].sum() - 1e-9
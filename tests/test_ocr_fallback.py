@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+pytest.importorskip('pdfplumber')
+
+from ocr_fallback import OCRFallback  # noqa: E402
+from pdf_fixtures import make_pdf  # noqa: E402
+from pdf_processor import PDFProcessor  # noqa: E402
+
+
+class FakeTesseract(OCRFallback):
+    """מחליף את Tesseract בטקסט קבוע ורושם אילו עמודים נשלחו ל-OCR"""
+
+    def __init__(self, **kwargs):
+        super().__init__(dpi=30, **kwargs)
+        self.ocr_pages = []
+
+    def _run_tesseract(self, page_number, key, image, rasterize_seconds):
+        self.ocr_pages.append(page_number)
+        text = f'קבלה מס {page_number} 03/04/2024'
+        self._write_cache(key, text)
+        self.timings.append({'page': page_number, 'cached': False,
+                             'rasterize_seconds': rasterize_seconds, 'ocr_seconds': 0.0})
+        return text
+
+
+def test_only_pages_without_text_are_ocred(tmp_path):
+    # עמודים "סרוקים" שונים זה מזה, כדי שלא יחלקו מפתח מטמון
+    content = make_pdf([['עמוד עם טקסט'], [' '], ['עוד טקסט'], ['   ']])
+    ocr = FakeTesseract(cache_dir=tmp_path, max_workers=2)
+
+    texts = list(PDFProcessor.iter_page_texts(io.BytesIO(content), ocr=ocr))
+
+    assert sorted(ocr.ocr_pages) == [1, 3]
+    assert texts == ['עמוד עם טקסט', 'קבלה מס 1 03/04/2024', 'עוד טקסט', 'קבלה מס 3 03/04/2024']
+    assert [timing['page'] for timing in sorted(ocr.timings, key=lambda timing: timing['page'])] == [1, 3]
+
+
+def test_rerun_reads_ocr_from_disk_cache(tmp_path):
+    content = make_pdf([[]])
+    PDFProcessor.extract_data_from_pdf(io.BytesIO(content), 'receipt', ocr=FakeTesseract(cache_dir=tmp_path))
+
+    rerun = FakeTesseract(cache_dir=tmp_path)
+    data = PDFProcessor.extract_data_from_pdf(io.BytesIO(content), 'receipt', ocr=rerun)
+
+    assert rerun.ocr_pages == []
+    assert rerun.timings == [{'page': 0, 'cached': True, 'rasterize_seconds': 0.0, 'ocr_seconds': 0.0}]
+    assert data['reference'] == '0'
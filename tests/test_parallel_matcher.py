@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from match_engine import MatchEngine
+from parallel_matcher import ParallelMatchEngine
+from test_match_engine import _shared_fixture, _sorted
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('amount_buckets', [1, 4])
+def test_partitioned_candidates_equal_serial_engine(seed, amount_buckets):
+    # התאריכים בקיבוע חוצים את סוף ינואר, כך שהחפיפה בין החודשים נבדקת
+    bank, sources = _shared_fixture(seed)
+
+    expected = MatchEngine().match_transactions(bank, sources)
+    actual = ParallelMatchEngine(workers=1, amount_buckets=amount_buckets).match_transactions(bank, sources)
+
+    pd.testing.assert_frame_equal(_sorted(actual), _sorted(expected), check_dtype=False)
+
+
+def test_match_across_month_edge():
+    bank = pd.DataFrame({'id': [1, 2], 'date': ['2024-01-31', '2024-03-01'], 'amount': [100.0, 250.0]})
+    sources = {'checks': pd.DataFrame({'id': [7, 8], 'date': ['2024-02-02', '2024-02-28'], 'amount': [100.0, 250.0]})}
+
+    candidates = ParallelMatchEngine(workers=1).match_transactions(bank, sources)
+
+    assert candidates[['bank_transaction_id', 'matched_id']].values.tolist() == [[1, 7], [2, 8]]
+
+
+def test_companies_never_match_each_other():
+    bank = pd.DataFrame({'id': [1, 2], 'date': '2024-05-10', 'amount': 300.0, 'company_id': ['א', 'ב']})
+    sources = {'invoices': pd.DataFrame({'id': [5], 'date': '2024-05-10', 'amount': 300.0, 'company_id': ['ב']})}
+
+    candidates = ParallelMatchEngine(workers=1).match_transactions(bank, sources)
+
+    assert candidates['bank_transaction_id'].tolist() == [2]
+
+
+@pytest.mark.parametrize('side', ['bank', 'documents'])
+def test_company_column_on_one_side_does_not_partition(side):
+    bank = pd.DataFrame({'id': [1, 2], 'date': '2024-05-10', 'amount': [300.0, 400.0]})
+    sources = {'invoices': pd.DataFrame({'id': [5, 6], 'date': '2024-05-10', 'amount': [300.0, 400.0]})}
+    if side == 'bank':
+        bank['company_id'] = ['א', 'ב']
+    else:
+        sources['invoices']['company_id'] = ['א', 'ב']
+
+    candidates = ParallelMatchEngine(workers=1).match_transactions(bank, sources)
+    expected = MatchEngine().match_transactions(bank, sources)
+
+    assert candidates[['bank_transaction_id', 'matched_id']].values.tolist() == [[1, 5], [2, 6]]
+    assert len(candidates) == len(expected)
+
+
+def test_worker_processes_merge_deterministically():
+    bank, sources = _shared_fixture(0)
+
+    serial = ParallelMatchEngine(workers=1, amount_buckets=4).match_transactions(bank, sources)
+    parallel = ParallelMatchEngine(workers=2, amount_buckets=4).match_transactions(bank, sources)
+
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_window_longer_than_month_rejected():
+    with pytest.raises(ValueError):
+        ParallelMatchEngine(tolerance_days=40)
@@ -0,0 +1,57 @@
+import io
+
+import pytest
+
+pytest.importorskip('pdfplumber')
+
+from pdf_fixtures import make_pdf  # noqa: E402
+from pdf_processor import PDFBatchProcessor, PDFProcessor, parse_pdf  # noqa: E402
+
+
+def _invoice(number, amount):
+    return make_pdf([[f'חשבונית מס: {number}', 'תאריך 05/03/2024', f'סה"כ {amount}']])
+
+
+def test_parse_pdf_builds_table_record():
+    result = parse_pdf('a.pdf', make_pdf([['קבלה מס 77', '01/02/2024 ₪ 310.50']]), 'receipt')
+
+    assert result['error'] is None
+    assert result['record']['receipt_number'] == '77'
+    assert result['record']['date'] == '01/02/2024'
+
+
+def test_batch_isolates_corrupt_files():
+    documents = [
+        ('good-1.pdf', _invoice(1001, 100), 'invoice'),
+        ('broken.pdf', b'%PDF-1.4 not really a pdf', 'invoice'),
+        ('good-2.pdf', _invoice(1002, 200), 'invoice'),
+    ]
+
+    results = sorted(PDFBatchProcessor(max_workers=2).process(documents), key=lambda result: result['index'])
+
+    assert [result['name'] for result in results] == ['good-1.pdf', 'broken.pdf', 'good-2.pdf']
+    assert results[1]['record'] is None and results[1]['error']
+    assert [results[0]['record']['invoice_number'], results[2]['record']['invoice_number']] == ['1001', '1002']
+
+
+def test_page_stream_stops_once_all_fields_found():
+    consumed = []
+
+    def pages():
+        for text in ['חשבונית מס 55 בתאריך 02/02/2024 סכום 90', 'עמוד 2', 'עמוד 3']:
+            consumed.append(text)
+            yield text
+
+    data = PDFProcessor.extract_data_from_pages(pages(), 'invoice')
+
+    assert data == {'date': '02/02/2024', 'amount': 90.0, 'reference': '55'}
+    assert len(consumed) == 1
+
+
+def test_fields_collected_across_pages_within_cap():
+    content = make_pdf([[], ['חשבונית מס 9001'], ['תאריך 10/10/2024', 'סה"כ לתשלום 1,170.00'], ['עמוד נוסף']])
+
+    assert PDFProcessor.extract_data_from_pdf(io.BytesIO(content), 'invoice', max_pages=2)['date'] is None
+    assert PDFProcessor.extract_data_from_pdf(io.BytesIO(content), 'invoice') == {
+        'date': '10/10/2024', 'amount': 1170.0, 'reference': '9001'
+    }
@@ -0,0 +1,241 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+import data_access
+import reconcile
+from financial_matcher import FinancialMatcher, SupabaseClient
+from job_queue import JobQueue
+from notifier import LogNotifier
+from reconcile import LocalFile, classify, reconcile as run_reconcile
+from supabase_fakes import FakePostgrest
+
+
+class FakeMatcher:
+    """FinancialMatcher בלי בסיס נתונים - רושם אילו קבצים נקלטו ובאיזה מצב הותאמו"""
+
+    def __init__(self, failing=()):
+        self.notifier = LogNotifier()
+        self.failing = set(failing)
+        self.loaded = []
+        self.pdfs = []
+        self.supabase = type('Supabase', (), {
+            'last_match_run': {'matches_saved': 2}, 'last_assignment_run': {'matches_saved': 1},
+            'last_group_run': {'found': 0}
+        })()
+
+    def load_excel_file(self, file, file_type):
+        self.loaded.append((file.name, file_type))
+        return file.name not in self.failing
+
+    def process_pdf_files(self, files):
+        self.pdfs = [(file.name, doc_type) for file, doc_type in files]
+        return len(files)
+
+    def process_matches(self, incremental=True, one_to_one=False, tolerant=False, details=True):
+        self.match_call = (incremental, one_to_one, tolerant)
+        return pd.DataFrame({'bank_transaction_id': [1, 2]}) if details else None
+
+    def process_group_matches(self):
+        return pd.DataFrame()
+
+
+def _files(*names):
+    return [LocalFile(name, b'x') for name in names]
+
+
+def test_classify_by_file_name():
+    statements, pdfs, skipped = classify(_files(
+        'עו"ש ינואר.xlsx', 'checks_2024.csv', 'העברות.csv', 'חשבונית 17.pdf', 'receipt_3.PDF', 'notes.txt', 'other.csv'
+    ))
+
+    assert [(file.name, kind) for file, kind in statements] == [
+        ('עו"ש ינואר.xlsx', 'bank'), ('checks_2024.csv', 'checks'), ('העברות.csv', 'transfers')
+    ]
+    assert [kind for _, kind in pdfs] == ['invoice', 'receipt']
+    assert skipped == ['notes.txt', 'other.csv']
+
+
+def test_reconcile_report():
+    matcher = FakeMatcher(failing={'bank.csv'})
+
+    report, results = run_reconcile(matcher, _files('bank.csv', 'checks.csv', 'invoice_1.pdf'), mode='one_to_one')
+
+    assert matcher.match_call == (False, True, False)
+    assert report['statements'] == {'bank.csv': False, 'checks.csv': True}
+    assert (report['pdfs_ingested'], report['matches'], report['match_run']) == (1, 1, {'matches_saved': 1})
+    assert not report['ok'] and len(results) == 2
+
+
+def test_reconcile_tolerant_mode():
+    matcher = FakeMatcher()
+
+    report, _ = run_reconcile(matcher, _files('bank.csv'), mode='tolerant')
+
+    assert matcher.match_call == (False, False, True)
+    assert report['match_run'] == {'matches_saved': 1}
+
+
+def test_reconcile_without_details_reports_run_count():
+    matcher = FakeMatcher()
+
+    report, results = run_reconcile(matcher, _files('bank.csv'), details=False)
+
+    assert results is None
+    assert report['matches'] == 2
+
+
+class FakeData:
+    """DataAccess בלי שרת - הטבלאות כ-DataFrame, וקריאות לפונקציות נרשמות"""
+
+    def __init__(self, tables):
+        self.client = None
+        self.tables = tables
+        self.calls = []
+
+    def reader(self):
+        return SimpleNamespace(bank_transactions=lambda columns: self._stream('bank_transactions'),
+                               table=lambda name, columns='*': self._stream(name),
+                               match_details=lambda: self._stream('match_details'))
+
+    def _stream(self, name):
+        return SimpleNamespace(to_frame=lambda: self.tables.get(name, pd.DataFrame(columns=['id', 'date', 'amount'])))
+
+    def call(self, name, params=None):
+        self.calls.append((name, params))
+
+    def rpc(self, name, params=None):
+        return []
+
+    def refresh_views(self):
+        return False
+
+    def invalidate(self):
+        pass
+
+
+def test_tolerant_matches_saved_as_assignment():
+    # עמלה של 2.5 ש"ח בהעברה, ומספר השיק בתיאור מכריע בין שני שיקים באותו סכום
+    data = FakeData({
+        'bank_transactions': pd.DataFrame({'id': [1, 2], 'date': ['2024-03-01', '2024-03-02'],
+                                           'amount': [-997.5, -300.0], 'description': ['העברה לספק', 'שיק 4512']}),
+        'bank_transfers': pd.DataFrame({'id': [7], 'date': ['2024-03-01'], 'amount': [1000.0],
+                                        'reference_number': [None], 'description': ['ספק']}),
+        'checks': pd.DataFrame({'id': [3, 4], 'date': ['2024-03-02', '2024-03-02'], 'amount': [300.0, 300.0],
+                                'check_number': ['4511', '4512'], 'payer_name': [None, None]})
+    })
+    client = SupabaseClient(data=data)
+
+    client.process_matches(tolerant=True)
+
+    name, params = data.calls[-1]
+    assert name == 'save_assigned_matches' and params['exclusive'] is False
+    assert [(match['bank_transaction_id'], match['matched_table'], match['matched_id'])
+            for match in params['matches']] == [(1, 'bank_transfers', 7), (2, 'checks', 4)]
+    assert params['scanned'] == {'bank_transactions': [[1, 2]], 'checks': [[3, 4]], 'bank_transfers': [[7, 7]],
+                                 'invoices': [], 'receipts': []}
+    assert client.last_assignment_run['matches_saved'] == 2
+
+
+def test_one_to_one_tolerant_assigns_every_equal_amount_row():
+    # כל השורות שנסרקו יוצאות מהתור, ולכן גם שורות שהחיתוך השאיר בלי מועמד לא היו חוזרות לעולם
+    data = FakeData({
+        'bank_transactions': pd.DataFrame({'id': range(1, 21), 'date': '2024-03-01', 'amount': -250.0,
+                                           'description': None}),
+        'checks': pd.DataFrame({'id': range(101, 121), 'date': '2024-03-01', 'amount': 250.0,
+                                'check_number': None, 'payer_name': None})
+    })
+    client = SupabaseClient(data=data)
+
+    client.process_matches(one_to_one=True, tolerant=True)
+
+    name, params = data.calls[-1]
+    assert name == 'save_assigned_matches' and params['exclusive'] is True
+    assert params['scanned']['bank_transactions'] == [[1, 20]]
+    assert sorted(match['matched_id'] for match in params['matches']) == list(range(101, 121))
+
+
+class MatchingPostgrest(FakePostgrest):
+    """PostgREST מדומה עם פונקציית ההתאמה המלאה, ו-get_match_details שנקטעת ב-max-rows כמו בשרת"""
+
+    def rpc(self, name, params=None):
+        if name == 'save_best_matches':
+            self.requests.append((name, params))
+            return SimpleNamespace(execute=lambda: SimpleNamespace(data=None))
+        if name == 'get_match_statistics':
+            self.requests.append((name, params))
+            return SimpleNamespace(execute=lambda: SimpleNamespace(data=[{'matched_transactions': 2500}]))
+        if name == 'get_match_details':
+            self.requests.append((name, params))
+            return SimpleNamespace(execute=lambda: SimpleNamespace(data=self.cap(self.match_details)))
+        return super().rpc(name, params)
+
+
+def test_match_results_not_cut_at_max_rows():
+    rows = [{'match_id': i, 'match_date': f'2024-03-01T00:00:{i % 60:02d}', 'bank_transaction_id': i,
+             'bank_date': '2024-03-01', 'matched_table': 'checks', 'matched_id': i} for i in range(1, 2501)]
+    server = MatchingPostgrest(match_details=rows, max_rows=1000)
+    client = SupabaseClient(data=data_access.DataAccess(client=server, cache=data_access.QueryCache()))
+
+    results = client.process_matches(incremental=False)
+
+    assert len(results) == 2500
+    assert sorted(results['match_id']) == list(range(1, 2501))
+    assert client.last_match_run == {'matches_saved': 2500}
+
+
+class SlowData(FakeData):
+    """פונקציית ההתאמה לוקחת זמן ורושמת כמה ריצות היו בתוכה בו-זמנית"""
+
+    def __init__(self, state):
+        super().__init__({})
+        self.state = state
+
+    def call(self, name, params=None):
+        with self.state['lock']:
+            self.state['active'] += 1
+            self.state['most'] = max(self.state['most'], self.state['active'])
+        time.sleep(0.05)
+        with self.state['lock']:
+            self.state['active'] -= 1
+
+
+def test_two_jobs_match_one_at_a_time():
+    state = {'lock': threading.Lock(), 'active': 0, 'most': 0}
+    ingested = threading.Barrier(2, timeout=5)
+
+    def job():
+        # הקליטה רצה במקביל - שתי העבודות עוברות את המחסום יחד - ואז שתיהן מגיעות להתאמה
+        ingested.wait()
+        SupabaseClient(data=SlowData(state)).process_matches(incremental=True)
+
+    jobs = JobQueue(workers=2, max_pending=4)
+    submitted = [jobs.submit(job) for _ in range(2)]
+    jobs.join()
+    jobs.shutdown()
+
+    assert [job.status for job in submitted] == ['done', 'done']
+    assert state['most'] == 1
+
+
+def test_financial_matcher_without_streamlit_session(monkeypatch):
+    monkeypatch.setattr(data_access, '_client', None)
+    monkeypatch.delenv('SUPABASE_URL', raising=False)
+    monkeypatch.delenv('SUPABASE_KEY', raising=False)
+    notifier = LogNotifier()
+
+    matcher = FinancialMatcher(notifier)
+
+    assert matcher.supabase is None
+    assert notifier.messages[0]['level'] == 'error' and 'Supabase' in notifier.messages[0]['message']
+
+
+def test_cli_exits_without_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_access, '_client', None)
+    monkeypatch.delenv('SUPABASE_URL', raising=False)
+    monkeypatch.delenv('SUPABASE_KEY', raising=False)
+    (tmp_path / 'bank.csv').write_text('תאריך,סכום\n2024-01-01,10\n', encoding='utf-8')
+
+    assert reconcile.main([str(tmp_path)]) == 2
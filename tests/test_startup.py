@@ -0,0 +1,18 @@
+import pytest
+
+from benchmarks.bench_startup import STARTUP_BUDGETS, import_times, loaded_heavy
+
+# חבילות שבלעדיהן נקודת הכניסה לא נטענת כלל
+REQUIRES = {'dashboard': 'streamlit', 'integrated_dashboard': 'streamlit', 'api_server': 'fastapi'}
+
+
+@pytest.mark.parametrize('module', list(STARTUP_BUDGETS))
+def test_entry_point_startup_budget(module):
+    if module in REQUIRES:
+        pytest.importorskip(REQUIRES[module])
+    budget, forbidden = STARTUP_BUDGETS[module]
+
+    times = import_times(module)
+
+    assert loaded_heavy(times, forbidden) == []
+    assert times[module][1] / 1e6 < budget
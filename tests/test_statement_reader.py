@@ -0,0 +1,92 @@
+import io
+
+import pandas as pd
+import pytest
+
+from data_cleaner import DataCleaner
+from ingest_ledger import IngestLedger, OccurrenceTracker
+from statement_reader import StatementReader
+
+
+def _statement(rows=23):
+    return pd.DataFrame({
+        'תאריך': pd.date_range('2024-01-01', periods=rows).strftime('%d/%m/%Y'),
+        'סכום': [f'₪{i * 10:,}.50' for i in range(rows)],
+        'תיאור': [f'  עסקה   {i} ' for i in range(rows)]
+    })
+
+
+def _upload(content, name):
+    file = io.BytesIO(content)
+    file.name = name
+    return file
+
+
+def test_csv_chunks_clean_like_whole_file():
+    statement = _statement()
+    content = statement.to_csv(index=False).encode('utf-8')
+
+    chunks = list(StatementReader(chunk_rows=5).iter_chunks(_upload(content, 'bank.csv')))
+    cleaned = pd.concat(
+        [DataCleaner.clean_bank_transactions(chunk, vectorized=True) for chunk, _ in chunks], ignore_index=True
+    )
+    whole = DataCleaner.clean_bank_transactions(pd.read_csv(io.BytesIO(content)), vectorized=True)
+
+    assert [len(chunk) for chunk, _ in chunks] == [5, 5, 5, 5, 3]
+    assert chunks[-1][1] == 1.0
+    pd.testing.assert_frame_equal(cleaned, whole)
+
+
+def test_xlsx_rows_streamed_in_chunks():
+    pytest.importorskip('openpyxl')
+    statement = _statement(12)
+    buffer = io.BytesIO()
+    statement.to_excel(buffer, index=False)
+
+    chunks = list(StatementReader(chunk_rows=5).iter_chunks(_upload(buffer.getvalue(), 'bank.xlsx')))
+
+    assert [len(chunk) for chunk, _ in chunks] == [5, 5, 2]
+    assert [fraction for _, fraction in chunks] == [5 / 12, 10 / 12, 1.0]
+    streamed = pd.concat([chunk for chunk, _ in chunks], ignore_index=True)
+    assert list(streamed.columns) == list(statement.columns)
+    assert streamed['סכום'].tolist() == statement['סכום'].tolist()
+
+
+def _checks_keys(content, name, chunk_rows):
+    reader, occurrences, frames = StatementReader(chunk_rows=chunk_rows), OccurrenceTracker(), []
+    for chunk, _ in reader.iter_chunks(_upload(content, name)):
+        cleaned = DataCleaner.clean_checks(chunk, vectorized=True)
+        frames.append(IngestLedger.add_natural_keys(cleaned, 'checks', occurrences))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize('suffix', ['csv', 'xlsx'])
+def test_text_columns_keep_values_and_keys_across_chunks(suffix):
+    # מספר שיק חסר רק במנה השנייה - לא הופך את העמודה למספר באותה מנה בלבד
+    statement = pd.DataFrame({
+        'תאריך': pd.date_range('2024-01-01', periods=12).strftime('%d/%m/%Y'),
+        'סכום': [f'{i * 10}.50' for i in range(12)],
+        'מספר_שיק': ['0042', '1001', '1002', '1003', '1004', None, '1006', '1007', '1008', '1009', '1010', '1011'],
+        'שם_משלם': ['דני'] * 12
+    })
+    if suffix == 'csv':
+        content = statement.to_csv(index=False).encode('utf-8')
+    else:
+        pytest.importorskip('openpyxl')
+        buffer = io.BytesIO()
+        # ב-Excel מספר השיק הוא תא מספרי
+        statement.assign(מספר_שיק=pd.to_numeric(statement['מספר_שיק']).astype('Int64')).to_excel(buffer, index=False)
+        content = buffer.getvalue()
+
+    chunked = _checks_keys(content, f'checks.{suffix}', chunk_rows=5)
+    whole = _checks_keys(content, f'checks.{suffix}', chunk_rows=100)
+
+    assert chunked['natural_key'].tolist() == whole['natural_key'].tolist()
+    assert chunked['check_number'].tolist()[1:5] == ['1001', '1002', '1003', '1004']
+    if suffix == 'csv':
+        assert chunked['check_number'].iloc[0] == '0042'
+
+
+def test_unsupported_format_rejected():
+    with pytest.raises(ValueError):
+        StatementReader().iter_chunks(_upload(b'', 'bank.pdf'))
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from keyset_reader import KeysetReader
+from match_engine import MatchEngine
+from parallel_matcher import ParallelMatchEngine
+from supabase_fakes import FakePostgrest
+from test_match_engine import _shared_fixture, _sorted
+from transaction_store import TransactionStore, amounts_to_cents, id_ranges
+
+
+def _frame():
+    return pd.DataFrame({
+        'id': [1, 2, 3],
+        'date': ['2024-01-31', '2024-02-01', '2024-02-01'],
+        'amount': [0.1 + 0.2, -1250.5, 99999999.99],
+        'description': ['העברה', None, 'העברה']
+    })
+
+
+def test_amounts_in_agorot_without_float_error():
+    store = TransactionStore.from_frame(_frame())
+
+    assert store.cents.tolist() == [30, -125050, 9999999999]
+    assert amounts_to_cents(pd.Series(['0.30', '-1250.50', '12.345'])).tolist() == [30, -125050, 1234]
+
+
+def test_column_types_and_dictionary_encoding():
+    store = TransactionStore.from_frame(_frame())
+
+    assert (store.ids.dtype, store.cents.dtype, store.days.dtype) == (np.int64, np.int64, np.int32)
+    codes, categories = store.text['description']
+    assert codes.tolist() == [0, -1, 0]
+    assert categories.tolist() == ['העברה']
+    assert store['date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-31', '2024-02-01', '2024-02-01']
+
+
+def test_round_trip_to_records():
+    store = TransactionStore.from_frame(_frame())
+
+    assert store.to_records()[1] == {'id': 2, 'amount': -1250.5, 'date': '2024-02-01', 'description': None}
+
+
+def test_numpy_views_share_memory():
+    store = TransactionStore.from_frame(_frame())
+
+    frame = store.to_frame()
+
+    assert np.shares_memory(frame['amount_cents'].to_numpy(), store.cents)
+    assert np.shares_memory(store.categorical('description').codes, store.text['description'][0])
+
+
+def test_arrow_table():
+    pa = pytest.importorskip('pyarrow')
+    store = TransactionStore.from_frame(_frame())
+
+    table = store.to_arrow()
+
+    assert table.schema.field('date').type == pa.date32()
+    assert pa.types.is_dictionary(table.schema.field('description').type)
+    assert table.column('description').to_pylist() == ['העברה', None, 'העברה']
+    assert table.column('amount_cents').to_pylist() == store.cents.tolist()
+
+
+def test_chunks_share_one_dictionary():
+    rows = [{'id': i, 'date': '2024-03-01', 'amount': float(i), 'description': f'ספק {i % 3}'} for i in range(1, 11)]
+    stream = KeysetReader(FakePostgrest(tables={'bank_transactions': rows}), page_size=4).bank_transactions()
+
+    store = TransactionStore.from_chunks(stream)
+
+    assert len(store) == 10
+    assert len(store.text['description'][1]) == 3
+    assert store['description'].astype(str).tolist() == [row['description'] for row in rows]
+
+
+def test_monthly_totals_are_exact():
+    store = TransactionStore.from_frame(pd.DataFrame({
+        'id': range(1, 11), 'date': '2024-05-15', 'amount': [0.1] * 10
+    }))
+
+    totals = store.monthly_totals()
+
+    assert totals['amount_cents'].tolist() == [100]
+    assert totals['count'].tolist() == [10]
+
+
+def test_take_keeps_dictionary():
+    store = TransactionStore.from_frame(_frame())
+
+    subset = store.take(store.cents > 0)
+
+    assert subset.ids.tolist() == [1, 3]
+    assert subset.text['description'][1] is store.text['description'][1]
+
+
+@pytest.mark.parametrize('engine', [MatchEngine(), ParallelMatchEngine(workers=1)])
+def test_engines_match_same_candidates_from_store(engine):
+    bank, sources = _shared_fixture(1)
+
+    expected = engine.match_transactions(bank, sources)
+    actual = engine.match_transactions(
+        TransactionStore.from_frame(bank, text_columns=[]),
+        {name: TransactionStore.from_frame(df, text_columns=[]) for name, df in sources.items()}
+    )
+
+    pd.testing.assert_frame_equal(_sorted(actual), _sorted(expected), check_dtype=False)
+
+
+def test_id_ranges_split_at_gaps():
+    assert id_ranges(np.array([7, 3, 4, 5, 9, 10, 4])) == [[3, 5], [7, 7], [9, 10]]
+    assert id_ranges([]) == []
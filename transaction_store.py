@@ -0,0 +1,222 @@
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+
+# עמודות הליבה של כל טבלת תנועות; שאר העמודות הן טקסט ונשמרות כקודי מילון
+CORE_COLUMNS = ('id', 'amount', 'date')
+# קוד של ערך חסר בעמודת טקסט - כמו ב-pd.Categorical
+MISSING_CODE = -1
+
+
+def amounts_to_cents(values):
+    """סכומים לאגורות (int64, עם סימן) בלי תלות בעיגול של float.
+
+    מספרים מעוגלים לאגורה הקרובה (סכום נקי הוא כבר בשתי ספרות, כך שהכפלה ב-100 מדויקת עד
+    הרבה מעבר לטווח הסכומים). מחרוזות מפוענחות כ-Decimal, פעם אחת לכל ערך ייחודי
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        numbers = series.to_numpy(dtype='float64')
+        if np.isnan(numbers).any():
+            raise ValueError("עמודת הסכום מכילה ערכים חסרים")
+        return np.rint(numbers * 100).astype('int64')
+
+    unique, codes = np.unique(series.astype(str).to_numpy(), return_inverse=True)
+    cents = np.empty(len(unique), dtype='int64')
+    for i, text in enumerate(unique.tolist()):
+        try:
+            cents[i] = int((Decimal(text) * 100).to_integral_value())
+        except InvalidOperation:
+            raise ValueError(f"סכום לא תקין: {text}")
+    return cents[codes]
+
+
+def dates_to_days(values):
+    """תאריכים למספר ימים מאז 1970-01-01 (int32)"""
+    days = pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[D]')
+    if np.isnat(days).any():
+        raise ValueError("עמודת התאריך מכילה ערכים חסרים")
+    return days.astype('int64').astype('int32')
+
+
+def _dictionary(values):
+    """ערכי המילון - מחרוזות בטיפוס str של pandas (מאוחסן ברצף אחד ב-Arrow), אחרים כ-object"""
+    if len(values) and pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        return pd.Index(values, dtype='str')
+    return pd.Index(values, dtype=object)
+
+
+def code_dtype(categories):
+    """הטיפוס השלם הקטן ביותר לקודי המילון - אותו כלל כמו ב-pd.Categorical, כדי שהקודים לא יועתקו"""
+    for dtype in ('int8', 'int16', 'int32'):
+        if len(categories) < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype('int64')
+
+
+def id_ranges(ids):
+    """המזהים כרשימת טווחים רציפים [ראשון, אחרון] - כך נשלח לשרת אילו שורות נקראו בלי לשלוח כל מזהה.
+    מזהה חסר באמצע (שורה שעוד לא הייתה גלויה בזמן הקריאה) מפצל את הטווח"""
+    ids = np.unique(np.asarray(ids, dtype='int64'))
+    if len(ids) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(ids) != 1)
+    starts = np.r_[ids[0], ids[breaks + 1]]
+    ends = np.r_[ids[breaks], ids[-1]]
+    return np.column_stack([starts, ends]).tolist()
+
+
+def monthly_totals(days, cents):
+    """מספר התנועות וסכום באגורות לכל חודש, מחושבים על מספרים שלמים - בלי הצטברות שגיאות float"""
+    months = np.asarray(days).astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+    periods, inverse = np.unique(months, return_inverse=True)
+    amounts = np.zeros(len(periods), dtype='int64')
+    np.add.at(amounts, inverse, cents)
+    return pd.DataFrame({
+        'count': np.bincount(inverse, minlength=len(periods)),
+        'amount_cents': amounts
+    }, index=pd.PeriodIndex(periods.astype('datetime64[M]'), freq='M'))
+
+
+class TransactionStore:
+    """טבלת תנועות בעמודות קומפקטיות: מזהה int64, סכום באגורות int64, תאריך בימים int32,
+    ועמודות טקסט כקודי מילון (int8 עד int32 לפי גודל המילון) מול מערך ערכים ייחודיים.
+
+    המערכים נחשפים כמו שהם (בלי העתקה) ל-NumPy, ל-pandas ול-Arrow. הממשק דומה ל-DataFrame
+    ככל שהמנועים צריכים: len, empty, columns ו-store[column]
+    """
+
+    def __init__(self, ids, cents, days, text=None):
+        self.ids = np.asarray(ids, dtype='int64')
+        self.cents = np.asarray(cents, dtype='int64')
+        self.days = np.asarray(days, dtype='int32')
+        # שם עמודה -> (קודים, ערכים ייחודיים כ-pd.Index)
+        self.text = dict(text or {})
+
+    @classmethod
+    def from_frame(cls, df, text_columns=None):
+        """בנייה מ-DataFrame נקי (סכום כמספר או מחרוזת, תאריך כמחרוזת או datetime).
+        ברירת המחדל לעמודות הטקסט: כל העמודות שאינן id, amount או date"""
+        if text_columns is None:
+            text_columns = [column for column in df.columns if column not in CORE_COLUMNS]
+        text = {}
+        for column in text_columns:
+            codes, categories = pd.factorize(df[column], use_na_sentinel=True)
+            text[column] = (codes.astype(code_dtype(categories)), _dictionary(categories))
+        return cls(
+            df['id'].to_numpy(dtype='int64'),
+            amounts_to_cents(df['amount']) if len(df) else np.empty(0, dtype='int64'),
+            dates_to_days(df['date']) if len(df) else np.empty(0, dtype='int32'),
+            text
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks, text_columns=None):
+        """בנייה מעמודים (למשל ReadStream) - כל עמוד מקודד מיד, כך שבזיכרון לא נשמרות שורות כמחרוזות"""
+        return cls.concat([cls.from_frame(chunk, text_columns) for chunk in chunks])
+
+    @classmethod
+    def concat(cls, stores):
+        """איחוד טבלאות; המילונים של עמודות הטקסט מאוחדים והקודים ממופים מחדש"""
+        stores = list(stores)
+        if not stores:
+            return cls(np.empty(0), np.empty(0), np.empty(0))
+
+        text = {}
+        for column in stores[0].text:
+            categories = _dictionary(
+                pd.unique(np.concatenate([store.text[column][1].to_numpy(dtype=object) for store in stores]))
+            )
+            parts = []
+            for store in stores:
+                codes, local = store.text[column]
+                mapping = np.r_[categories.get_indexer(local), MISSING_CODE].astype(code_dtype(categories))
+                # קוד חסר (-1) נופל על האיבר האחרון במיפוי ונשאר חסר
+                parts.append(mapping[codes])
+            text[column] = (np.concatenate(parts), categories)
+
+        return cls(
+            np.concatenate([store.ids for store in stores]),
+            np.concatenate([store.cents for store in stores]),
+            np.concatenate([store.days for store in stores]),
+            text
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def empty(self):
+        return len(self.ids) == 0
+
+    @property
+    def columns(self):
+        return pd.Index(list(CORE_COLUMNS) + list(self.text))
+
+    @property
+    def nbytes(self):
+        """הזיכרון של כל המערכים, כולל מילוני הטקסט"""
+        total = self.ids.nbytes + self.cents.nbytes + self.days.nbytes
+        for codes, categories in self.text.values():
+            total += codes.nbytes + categories.memory_usage(deep=True)
+        return total
+
+    def categorical(self, column):
+        """עמודת טקסט כ-pd.Categorical מעל אותם קודים"""
+        codes, categories = self.text[column]
+        return pd.Categorical.from_codes(codes, categories=categories, validate=False)
+
+    def __getitem__(self, column):
+        """עמודה כ-Series של pandas: סכום בשקלים, תאריך כ-datetime64, טקסט כקטגוריה"""
+        if column == 'id':
+            return pd.Series(self.ids, name='id', copy=False)
+        if column == 'amount':
+            return pd.Series(self.cents / 100, name='amount')
+        if column == 'date':
+            return pd.Series(self.days.astype('datetime64[D]'), name='date')
+        return pd.Series(self.categorical(column), name=column)
+
+    def take(self, indices):
+        """שורות לפי אינדקסים או מסכה - מילוני הטקסט משותפים לתוצאה"""
+        return TransactionStore(
+            self.ids[indices], self.cents[indices], self.days[indices],
+            {column: (codes[indices], categories) for column, (codes, categories) in self.text.items()}
+        )
+
+    def to_frame(self):
+        """DataFrame קומפקטי: amount_cents ו-days כמספרים שלמים וטקסט כקטגוריות"""
+        frame = pd.DataFrame({'id': self.ids, 'amount_cents': self.cents, 'days': self.days}, copy=False)
+        for column in self.text:
+            frame[column] = self.categorical(column)
+        return frame
+
+    def to_records(self):
+        """שורות בפורמט של טבלאות המקור (סכום בשקלים, תאריך YYYY-MM-DD) - להעלאה ולתצוגה"""
+        frame = pd.DataFrame({
+            'id': self.ids,
+            'amount': self.cents / 100,
+            'date': pd.Series(self.days.astype('datetime64[D]')).dt.strftime('%Y-%m-%d')
+        })
+        for column in self.text:
+            frame[column] = self.categorical(column).astype(object)
+        return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+    def to_arrow(self):
+        """pyarrow.Table מעל אותם מערכים: date32 לתאריך ו-dictionary לטקסט"""
+        import pyarrow as pa
+
+        columns = {
+            'id': pa.array(self.ids),
+            'amount_cents': pa.array(self.cents),
+            'date': pa.array(self.days).view(pa.date32())
+        }
+        for column, (codes, categories) in self.text.items():
+            indices = pa.array(codes, mask=codes == MISSING_CODE)
+            dictionary = pa.array(categories.to_numpy(dtype=object), type=pa.string())
+            columns[column] = pa.DictionaryArray.from_arrays(indices, dictionary)
+        return pa.table(columns)
+
+    def monthly_totals(self):
+        """מספר התנועות וסכום באגורות לכל חודש"""
+        return monthly_totals(self.days, self.cents)